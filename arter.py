@@ -4,22 +4,106 @@
 # 🌐 https://github.com/nnnrodnoy/Huekka/
 # You can redistribute it and/or modify it under the terms of the MIT License
 # 🔑 https://opensource.org/licenses/MIT
+import glob
+import hashlib
 import os
 import re
 import random
+import sys
 from pathlib import Path
 from config import BotConfig
 
+# Теги, кроме цветовых, и закрывающие цветовые теги удаляются
+TAG_PATTERN = re.compile(r'\[(?!color)[^]]*\]')
+COLOR_CLOSE_PATTERN = re.compile(r'\[/color\]')
+COLOR_BLOCK_PATTERN = re.compile(r'\[color=#([0-9a-f]{6})\](.*?)(?=\[color=|$)', re.IGNORECASE)
+
+# Отрисованные арты: cash/arts/<имя>-<ключ>.ansi
+CACHE_DIR = Path("cash") / "arts"
+
+_background_table = None
+_background_key = None
+
+def get_background_table():
+    """Таблица str.translate: все символы фона -> пробел (строится один раз)"""
+    global _background_table, _background_key
+    if _background_table is None:
+        chars = "".join(sorted(BotConfig.ARTER['background_chars']))
+        _background_table = str.maketrans(chars, " " * len(chars))
+        _background_key = hashlib.md5(chars.encode()).hexdigest()[:8]
+    return _background_table
+
 def convert_color(match):
     """Конвертирует цветные блоки в ANSI escape sequences"""
     hex_color = match.group(1).lower()
-    text = match.group(2)
-    
-    # Заменяем все символы фона на пробелы
-    for char in BotConfig.ARTER['background_chars']:
-        text = text.replace(char, ' ')
+    text = match.group(2).translate(get_background_table())
     return f"\033[38;2;{int(hex_color[0:2], 16)};{int(hex_color[2:4], 16)};{int(hex_color[4:6], 16)}m{text}"
 
+def render_art(content):
+    """
+    Переводит арт в ANSI-строку
+    Символы фона не встречаются среди ASCII-символов разметки, поэтому заменяются
+    одним проходом translate по всему тексту до разбора тегов
+    """
+    if not content:
+        return ""
+    
+    lines = []
+    for line in content.translate(get_background_table()).split('\n'):
+        line = TAG_PATTERN.sub('', line)
+        line = COLOR_CLOSE_PATTERN.sub('', line)
+        line = COLOR_BLOCK_PATTERN.sub(convert_color, line)
+        lines.append(line + "\033[0m")
+    
+    # Файл, заканчивающийся переводом строки, не даёт лишней пустой строки
+    if content.endswith('\n'):
+        lines.pop()
+    return "\n".join(lines) + "\n"
+
+def get_cache_path(art_path):
+    """Путь к отрисованному арту; ключ меняется вместе с mtime, размером файла и набором символов фона"""
+    stat = art_path.stat()
+    get_background_table()
+    return CACHE_DIR / f"{art_path.stem}-{stat.st_mtime_ns}-{stat.st_size}-{_background_key}.ansi"
+
+def load_rendered_art(art_path):
+    """Готовый ANSI-арт из кэша или отрисовка с сохранением в кэш"""
+    cache_path = get_cache_path(art_path)
+    try:
+        with open(cache_path, 'r', encoding='utf-8') as f:
+            return f.read()
+    except OSError:
+        pass
+    
+    with open(art_path, 'r', encoding='utf-8') as f:
+        rendered = render_art(f.read())
+    
+    try:
+        CACHE_DIR.mkdir(parents=True, exist_ok=True)
+        # Старые версии этого арта больше не понадобятся; арты с именем "<имя>-..." не затрагиваются
+        stale_pattern = re.compile(re.escape(art_path.stem) + r'-\d+-\d+-[0-9a-f]{8}\.ansi')
+        for stale in CACHE_DIR.glob(f"{glob.escape(art_path.stem)}-*.ansi"):
+            if stale_pattern.fullmatch(stale.name):
+                stale.unlink()
+        temp_path = cache_path.with_suffix(".tmp")
+        with open(temp_path, 'w', encoding='utf-8') as f:
+            f.write(rendered)
+        os.replace(temp_path, cache_path)
+    except OSError:
+        pass
+    
+    return rendered
+
+def print_art(art_path):
+    """Выводит арт одним обращением к stdout"""
+    try:
+        sys.stdout.write(load_rendered_art(art_path))
+        sys.stdout.flush()
+        return True
+    except Exception as e:
+        print(f"Ошибка при обработке арта: {str(e)}")
+        return False
+
 def print_random_art():
     """Выводит случайный ASCII арт из папки arts"""
     arts_dir = Path("arts")
@@ -32,35 +116,7 @@ def print_random_art():
         return False
         
     # Выбираем случайный файл
-    art_file = random.choice(art_files)
-    
-    try:
-        with open(art_file, 'r', encoding='utf-8') as f:
-            for line in f:
-                # Убираем символ перевода строки
-                stripped_line = line.rstrip('\n')
-                # Удаляем все теги, кроме цветовых
-                stripped_line = re.sub(r'\[(?!color)[^]]*\]', '', stripped_line)
-                stripped_line = re.sub(r'\[/color\]', '', stripped_line)
-                
-                # Обрабатываем цветовые блоки
-                stripped_line = re.sub(
-                    r'\[color=#([0-9a-f]{6})\](.*?)(?=\[color=|$)',
-                    convert_color,
-                    stripped_line,
-                    flags=re.IGNORECASE
-                )
-                
-                # Заменяем оставшиеся символы фона
-                for char in BotConfig.ARTER['background_chars']:
-                    stripped_line = stripped_line.replace(char, ' ')
-                
-                # Выводим строку арта
-                print(stripped_line + "\033[0m")
-        return True
-    except Exception as e:
-        print(f"Ошибка при обработке арта: {str(e)}")
-        return False
+    return print_art(random.choice(art_files))
 
 def print_specific_art(art_name):
     """Выводит конкретный арт по имени файла"""
@@ -68,30 +124,4 @@ def print_specific_art(art_name):
     if not art_path.exists():
         return False
         
-    try:
-        with open(art_path, 'r', encoding='utf-8') as f:
-            for line in f:
-                # Убираем символ перевода строки
-                stripped_line = line.rstrip('\n')
-                # Удаляем все теги, кроме цветовых
-                stripped_line = re.sub(r'\[(?!color)[^]]*\]', '', stripped_line)
-                stripped_line = re.sub(r'\[/color\]', '', stripped_line)
-                
-                # Обрабатываем цветовые блоки
-                stripped_line = re.sub(
-                    r'\[color=#([0-9a-f]{6})\](.*?)(?=\[color=|$)',
-                    convert_color,
-                    stripped_line,
-                    flags=re.IGNORECASE
-                )
-                
-                # Заменяем оставшиеся символы фона
-                for char in BotConfig.ARTER['background_chars']:
-                    stripped_line = stripped_line.replace(char, ' ')
-                
-                # Выводим строку арта
-                print(stripped_line + "\033[0m")
-        return True
-    except Exception as e:
-        print(f"Ошибка при обработке арта: {str(e)}")
-        return False
+    return print_art(art_path)
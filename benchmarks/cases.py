@@ -0,0 +1,129 @@
+# ©️ nnnrodnoy, 2025
+# 💬 @nnnrodnoy
+# This file is part of Huekka
+# 🌐 https://github.com/nnnrodnoy/Huekka/
+# You can redistribute it and/or modify it under the terms of the MIT License
+# 🔑 https://opensource.org/licenses/MIT
+import asyncio
+from config import BotConfig
+from core.parser import CustomHtmlParser, EmojiHandler
+from core.formatters import msg, module_info_format, help_format
+from core.name_index import NameIndex
+from benchmarks import corpus
+
+class BenchDatabase:
+    """Минимальная замена DatabaseManager для отрисовки справки"""
+    
+    def __init__(self, module_infos):
+        self.module_infos = module_infos
+    
+    def get_all_module_info(self):
+        return self.module_infos
+    
+    def get_module_info(self, module_name):
+        for info in self.module_infos:
+            if info['name'] == module_name:
+                return info
+        return None
+    
+    def get_all_smiles(self):
+        return ["╰(^∇^)╯", "(◕ω◕✿)"]
+
+class BenchBot:
+    """Минимальная замена UserBot: только то, что читает HelpModule"""
+    
+    def __init__(self, module_infos):
+        self.db = BenchDatabase(module_infos)
+        self.command_prefix = "."
+        self.registry_version = 0
+        self.modules = {}
+        self.commands = {}
+        self.module_descriptions = {}
+        self.module_index = NameIndex()
+        self.command_index = NameIndex()
+        
+        for info in module_infos:
+            self.modules[info['name']] = {}
+            self.module_index.add(info['name'])
+            for cmd in info['commands']:
+                self.modules[info['name']][cmd['command']] = {"description": cmd['description']}
+                self.commands[cmd['command']] = {"description": cmd['description'], "module": info['name']}
+                self.command_index.add(cmd['command'])
+    
+    def register_command(self, cmd, handler, description="", module_name="System"):
+        self.commands[cmd] = {"handler": handler, "description": description, "module": module_name}
+        self.command_index.add(cmd)
+
+def build_cases():
+    """
+    Собирает набор замеров
+    
+    Returns:
+        Список (имя, функция без аргументов)
+    """
+    from core.help import HelpModule
+    
+    module_infos = corpus.make_module_infos()
+    module_info = module_infos[0]
+    dense_markers = corpus.make_dense_emoji_message()
+    dense_html = corpus.make_dense_emoji_html()
+    cyrillic_html = corpus.make_cyrillic_html()
+    plain_messages = corpus.make_plain_chat_messages()
+    
+    cold_parser = CustomHtmlParser(cache_size=0)
+    warm_parser = CustomHtmlParser()
+    
+    bot = BenchBot(module_infos)
+    help_module = HelpModule(bot)
+    loop = asyncio.new_event_loop()
+    
+    help_page = help_module.render_main_page(True, ".")
+    help_html = str(help_page)
+    help_text, help_entities = cold_parser.parse(help_html)
+    cyrillic_text, cyrillic_entities = cold_parser.parse(cyrillic_html)
+    
+    emoji_ids = BotConfig.EMOJI_IDS
+    
+    def plain_prefilter():
+        for text in plain_messages:
+            if EmojiHandler.MARKER_PREFIX in text:
+                EmojiHandler.convert_message(text)
+    
+    return [
+        ("parse.help_page.cold", lambda: cold_parser.parse(help_html)),
+        ("parse.help_page.warm", lambda: warm_parser.parse(help_html)),
+        ("parse.dense_emoji.cold", lambda: cold_parser.parse(dense_html)),
+        ("parse.emoji_markers.cold", lambda: cold_parser.parse(dense_markers)),
+        ("parse.cyrillic.cold", lambda: cold_parser.parse(cyrillic_html)),
+        ("parse.preparsed", lambda: cold_parser.parse(help_page)),
+        ("unparse.help_page", lambda: cold_parser.unparse(help_text, help_entities)),
+        ("unparse.cyrillic", lambda: cold_parser.unparse(cyrillic_text, cyrillic_entities)),
+        ("emoji.convert_emoji_markers", lambda: EmojiHandler.convert_emoji_markers(dense_markers)),
+        ("emoji.convert_message", lambda: EmojiHandler.convert_message(dense_markers)),
+        ("emoji.plain_prefilter_x50", plain_prefilter),
+        ("format.error", lambda: msg.error("Модуль <code>love</code> не найден")),
+        ("format.error_details", lambda: msg.error("Ошибка загрузки модуля", "ModuleNotFoundError: requests")),
+        ("format.warning", lambda: msg.warning("Осторожно")),
+        ("format.success", lambda: msg.success("Готово")),
+        ("format.info", lambda: msg.info("Информация")),
+        ("format.question", lambda: msg.question("Продолжить?")),
+        ("format.tip", lambda: msg.tip("Используйте .help")),
+        ("format.module_info", lambda: module_info_format.format_module_info(
+            module_info, True, emoji_ids["total"], "(◕ω◕✿)", emoji_ids["command"], emoji_ids["dev"], "."
+        )),
+        ("format.loaded_message", lambda: module_info_format.format_loaded_message(
+            module_info, True, emoji_ids["loaded"], "(◕ω◕✿)", emoji_ids["command"], emoji_ids["dev"], "."
+        )),
+        ("format.unloaded_message", lambda: module_info_format.format_unloaded_message(
+            module_info['name'], True, emoji_ids["info"], "."
+        )),
+        ("format.module_line", lambda: help_format.format_module_line(module_info, True, emoji_ids["command"], ".")),
+        ("help.main_page.render", lambda: help_module.render_main_page(True, ".")),
+        ("help.main_page.render_plain", lambda: help_module.render_main_page(False, ".")),
+        ("help.module_page.render", lambda: loop.run_until_complete(
+            help_module.render_page(module_info['name'], True, ".")
+        )),
+        ("help.command_page.render", lambda: loop.run_until_complete(
+            help_module.render_page(module_info['commands'][0]['command'], True, ".")
+        )),
+    ]
@@ -0,0 +1,77 @@
+# ©️ nnnrodnoy, 2025
+# 💬 @nnnrodnoy
+# This file is part of Huekka
+# 🌐 https://github.com/nnnrodnoy/Huekka/
+# You can redistribute it and/or modify it under the terms of the MIT License
+# 🔑 https://opensource.org/licenses/MIT
+import random
+from config import BotConfig
+
+# Фиксированное зерно, чтобы корпуса были одинаковыми от запуска к запуску
+SEED = 20250101
+
+CYRILLIC_WORDS = [
+    "модуль", "команда", "загрузка", "сообщение", "справка", "обновление", "система",
+    "пользователь", "настройки", "префикс", "эмодзи", "анимация", "очистка", "ошибка",
+    "успешно", "разработчик", "версия", "описание", "информация", "перезагрузка"
+]
+
+EMOJI_IDS = list(BotConfig.EMOJI_IDS.values()) + [
+    5240241223632954241, 5206607081334906820, 5422439311196834318, 5436113877181941026
+]
+
+def cyrillic_sentence(rng, words=8):
+    """Случайное предложение из кириллических слов"""
+    return " ".join(rng.choice(CYRILLIC_WORDS) for _ in range(words)).capitalize()
+
+def make_module_infos(count=60, commands=4):
+    """Список модулей в формате module_info.db для отрисовки справки"""
+    rng = random.Random(SEED)
+    modules = []
+    for index in range(count):
+        name = f"Модуль{index}" if index % 3 else f"Module{index}"
+        modules.append({
+            'name': name,
+            'developer': f"@dev{index}",
+            'version': f"1.{index % 10}.0",
+            'description': cyrillic_sentence(rng, 12),
+            'commands': [
+                {"command": f"cmd{index}_{number}", "description": cyrillic_sentence(rng, 6)}
+                for number in range(commands)
+            ],
+            'is_stock': index < 8
+        })
+    return modules
+
+def make_dense_emoji_message(count=150):
+    """Сообщение, почти целиком состоящее из маркеров кастомных эмодзи"""
+    rng = random.Random(SEED)
+    parts = []
+    for index in range(count):
+        parts.append(f"<emoji document_id={rng.choice(EMOJI_IDS)}>🌕</emoji>")
+        if index % 10 == 9:
+            parts.append("\n")
+    return "".join(parts)
+
+def make_dense_emoji_html(count=150):
+    """То же сообщение в HTML-формате ссылок emoji/ID"""
+    rng = random.Random(SEED)
+    return " ".join(f'<a href="emoji/{rng.choice(EMOJI_IDS)}">🌕</a>' for _ in range(count))
+
+def make_cyrillic_html(paragraphs=20):
+    """Длинный кириллический текст с форматированием, спойлерами и ссылками"""
+    rng = random.Random(SEED)
+    lines = []
+    for index in range(paragraphs):
+        lines.append(
+            f"<b>{cyrillic_sentence(rng, 3)}</b> {cyrillic_sentence(rng, 10)} "
+            f"<i>{cyrillic_sentence(rng, 4)}</i> <code>.cmd{index}</code> "
+            f'<a href="spoiler">{cyrillic_sentence(rng, 2)}</a> '
+            f'<a href="https://t.me/BotHuekka">ссылка</a>'
+        )
+    return "\n".join(lines)
+
+def make_plain_chat_messages(count=50):
+    """Обычные исходящие сообщения без маркеров"""
+    rng = random.Random(SEED)
+    return [cyrillic_sentence(rng, rng.randint(3, 25)) for _ in range(count)]
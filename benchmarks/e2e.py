@@ -0,0 +1,280 @@
+# ©️ nnnrodnoy, 2025
+# 💬 @nnnrodnoy
+# This file is part of Huekka
+# 🌐 https://github.com/nnnrodnoy/Huekka/
+# You can redistribute it and/or modify it under the terms of the MIT License
+# 🔑 https://opensource.org/licenses/MIT
+"""
+Сквозные замеры команд на офлайн-клиенте: UserBot, APILimiter, AutoCleaner и загрузчик модулей
+
+    python -m benchmarks.e2e                        # все сценарии
+    python -m benchmarks.e2e -s help -s burst       # выбранные сценарии
+    python -m benchmarks.e2e --latency 0.05 --flood-rate 0.02
+
+Бот запускается во временном рабочем каталоге (data/, cash/, modules/), поэтому
+настоящие базы и модули не затрагиваются.
+"""
+import argparse
+import asyncio
+import json
+import logging
+import os
+import shutil
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parent.parent
+
+# Модуль без внешних зависимостей для сценария загрузки
+FIXTURE_MODULE = '''
+from telethon import events
+
+def setup(bot):
+    async def bench_handler(event):
+        await event.edit("<b>bench</b> ok")
+    bot.register_command("benchcmd", bench_handler, "Команда для замеров", "BenchFixture")
+    bot.set_module_description("BenchFixture", "Модуль для сквозных замеров")
+'''
+
+def percentile(values, fraction):
+    """Перцентиль по ближайшему рангу"""
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    index = min(len(ordered) - 1, max(0, int(round(fraction * len(ordered) + 0.5)) - 1))
+    return ordered[index]
+
+def summarize(name, latencies, elapsed):
+    """Пропускная способность и хвост задержек одного сценария"""
+    return {
+        "scenario": name,
+        "commands": len(latencies),
+        "elapsed_sec": elapsed,
+        "throughput": len(latencies) / elapsed if elapsed else 0.0,
+        "p50_ms": percentile(latencies, 0.50) * 1000,
+        "p95_ms": percentile(latencies, 0.95) * 1000,
+        "p99_ms": percentile(latencies, 0.99) * 1000,
+        "max_ms": max(latencies, default=0.0) * 1000
+    }
+
+def prepare_workspace():
+    """Временный рабочий каталог: ядро по ссылке, копия модулей, пустые data/ и cash/"""
+    workspace = Path(tempfile.mkdtemp(prefix="huekka-e2e-"))
+    os.symlink(ROOT / "core", workspace / "core")
+    shutil.copytree(ROOT / "modules", workspace / "modules", ignore=shutil.ignore_patterns("__pycache__"))
+    for folder in ("data", "cash"):
+        (workspace / folder).mkdir()
+    return workspace
+
+class Harness:
+    def __init__(self, client, concurrency):
+        from userbot import UserBot
+        
+        self.client = client
+        self.concurrency = concurrency
+        self.bot = UserBot(client=client)
+        self.chat_id = 100500
+        client.add_chat(self.chat_id, "Bench chat", channel=True)
+    
+    async def start(self):
+        self.bot_task = asyncio.create_task(self.bot.start())
+        ready = asyncio.create_task(self.client.ready.wait())
+        await asyncio.wait({self.bot_task, ready}, return_when=asyncio.FIRST_COMPLETED)
+        if self.bot_task.done():
+            ready.cancel()
+            self.bot_task.result()
+            raise RuntimeError("UserBot.start() завершился до запуска клиента")
+    
+    async def stop(self):
+        await self.bot.stop()
+        await self.bot_task
+    
+    async def timed(self, text, **kwargs):
+        """Подаёт одно исходящее сообщение и возвращает время до завершения всех обработчиков"""
+        started = time.perf_counter()
+        await self.client.inject_message(text, chat_id=self.chat_id, **kwargs)
+        return time.perf_counter() - started
+    
+    async def run_batch(self, name, texts):
+        """Прогон набора сообщений с ограничением числа одновременно обрабатываемых"""
+        semaphore = asyncio.Semaphore(self.concurrency)
+        
+        async def worker(text):
+            async with semaphore:
+                return await self.timed(text)
+        
+        started = time.perf_counter()
+        latencies = await asyncio.gather(*(worker(text) for text in texts))
+        return summarize(name, latencies, time.perf_counter() - started)
+    
+    async def scenario_help(self, count):
+        prefix = self.bot.command_prefix
+        modules = sorted(self.bot.module_descriptions) or ["System"]
+        texts = [
+            f"{prefix}help" if index % 2 == 0 else f"{prefix}help {modules[index % len(modules)]}"
+            for index in range(count)
+        ]
+        return await self.run_batch("help", texts)
+    
+    async def scenario_chat(self, count):
+        from benchmarks import corpus
+        
+        plain = corpus.make_plain_chat_messages(count)
+        emoji = corpus.make_dense_emoji_message(20)
+        texts = [emoji if index % 5 == 0 else text for index, text in enumerate(plain)]
+        return await self.run_batch("chat", texts)
+    
+    async def scenario_burst(self, count):
+        # Без ограничения параллельности, чтобы лимитер успел сработать
+        prefix = self.bot.command_prefix
+        started = time.perf_counter()
+        latencies = await asyncio.gather(*(self.timed(f"{prefix}help") for _ in range(count)))
+        return summarize("burst", latencies, time.perf_counter() - started)
+    
+    async def scenario_autoclean(self, count):
+        autocleaner = self.bot.autocleaner
+        autocleaner.enabled = True
+        autocleaner.default_delay = 0
+        prefix = self.bot.command_prefix
+        
+        for _ in range(count):
+            await self.timed(f"{prefix}help")
+        
+        # Цикл очистки запущен ботом и спит между проходами; перезапуск сразу даёт новый проход
+        await autocleaner.stop()
+        deletions_before = self.client.deletions
+        started = time.perf_counter()
+        await autocleaner.start()
+        while self.bot.db.get_pending_autoclean():
+            await asyncio.sleep(0.01)
+        elapsed = time.perf_counter() - started
+        await autocleaner.stop()
+        
+        deleted = self.client.deletions - deletions_before
+        result = summarize("autoclean", [elapsed / max(deleted, 1)] * deleted, elapsed)
+        autocleaner.default_delay = 1800
+        return result
+    
+    async def scenario_loader(self, count):
+        prefix = self.bot.command_prefix
+        latencies = []
+        started = time.perf_counter()
+        
+        for _ in range(count):
+            media = self.client.add_document(FIXTURE_MODULE, "benchfixture.py")
+            document = await self.client.inject_message("", chat_id=self.chat_id, media=media)
+            latencies.append(await self.timed(f"{prefix}lm", reply_to=document.id))
+            latencies.append(await self.timed(f"{prefix}ulm BenchFixture"))
+        
+        return summarize("loader", latencies, time.perf_counter() - started)
+
+    async def scenario_media(self, count):
+        # Картинка .huekka загружается один раз; на середине прогона ссылки на файлы устаревают
+        prefix = self.bot.command_prefix
+        latencies = []
+        started = time.perf_counter()
+        
+        for index in range(count):
+            if index == count // 2:
+                self.client.expire_file_references()
+            latencies.append(await self.timed(f"{prefix}huekka"))
+        
+        return summarize("media", latencies, time.perf_counter() - started)
+
+SCENARIOS = {
+    "help": ("scenario_help", 200),
+    "chat": ("scenario_chat", 300),
+    "burst": ("scenario_burst", 60),
+    "autoclean": ("scenario_autoclean", 50),
+    "loader": ("scenario_loader", 3),
+    "media": ("scenario_media", 20)
+}
+
+async def run(args):
+    from config import BotConfig
+    from benchmarks.fake_client import FakeTelegramClient
+    
+    BotConfig.LOADER["min_animation_time"] = args.animation_time
+    # Замеры не ходят в сеть: фоновая проверка обновлений отключена
+    BotConfig.UPDATER["check_ttl"] = 0
+    
+    # Кулдауны лимитера длятся десятки секунд; масштаб сохраняет их соотношение,
+    # окно ограничения скорости (1 сек) задано в коде и не масштабируется
+    limiter = BotConfig.API_LIMITER
+    for key in ("period_duration", "cooldown_after_period", "high_load_cooldown"):
+        limiter[key] = limiter[key] * args.cooldown_scale
+    
+    client = FakeTelegramClient(
+        latency=args.latency, jitter=args.jitter, flood_wait_rate=args.flood_rate,
+        flood_wait_seconds=args.flood_seconds, seed=args.seed
+    )
+    harness = Harness(client, args.concurrency)
+    await harness.start()
+    
+    results = []
+    try:
+        for name in args.scenario or SCENARIOS:
+            method, default_count = SCENARIOS[name]
+            client.reset_stats()
+            result = await getattr(harness, method)(args.count or default_count)
+            result["requests"] = dict(client.request_counts)
+            result["flood_waits"] = dict(client.flood_waits)
+            results.append(result)
+    finally:
+        await harness.stop()
+    
+    return results
+
+def print_results(results):
+    print(f"\n{'scenario':<12} {'cmds':>6} {'cmd/s':>8} {'p50 ms':>8} {'p95 ms':>8} {'p99 ms':>8} {'max ms':>8}  requests")
+    for result in results:
+        requests = ", ".join(f"{name}={count}" for name, count in sorted(result["requests"].items()))
+        flood = sum(result["flood_waits"].values())
+        print(f"{result['scenario']:<12} {result['commands']:>6} {result['throughput']:>8.1f} "
+              f"{result['p50_ms']:>8.1f} {result['p95_ms']:>8.1f} {result['p99_ms']:>8.1f} "
+              f"{result['max_ms']:>8.1f}  {requests}{f'  FLOOD_WAIT={flood}' if flood else ''}")
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Huekka end-to-end command benchmarks on an offline client")
+    parser.add_argument("-s", "--scenario", action="append", choices=sorted(SCENARIOS),
+                        help="scenario to run (repeatable, default: all)")
+    parser.add_argument("-n", "--count", type=int, help="commands per scenario (default depends on scenario)")
+    parser.add_argument("-c", "--concurrency", type=int, default=4, help="commands processed at once")
+    parser.add_argument("--latency", type=float, default=0.03, help="simulated server latency, seconds")
+    parser.add_argument("--jitter", type=float, default=0.02, help="random latency added on top, seconds")
+    parser.add_argument("--flood-rate", type=float, default=0.0, help="probability of FLOOD_WAIT per request")
+    parser.add_argument("--flood-seconds", type=int, default=1, help="FLOOD_WAIT duration, seconds")
+    parser.add_argument("--animation-time", type=float, default=0.2,
+                        help="loader minimum animation time (the bot default is 2 s)")
+    parser.add_argument("--cooldown-scale", type=float, default=0.1,
+                        help="multiplier for API limiter period and cooldowns (1.0 = real values)")
+    parser.add_argument("--seed", type=int, default=20250101, help="random seed for latency and flood waits")
+    parser.add_argument("--json", type=Path, help="also write results to this JSON file")
+    parser.add_argument("-v", "--verbose", action="store_true", help="show bot logs")
+    args = parser.parse_args(argv)
+    
+    # Логи бота мешают таблице результатов
+    if not args.verbose:
+        logging.disable(logging.CRITICAL)
+    
+    json_path = args.json.resolve() if args.json else None
+    workspace = prepare_workspace()
+    sys.path.insert(0, str(ROOT))
+    os.chdir(workspace)
+    try:
+        results = asyncio.run(run(args))
+    finally:
+        os.chdir(ROOT)
+        shutil.rmtree(workspace, ignore_errors=True)
+    
+    print_results(results)
+    if json_path:
+        with open(json_path, "w", encoding="utf-8") as f:
+            json.dump(results, f, indent=2, ensure_ascii=False)
+            f.write("\n")
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,460 @@
+# ©️ nnnrodnoy, 2025
+# 💬 @nnnrodnoy
+# This file is part of Huekka
+# 🌐 https://github.com/nnnrodnoy/Huekka/
+# You can redistribute it and/or modify it under the terms of the MIT License
+# 🔑 https://opensource.org/licenses/MIT
+"""
+Офлайн-заглушка TelegramClient для прогона команд без аккаунта Telegram
+
+Все высокоуровневые методы собирают настоящие TL-запросы и отправляют их через self._call,
+поэтому APILimiter перехватывает их так же, как в боевом клиенте. Задержка сети и FLOOD_WAIT
+задаются настройками, входящие события подаются через inject_message.
+"""
+import asyncio
+import logging
+import os
+import random
+import time
+from collections import Counter, defaultdict
+from datetime import datetime, timedelta, timezone
+from telethon import errors, events, utils
+from telethon._updates import EntityCache
+from telethon.events.common import EventCommon
+from telethon.tl import functions, types
+
+logger = logging.getLogger("UserBot.FakeClient")
+
+_telethon_log = logging.getLogger("telethon.client.users")
+
+SELF_ID = 777000001
+
+# Размер части при загрузке файла (как upload.SaveFilePartRequest в Telethon)
+UPLOAD_PART_SIZE = 512 * 1024
+PHOTO_EXTENSIONS = (".jpg", ".jpeg", ".png", ".webp")
+
+class FakeTelegramClient:
+    """Заглушка TelegramClient: запросы не уходят в сеть, а учитываются и задерживаются"""
+    
+    def __init__(self, latency=0.03, jitter=0.02, method_latency=None, flood_wait_rate=0.0,
+                 flood_wait_seconds=1, flood_sleep_threshold=60, premium=True, seed=None):
+        """
+        Args:
+            latency: базовая задержка ответа сервера (сек)
+            jitter: случайная добавка к задержке (сек, равномерно от 0)
+            method_latency: задержки для отдельных запросов, {"EditMessageRequest": 0.05}
+            flood_wait_rate: вероятность ответить FLOOD_WAIT на любой запрос
+            flood_wait_seconds: длительность случайного FLOOD_WAIT
+            flood_sleep_threshold: как в Telethon - FLOOD_WAIT не длиннее порога пережидается автоматически
+            premium: премиум-статус владельца (влияет на кастомные эмодзи в ответах)
+        """
+        self.latency = latency
+        self.jitter = jitter
+        self.method_latency = method_latency or {}
+        self.flood_wait_rate = flood_wait_rate
+        self.flood_wait_seconds = flood_wait_seconds
+        self.flood_sleep_threshold = flood_sleep_threshold
+        self._random = random.Random(seed)
+        
+        self._self_id = SELF_ID
+        self._sender = object()
+        self._mb_entity_cache = EntityCache()
+        self._mb_entity_cache.set_self_user(SELF_ID, False, 0)
+        self._parse_mode = None
+        self._event_builders = []
+        self._connected = False
+        self._disconnected = None
+        self.ready = asyncio.Event()
+        
+        self.me = types.User(
+            id=SELF_ID, is_self=True, access_hash=0, first_name="Huekka",
+            username="huekka_bench", premium=premium
+        )
+        self._entities = {SELF_ID: self.me}
+        self._chats = {SELF_ID: self.me}
+        self._messages = {}
+        self._media = {}
+        self._uploads = {}
+        self._next_message_id = 1
+        self._scripted_floods = []
+        
+        # Статистика
+        self.request_counts = Counter()
+        self.request_latencies = defaultdict(list)
+        self.flood_waits = Counter()
+        self.edits = 0
+        self.deletions = 0
+    
+    # --- Настройки клиента -------------------------------------------------
+    
+    @property
+    def parse_mode(self):
+        return self._parse_mode
+    
+    @parse_mode.setter
+    def parse_mode(self, mode):
+        self._parse_mode = utils.sanitize_parse_mode(mode)
+    
+    async def connect(self):
+        self._connected = True
+        self._disconnected = asyncio.get_running_loop().create_future()
+    
+    def is_connected(self):
+        return self._connected
+    
+    async def disconnect(self):
+        self._connected = False
+        if self._disconnected and not self._disconnected.done():
+            self._disconnected.set_result(None)
+    
+    async def is_user_authorized(self):
+        return True
+    
+    async def run_until_disconnected(self):
+        self.ready.set()
+        await self._disconnected
+    
+    # --- Сеть --------------------------------------------------------------
+    
+    def inject_flood_wait(self, seconds, request_name=None, count=1):
+        """Следующие count запросов (указанного типа или любых) получат FLOOD_WAIT"""
+        for _ in range(count):
+            self._scripted_floods.append((request_name, seconds))
+    
+    def _take_flood_wait(self, request_name):
+        for index, (name, seconds) in enumerate(self._scripted_floods):
+            if name is None or name == request_name:
+                del self._scripted_floods[index]
+                return seconds
+        
+        if self.flood_wait_rate and self._random.random() < self.flood_wait_rate:
+            return self.flood_wait_seconds
+        return None
+    
+    async def _call(self, sender, request, ordered=False, flood_sleep_threshold=None):
+        """Имитация MTProtoSender: задержка, FLOOD_WAIT и учёт запросов"""
+        request_name = type(request).__name__
+        if flood_sleep_threshold is None:
+            flood_sleep_threshold = self.flood_sleep_threshold
+        
+        while True:
+            started = time.perf_counter()
+            delay = self.method_latency.get(request_name, self.latency)
+            if self.jitter:
+                delay += self._random.uniform(0, self.jitter)
+            await asyncio.sleep(delay)
+            
+            self.request_counts[request_name] += 1
+            self.request_latencies[request_name].append(time.perf_counter() - started)
+            
+            seconds = self._take_flood_wait(request_name)
+            if seconds is None:
+                return True
+            
+            self.flood_waits[request_name] += 1
+            if seconds > flood_sleep_threshold:
+                raise errors.FloodWaitError(request=request, capture=seconds)
+            
+            # Telethon сам пережидает короткие FLOOD_WAIT и повторяет запрос, оставляя запись в своём логе
+            _telethon_log.info('Sleeping%s for %ds (%s) on %s flood wait', '', seconds,
+                               timedelta(seconds=seconds), request_name)
+            await asyncio.sleep(seconds)
+    
+    async def __call__(self, request, ordered=False, flood_sleep_threshold=None):
+        return await self._call(self._sender, request, ordered, flood_sleep_threshold)
+    
+    # --- Сущности ----------------------------------------------------------
+    
+    def add_chat(self, chat_id, title="Bench chat", channel=False):
+        """Регистрирует чат, в который можно подавать сообщения"""
+        if channel:
+            entity = types.Channel(
+                id=chat_id, title=title, photo=types.ChatPhotoEmpty(), date=datetime.now(timezone.utc),
+                access_hash=chat_id, megagroup=True
+            )
+        else:
+            entity = types.User(id=chat_id, access_hash=chat_id, first_name=title)
+        
+        # Telethon хранит сущности по "помеченному" ID (-100... для каналов)
+        self._chats[chat_id] = entity
+        self._entities[utils.get_peer_id(entity)] = entity
+        return entity
+    
+    def _lookup(self, peer):
+        if isinstance(peer, (types.InputPeerSelf, types.InputUserSelf)):
+            return self.me
+        
+        try:
+            peer_id = utils.get_peer_id(peer)
+        except TypeError:
+            return None
+        
+        if peer_id not in self._entities and peer_id > 0:
+            self._entities[peer_id] = types.User(id=peer_id, access_hash=peer_id, first_name=str(peer_id))
+        return self._entities.get(peer_id)
+    
+    async def get_me(self, input_peer=False):
+        return types.InputPeerSelf() if input_peer else self.me
+    
+    async def get_entity(self, entity):
+        if isinstance(entity, str):
+            username = entity.rsplit('/', 1)[-1].lstrip('@')
+            await self(functions.contacts.ResolveUsernameRequest(username=username))
+            return types.Channel(
+                id=abs(hash(username)) % 10 ** 9, title=username, photo=types.ChatPhotoEmpty(),
+                date=datetime.now(timezone.utc), access_hash=0, username=username, broadcast=True
+            )
+        return self._lookup(entity)
+    
+    async def get_input_entity(self, peer):
+        entity = await self.get_entity(peer) if isinstance(peer, str) else self._lookup(peer)
+        if entity is None:
+            raise ValueError(f"Could not find the input entity for {peer!r}")
+        return utils.get_input_peer(entity)
+    
+    # --- Сообщения ---------------------------------------------------------
+    
+    def _new_message(self, peer, text, entities=None, out=True, reply_to=None, media=None):
+        message_id = self._next_message_id
+        self._next_message_id += 1
+        
+        message = types.Message(
+            id=message_id,
+            peer_id=utils.get_peer(peer),
+            date=datetime.now(timezone.utc),
+            message=text,
+            out=out,
+            from_id=types.PeerUser(SELF_ID) if out else None,
+            reply_to=types.MessageReplyHeader(reply_to_msg_id=reply_to) if reply_to else None,
+            media=media,
+            entities=entities
+        )
+        message._finish_init(self, self._entities, peer)
+        self._messages[message_id] = message
+        return message
+    
+    def _parse(self, text, parse_mode=(), formatting_entities=None):
+        if formatting_entities is not None:
+            return text, formatting_entities
+        mode = utils.sanitize_parse_mode(parse_mode) if parse_mode != () else self._parse_mode
+        if not mode or not text:
+            return text or "", []
+        return mode.parse(text)
+    
+    def _message_id(self, message):
+        return message.id if isinstance(message, types.Message) else message
+    
+    async def send_message(self, entity, message="", *, reply_to=None, parse_mode=(),
+                           formatting_entities=None, link_preview=True, **kwargs):
+        peer = await self.get_input_entity(entity)
+        text, entities = self._parse(message, parse_mode, formatting_entities)
+        await self(functions.messages.SendMessageRequest(
+            peer=peer, message=text, entities=entities, no_webpage=not link_preview,
+            reply_to=types.InputReplyToMessage(self._message_id(reply_to)) if reply_to else None
+        ))
+        return self._new_message(peer, text, entities, reply_to=self._message_id(reply_to))
+    
+    async def edit_message(self, entity, message=None, text=None, *, parse_mode=(),
+                           formatting_entities=None, link_preview=True, **kwargs):
+        peer = await self.get_input_entity(entity)
+        message_id = self._message_id(message)
+        text, entities = self._parse(text, parse_mode, formatting_entities)
+        
+        request = functions.messages.EditMessageRequest(
+            peer=peer, id=message_id, message=text, entities=entities, no_webpage=not link_preview
+        )
+        stored = self._messages.get(message_id)
+        if stored is not None and stored.message == text and (stored.entities or []) == (entities or []):
+            await self(request)
+            raise errors.MessageNotModifiedError(request=request)
+        
+        await self(request)
+        self.edits += 1
+        
+        if stored is None:
+            return self._new_message(peer, text, entities)
+        stored.message = text
+        stored.entities = entities
+        stored.edit_date = datetime.now(timezone.utc)
+        return stored
+    
+    async def delete_messages(self, entity, message_ids, *, revoke=True):
+        if not utils.is_list_like(message_ids):
+            message_ids = [message_ids]
+        message_ids = [self._message_id(message_id) for message_id in message_ids]
+        
+        peer = await self.get_input_entity(entity) if entity is not None else None
+        if isinstance(peer, types.InputPeerChannel):
+            request = functions.channels.DeleteMessagesRequest(channel=peer, id=message_ids)
+        else:
+            request = functions.messages.DeleteMessagesRequest(id=message_ids, revoke=revoke)
+        await self(request)
+        
+        for message_id in message_ids:
+            if self._messages.pop(message_id, None) is not None:
+                self.deletions += 1
+        return [types.messages.AffectedMessages(pts=0, pts_count=len(message_ids))]
+    
+    async def get_messages(self, entity=None, *args, ids=None, **kwargs):
+        if isinstance(ids, types.InputMessageReplyTo):
+            message = self._messages.get(ids.id)
+            if message is None or message.reply_to is None:
+                return None
+            return self._messages.get(message.reply_to.reply_to_msg_id)
+        
+        if utils.is_list_like(ids):
+            return [self._messages.get(message_id) for message_id in ids]
+        return self._messages.get(ids)
+    
+    def add_document(self, content, file_name, mime_type="text/x-python"):
+        """Регистрирует документ, который вернёт download_media"""
+        document_id = len(self._media) + 1
+        self._media[document_id] = content if isinstance(content, bytes) else content.encode()
+        return types.MessageMediaDocument(document=types.Document(
+            id=document_id, access_hash=0, file_reference=b"", date=datetime.now(timezone.utc),
+            mime_type=mime_type, size=len(self._media[document_id]), dc_id=0,
+            attributes=[types.DocumentAttributeFilename(file_name=file_name)]
+        ))
+    
+    async def download_media(self, message, file=None, **kwargs):
+        document = message.document
+        content = self._media[document.id]
+        await self(functions.upload.GetFileRequest(
+            location=types.InputDocumentFileLocation(
+                id=document.id, access_hash=0, file_reference=b"", thumb_size=""
+            ),
+            offset=0, limit=len(content)
+        ))
+        
+        path = file or str(document.id)
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        with open(path, "wb") as f:
+            f.write(content)
+        return path
+    
+    async def send_file(self, entity, file, *, caption=None, reply_to=None, parse_mode=(),
+                        formatting_entities=None, force_document=False, **kwargs):
+        peer = await self.get_input_entity(entity)
+        text, entities = self._parse(caption or "", parse_mode, formatting_entities)
+        
+        if isinstance(file, (types.InputPhoto, types.InputDocument)):
+            # Отправка по ссылке: без загрузки, но со сверкой file_reference
+            media = self._uploads.get(file.id)
+            request = functions.messages.SendMediaRequest(
+                peer=peer, media=utils.get_input_media(file), message=text, entities=entities
+            )
+            if media is None:
+                raise errors.MediaEmptyError(request=request)
+            if media.file_reference != file.file_reference:
+                raise errors.FileReferenceExpiredError(request=request)
+            await self(request)
+        else:
+            size = os.path.getsize(file) if isinstance(file, (str, os.PathLike)) else 0
+            for part in range(max(1, -(-size // UPLOAD_PART_SIZE))):
+                await self(functions.upload.SaveFilePartRequest(file_id=0, file_part=part, bytes=b""))
+            await self(functions.messages.SendMediaRequest(
+                peer=peer, media=types.InputMediaEmpty(), message=text, entities=entities
+            ))
+            as_photo = not force_document and str(file).lower().endswith(PHOTO_EXTENSIONS)
+            media = self._new_upload(as_photo, size, os.path.basename(str(file)))
+        
+        if isinstance(media, types.Photo):
+            message_media = types.MessageMediaPhoto(photo=media)
+        else:
+            message_media = types.MessageMediaDocument(document=media)
+        return self._new_message(peer, text, entities, reply_to=self._message_id(reply_to), media=message_media)
+    
+    def _new_upload(self, as_photo, size, file_name):
+        media_id = 10 ** 9 + len(self._uploads) + 1
+        file_reference = os.urandom(8)
+        if as_photo:
+            media = types.Photo(
+                id=media_id, access_hash=media_id, file_reference=file_reference,
+                date=datetime.now(timezone.utc), sizes=[], dc_id=0
+            )
+        else:
+            media = types.Document(
+                id=media_id, access_hash=media_id, file_reference=file_reference,
+                date=datetime.now(timezone.utc), mime_type="application/octet-stream", size=size,
+                dc_id=0, attributes=[types.DocumentAttributeFilename(file_name=file_name)]
+            )
+        self._uploads[media_id] = media
+        return media
+    
+    def expire_file_references(self):
+        """
+        Выдаёт всем загруженным файлам новый file_reference, как Telegram по истечении срока
+        Старые ссылки получают FILE_REFERENCE_EXPIRED, а get_messages возвращает уже новые
+        """
+        for media in self._uploads.values():
+            media.file_reference = os.urandom(8)
+    
+    # --- События -----------------------------------------------------------
+    
+    def on(self, event):
+        def decorator(callback):
+            self.add_event_handler(callback, event)
+            return callback
+        return decorator
+    
+    def add_event_handler(self, callback, event=None):
+        builder = event or events.Raw()
+        if isinstance(builder, type):
+            builder = builder()
+        self._event_builders.append((builder, callback))
+    
+    def remove_event_handler(self, callback, event=None):
+        before = len(self._event_builders)
+        self._event_builders = [
+            (builder, handler) for builder, handler in self._event_builders
+            if handler is not callback or (event is not None and not isinstance(builder, event))
+        ]
+        return before - len(self._event_builders)
+    
+    async def inject_message(self, text, chat_id=SELF_ID, out=True, reply_to=None, media=None):
+        """
+        Подаёт новое сообщение всем обработчикам, как это сделал бы Telegram
+        Возвращает сообщение после отработки всех обработчиков
+        """
+        if chat_id not in self._chats:
+            self.add_chat(chat_id)
+        
+        message = self._new_message(
+            utils.get_input_peer(self._chats[chat_id]), text, out=out, reply_to=reply_to, media=media
+        )
+        update = types.UpdateNewMessage(message=message, pts=0, pts_count=0)
+        update._entities = self._entities
+        
+        for builder, callback in list(self._event_builders):
+            event = builder.build(update, None, self._self_id)
+            if not event:
+                continue
+            
+            # Как в TelegramClient._dispatch_update: Raw получает само обновление
+            if isinstance(event, EventCommon):
+                event.original_update = update
+                event._entities = self._entities
+                event._set_client(self)
+            
+            if not builder.resolved:
+                await builder.resolve(self)
+            if not builder.filter(event):
+                continue
+            
+            try:
+                await callback(event)
+            except events.StopPropagation:
+                break
+            except Exception:
+                logger.exception(f"Необработанное исключение в {getattr(callback, '__name__', callback)}")
+        
+        return message
+    
+    # --- Итоги -------------------------------------------------------------
+    
+    def reset_stats(self):
+        self.request_counts.clear()
+        self.request_latencies.clear()
+        self.flood_waits.clear()
+        self.edits = 0
+        self.deletions = 0
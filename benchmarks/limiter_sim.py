@@ -0,0 +1,344 @@
+# ©️ nnnrodnoy, 2025
+# 💬 @nnnrodnoy
+# This file is part of Huekka
+# 🌐 https://github.com/nnnrodnoy/Huekka/
+# You can redistribute it and/or modify it under the terms of the MIT License
+# 🔑 https://opensource.org/licenses/MIT
+"""
+Детерминированный симулятор APILimiter на виртуальных часах
+
+    python -m benchmarks.limiter_sim                                  # все сценарии с BotConfig.API_LIMITER
+    python -m benchmarks.limiter_sim -t mixed --set high_load_cooldown=5
+    python -m benchmarks.limiter_sim -t help_spam --sweep max_requests_per_second=10,15,20,30
+
+Сценарий - набор потоков запросов (анимации, массовое удаление, спам справкой), которые
+проигрываются через настоящий APILimiter. Время виртуальное: часы событийного цикла
+перескакивают к следующему таймеру, поэтому часы симуляции проходят за доли секунды
+и результат одинаков от запуска к запуску.
+"""
+import argparse
+import asyncio
+import json
+import random
+import selectors
+import sys
+import time
+from pathlib import Path
+from telethon.tl import functions, types
+
+# --- Виртуальное время -----------------------------------------------------
+
+class _VirtualSelector(selectors.SelectSelector):
+    """Селектор, который вместо ожидания сдвигает часы цикла до ближайшего таймера"""
+    
+    loop = None
+    
+    def select(self, timeout=None):
+        if timeout is None:
+            raise RuntimeError("Симуляция зависла: нет ни готовых задач, ни таймеров")
+        if timeout > 0:
+            self.loop.advance(timeout)
+        return []
+
+class VirtualClockLoop(asyncio.SelectorEventLoop):
+    """Событийный цикл с виртуальными часами; asyncio.sleep завершается мгновенно"""
+    
+    def __init__(self):
+        selector = _VirtualSelector()
+        super().__init__(selector)
+        selector.loop = self
+        self._virtual_time = 0.0
+    
+    def time(self):
+        return self._virtual_time
+    
+    def advance(self, seconds):
+        self._virtual_time += seconds
+
+# --- Сценарии --------------------------------------------------------------
+
+REQUESTS = {
+    "edit": lambda: functions.messages.EditMessageRequest(peer=types.InputPeerSelf(), id=1, message="frame"),
+    "delete": lambda: functions.messages.DeleteMessagesRequest(id=[1], revoke=True),
+    "send": lambda: functions.messages.SendMessageRequest(peer=types.InputPeerSelf(), message="text"),
+    "get": lambda: functions.messages.GetMessagesRequest(id=[types.InputMessageID(1)])
+}
+
+def stream(label, request, count, interval, start=0.0, open_loop=False, copies=1):
+    """
+    Поток однотипных запросов
+    
+    Args:
+        label: тип запросов в отчёте
+        request: ключ REQUESTS
+        count: число запросов в одном потоке
+        interval: пауза между запросами (сек)
+        start: момент запуска (виртуальные сек)
+        open_loop: False - следующий запрос после ответа на предыдущий (как анимации),
+                   True - запросы по расписанию независимо от ответов (как команды пользователя)
+        copies: сколько одинаковых потоков идут одновременно
+    """
+    return {
+        "label": label, "request": request, "count": count, "interval": interval,
+        "start": start, "open_loop": open_loop, "copies": copies
+    }
+
+# Интервалы взяты из модулей: love.py редактирует кадр раз в 0.15-0.7 сек,
+# animatetyping.py - раз в 0.08 сек на символ, автоочистка удаляет сообщения подряд
+TRACES = {
+    "animation": [
+        stream("love", "edit", 60, 0.3),
+        stream("love", "edit", 60, 0.3, start=5.0)
+    ],
+    "typing": [
+        stream("typing", "edit", 120, 0.08)
+    ],
+    "bulk_delete": [
+        stream("autoclean", "delete", 200, 0.0)
+    ],
+    "help_spam": [
+        stream("help", "edit", 40, 0.25, open_loop=True)
+    ],
+    "mixed": [
+        stream("love", "edit", 60, 0.3),
+        stream("typing", "edit", 80, 0.08, start=2.0),
+        stream("autoclean", "delete", 100, 0.0, start=4.0),
+        stream("help", "edit", 20, 0.5, start=1.0, open_loop=True),
+        stream("info", "get", 10, 1.0, start=0.5, open_loop=True)
+    ]
+}
+
+# --- Симуляция -------------------------------------------------------------
+
+class SimClient:
+    """Клиент, у которого _call только отмечает момент допуска и имитирует ответ сервера"""
+    
+    def __init__(self, loop, latency, jitter, rng):
+        self.loop = loop
+        self.latency = latency
+        self.jitter = jitter
+        self.rng = rng
+        self.admitted = {}
+    
+    async def _call(self, sender, request, ordered=False, flood_sleep_threshold=None):
+        self.admitted[id(request)] = self.loop.time()
+        await asyncio.sleep(self.latency + self.rng.uniform(0, self.jitter))
+        return True
+
+class SimBot:
+    def __init__(self, client):
+        self.client = client
+
+class Simulation:
+    def __init__(self, trace, config, latency=0.04, jitter=0.02, seed=20250101, horizon=3600.0):
+        self.trace = trace
+        self.config = config
+        self.latency = latency
+        self.jitter = jitter
+        self.seed = seed
+        self.horizon = horizon
+        
+        # label -> список (момент выдачи, момент допуска, момент ответа)
+        self.records = {}
+    
+    async def _issue(self, label, request_kind):
+        request = REQUESTS[request_kind]()
+        issued = self.loop.time()
+        await self.call(None, request)
+        admitted = self.client.admitted.pop(id(request))
+        self.records.setdefault(label, []).append((issued, admitted, self.loop.time()))
+    
+    async def _run_stream(self, spec):
+        await asyncio.sleep(spec["start"])
+        
+        if spec["open_loop"]:
+            tasks = []
+            for index in range(spec["count"]):
+                tasks.append(asyncio.create_task(self._issue(spec["label"], spec["request"])))
+                await asyncio.sleep(spec["interval"])
+            await asyncio.gather(*tasks)
+            return
+        
+        for _ in range(spec["count"]):
+            await self._issue(spec["label"], spec["request"])
+            await asyncio.sleep(spec["interval"])
+    
+    async def _main(self):
+        from core.apilimiter import APILimiter
+        
+        self.client = SimClient(self.loop, self.latency, self.jitter, random.Random(self.seed + 1))
+        # Симуляция не должна писать файл состояния настоящего бота
+        self.limiter = APILimiter(
+            SimBot(self.client), config={**self.config, "state_file": None}, clock=self.loop.time, rng=random.Random(self.seed)
+        )
+        self.call = self.client._call
+        
+        streams = [spec for spec in self.trace for _ in range(spec["copies"])]
+        await asyncio.wait_for(
+            asyncio.gather(*(self._run_stream(spec) for spec in streams)), self.horizon
+        )
+    
+    def run(self):
+        self.loop = VirtualClockLoop()
+        try:
+            self.loop.run_until_complete(self._main())
+            
+            # Незавершённые сбросы кулдаунов больше не нужны
+            pending = asyncio.all_tasks(self.loop)
+            for task in pending:
+                task.cancel()
+            if pending:
+                self.loop.run_until_complete(asyncio.gather(*pending, return_exceptions=True))
+        finally:
+            self.loop.close()
+        return self.report()
+    
+    def report(self):
+        records = [record for label_records in self.records.values() for record in label_records]
+        admissions = sorted(admitted for _, admitted, _ in records)
+        started = min(issued for issued, _, _ in records)
+        makespan = max(done for _, _, done in records) - started
+        
+        labels = {}
+        for label, label_records in sorted(self.records.items()):
+            delays = [admitted - issued for issued, admitted, _ in label_records]
+            span = max(done for _, _, done in label_records) - min(issued for issued, _, _ in label_records)
+            labels[label] = {
+                "requests": len(label_records),
+                "admitted_rate": len(label_records) / span if span else 0.0,
+                "mean_delay": sum(delays) / len(delays),
+                "p50_delay": percentile(delays, 0.50),
+                "p95_delay": percentile(delays, 0.95),
+                "p99_delay": percentile(delays, 0.99),
+                "max_delay": max(delays)
+            }
+        
+        return {
+            "requests": len(records),
+            "makespan": makespan,
+            "admitted_rate": len(records) / makespan if makespan else 0.0,
+            "peak_rate_1s": peak_window(admissions, 1.0),
+            "peak_per_period": peak_window(admissions, self.config["period_duration"]),
+            "speed_cooldowns": self.limiter.stats.cooldowns["speed"],
+            "period_cooldowns": self.limiter.stats.cooldowns["period"],
+            "fairness": jain_index([
+                (stats["mean_delay"] + self.latency) / self.latency for stats in labels.values()
+            ]),
+            "labels": labels
+        }
+
+# --- Статистика ------------------------------------------------------------
+
+def percentile(values, fraction):
+    """Перцентиль по ближайшему рангу"""
+    ordered = sorted(values)
+    index = min(len(ordered) - 1, max(0, int(round(fraction * len(ordered) + 0.5)) - 1))
+    return ordered[index]
+
+def peak_window(times, window):
+    """Наибольшее число допусков в любом скользящем окне длиной window"""
+    peak = 0
+    left = 0
+    for right, moment in enumerate(times):
+        while moment - times[left] >= window:
+            left += 1
+        peak = max(peak, right - left + 1)
+    return peak
+
+def jain_index(values):
+    """
+    Индекс справедливости Джейна по растяжению (ожидание + ответ) / ответ для каждого типа запросов
+    1.0 - все типы ждут одинаково, 1/n - всё ожидание досталось одному типу
+    """
+    if not values:
+        return 1.0
+    return sum(values) ** 2 / (len(values) * sum(value * value for value in values))
+
+# --- Запуск ----------------------------------------------------------------
+
+def parse_value(raw):
+    """Значение настройки из командной строки: int, затем float"""
+    for cast in (int, float):
+        try:
+            return cast(raw)
+        except ValueError:
+            pass
+    raise argparse.ArgumentTypeError(f"not a number: {raw}")
+
+def build_configs(base, overrides, sweep):
+    """Список (подпись, конфиг) для прогона: базовый конфиг или перебор одного параметра"""
+    config = dict(base)
+    for item in overrides:
+        key, _, raw = item.partition("=")
+        if key not in config:
+            raise SystemExit(f"unknown API_LIMITER key: {key}")
+        config[key] = parse_value(raw)
+    
+    if not sweep:
+        return [("", config)]
+    
+    key, _, raw_values = sweep.partition("=")
+    if key not in config:
+        raise SystemExit(f"unknown API_LIMITER key: {key}")
+    return [(f"{key}={raw}", {**config, key: parse_value(raw)}) for raw in raw_values.split(",")]
+
+def print_summary_header():
+    print(f"{'trace':<12} {'config':<28} {'reqs':>5} {'makespan':>9} {'adm/s':>7} {'peak/1s':>8} "
+          f"{'peak/period':>11} {'speed cd':>8} {'period cd':>9} {'fairness':>8}")
+
+def print_summary(trace_name, label, result):
+    print(f"{trace_name:<12} {label or 'current':<28} {result['requests']:>5} {result['makespan']:>8.1f}s "
+          f"{result['admitted_rate']:>7.2f} {result['peak_rate_1s']:>8} {result['peak_per_period']:>11} "
+          f"{result['speed_cooldowns']:>8} {result['period_cooldowns']:>9} {result['fairness']:>8.3f}")
+
+def print_labels(result):
+    print(f"    {'type':<12} {'reqs':>5} {'adm/s':>7} {'mean ms':>9} {'p50 ms':>9} {'p95 ms':>9} {'p99 ms':>9} {'max ms':>9}")
+    for label, stats in result["labels"].items():
+        print(f"    {label:<12} {stats['requests']:>5} {stats['admitted_rate']:>7.2f} "
+              f"{stats['mean_delay'] * 1000:>9.1f} {stats['p50_delay'] * 1000:>9.1f} "
+              f"{stats['p95_delay'] * 1000:>9.1f} {stats['p99_delay'] * 1000:>9.1f} {stats['max_delay'] * 1000:>9.1f}")
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Deterministic APILimiter simulator on a virtual clock")
+    parser.add_argument("-t", "--trace", action="append", choices=sorted(TRACES),
+                        help="trace to replay (repeatable, default: all)")
+    parser.add_argument("--set", action="append", default=[], metavar="KEY=VALUE",
+                        help="override a BotConfig.API_LIMITER value")
+    parser.add_argument("--sweep", metavar="KEY=V1,V2,...", help="replay each trace for every value of one key")
+    parser.add_argument("--latency", type=float, default=0.04, help="simulated server response time, seconds")
+    parser.add_argument("--jitter", type=float, default=0.02, help="random response time added on top, seconds")
+    parser.add_argument("--seed", type=int, default=20250101, help="random seed")
+    parser.add_argument("--json", type=Path, help="also write results to this JSON file")
+    args = parser.parse_args(argv)
+    
+    import logging
+    from config import BotConfig
+    
+    # Предупреждения лимитера о кулдаунах заменяются счётчиками в отчёте
+    logging.disable(logging.WARNING)
+    
+    configs = build_configs(BotConfig.API_LIMITER, args.set, args.sweep)
+    results = []
+    started = time.perf_counter()
+    
+    print_summary_header()
+    for trace_name in args.trace or TRACES:
+        for label, config in configs:
+            result = Simulation(
+                TRACES[trace_name], config, latency=args.latency, jitter=args.jitter, seed=args.seed
+            ).run()
+            print_summary(trace_name, label, result)
+            if not args.sweep:
+                print_labels(result)
+            results.append({"trace": trace_name, "config": config, **result})
+    
+    print(f"\nSimulated in {time.perf_counter() - started:.2f}s of wall time")
+    
+    if args.json:
+        with open(args.json, "w", encoding="utf-8") as f:
+            json.dump(results, f, indent=2, ensure_ascii=False)
+            f.write("\n")
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,181 @@
+# ©️ nnnrodnoy, 2025
+# 💬 @nnnrodnoy
+# This file is part of Huekka
+# 🌐 https://github.com/nnnrodnoy/Huekka/
+# You can redistribute it and/or modify it under the terms of the MIT License
+# 🔑 https://opensource.org/licenses/MIT
+"""
+Замеры конвейера разбора и форматирования сообщений
+
+    python -m benchmarks.run                   # замер и сравнение с baseline.json
+    python -m benchmarks.run --save-baseline   # сохранить текущие результаты как эталон
+    python -m benchmarks.run -k parse          # только замеры, в имени которых есть "parse"
+"""
+import argparse
+import json
+import logging
+import platform
+import sys
+import time
+import tracemalloc
+from pathlib import Path
+
+BASELINE_PATH = Path(__file__).with_name("baseline.json")
+
+def measure(func, min_time=0.2, repeat=5):
+    """
+    Замер скорости и памяти одной функции
+    
+    Returns:
+        Словарь с ops/sec (лучший из повторов), пиком выделенной памяти и числом оставшихся блоков на вызов
+    """
+    # Подбираем число вызовов так, чтобы один повтор длился не меньше min_time
+    number = 1
+    while True:
+        start = time.perf_counter()
+        for _ in range(number):
+            func()
+        elapsed = time.perf_counter() - start
+        if elapsed >= min_time / 10 or number >= 1 << 20:
+            break
+        number *= 2
+    number = max(1, int(number * (min_time / max(elapsed, 1e-9))))
+    
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        for _ in range(number):
+            func()
+        best = min(best, (time.perf_counter() - start) / number)
+    
+    # Память считаем отдельно: tracemalloc сильно замедляет выполнение
+    tracemalloc.start()
+    try:
+        func()
+        before = tracemalloc.take_snapshot()
+        tracemalloc.reset_peak()
+        base_current = tracemalloc.get_traced_memory()[0]
+        func()
+        peak = tracemalloc.get_traced_memory()[1] - base_current
+        after = tracemalloc.take_snapshot()
+    finally:
+        tracemalloc.stop()
+    
+    # Блоки, оставшиеся в памяти после вызова (рост кэшей, утечки)
+    retained = sum(stat.count_diff for stat in after.compare_to(before, "filename") if stat.count_diff > 0)
+    
+    return {
+        "ops_per_sec": 1.0 / best,
+        "usec_per_op": best * 1e6,
+        "retained_blocks": retained,
+        "peak_kib": peak / 1024
+    }
+
+def _calibration_workload():
+    """Эталонная нагрузка на чистом Python: строки, словари и списки, как в парсере"""
+    counts = {}
+    for word in ("модуль команда справка эмодзи " * 20).split():
+        counts[word] = counts.get(word, 0) + len(word.upper())
+    return sorted(counts.items())
+
+def calibrate(min_time):
+    """Скорость машины прямо сейчас в ops/sec эталонной нагрузки"""
+    number = 1000
+    best = float("inf")
+    deadline = time.perf_counter() + min_time
+    while True:
+        start = time.perf_counter()
+        for _ in range(number):
+            _calibration_workload()
+        best = min(best, (time.perf_counter() - start) / number)
+        if time.perf_counter() >= deadline:
+            break
+    return 1.0 / best
+
+def load_baseline(path):
+    """Загрузка эталонных результатов"""
+    try:
+        with open(path, "r", encoding="utf-8") as f:
+            return json.load(f).get("results", {})
+    except FileNotFoundError:
+        return {}
+
+def save_baseline(path, results):
+    """Сохранение результатов как эталона"""
+    data = {
+        "python": platform.python_version(),
+        "machine": platform.machine(),
+        "created": time.strftime("%Y-%m-%d %H:%M:%S"),
+        "results": results
+    }
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump(data, f, indent=2, ensure_ascii=False, sort_keys=True)
+        f.write("\n")
+
+def compare(name, result, baseline, threshold):
+    """
+    Сравнение с эталоном; возвращает (строка_статуса, является_ли_регрессией)
+    Скорость нормируется на калибровку, снятую непосредственно перед замером,
+    поэтому сравнение переживает смену машины и плавающую частоту процессора
+    """
+    reference = baseline.get(name)
+    if not reference:
+        return "new", False
+    
+    ratio = (result["ops_per_sec"] / result["calibration"]) / (reference["ops_per_sec"] / reference["calibration"])
+    regressed = ratio < 1.0 - threshold
+    return f"{ratio:6.2f}x{'  REGRESSION' if regressed else ''}", regressed
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Huekka parser/formatter benchmarks")
+    parser.add_argument("-k", "--filter", default="", help="run only benchmarks whose name contains this string")
+    parser.add_argument("--baseline", type=Path, default=BASELINE_PATH, help="baseline file")
+    parser.add_argument("--save-baseline", action="store_true", help="store current results as the baseline")
+    parser.add_argument("--threshold", type=float, default=0.25,
+                        help="allowed slowdown relative to the baseline (0.25 = 25%%)")
+    parser.add_argument("--min-time", type=float, default=0.2, help="minimum seconds per repeat")
+    parser.add_argument("--json", type=Path, help="also write results to this JSON file")
+    args = parser.parse_args(argv)
+    
+    # Предупреждения парсера о невалидных ID не должны попадать в вывод замеров
+    logging.disable(logging.WARNING)
+    
+    from benchmarks.cases import build_cases
+    
+    baseline = {} if args.save_baseline else load_baseline(args.baseline)
+    results = {}
+    regressions = []
+    
+    print(f"{'benchmark':<32} {'ops/sec':>12} {'us/op':>10} {'peak KiB':>9} {'retained':>9}  baseline")
+    for name, func in build_cases():
+        if args.filter not in name:
+            continue
+        
+        calibration = calibrate(args.min_time / 2)
+        result = measure(func, min_time=args.min_time)
+        result["calibration"] = (calibration + calibrate(args.min_time / 2)) / 2
+        results[name] = result
+        status, regressed = compare(name, result, baseline, args.threshold)
+        if regressed:
+            regressions.append(name)
+        
+        print(f"{name:<32} {result['ops_per_sec']:>12,.0f} {result['usec_per_op']:>10.1f} "
+              f"{result['peak_kib']:>9.1f} {result['retained_blocks']:>9}  {status}")
+    
+    if args.json:
+        save_baseline(args.json, results)
+    
+    if args.save_baseline:
+        save_baseline(args.baseline, results)
+        print(f"\nBaseline saved to {args.baseline}")
+        return 0
+    
+    if regressions:
+        print(f"\n{len(regressions)} benchmark(s) slower than baseline by more than {args.threshold:.0%}: "
+              f"{', '.join(regressions)}")
+        return 1
+    
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
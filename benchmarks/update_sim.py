@@ -0,0 +1,117 @@
+# ©️ nnnrodnoy, 2025
+# 💬 @nnnrodnoy
+# This file is part of Huekka
+# 🌐 https://github.com/nnnrodnoy/Huekka/
+# You can redistribute it and/or modify it under the terms of the MIT License
+# 🔑 https://opensource.org/licenses/MIT
+"""
+Прогон GitHubUpdater на локальном архиве: сколько хэшей пересчитывает сканирование
+
+    python -m benchmarks.update_sim              # установка из копии рабочего дерева
+    python -m benchmarks.update_sim --changed 5  # в архиве изменено 5 файлов
+
+Установка - копия файлов обновления во временном каталоге, архивы собираются из
+неё же, поэтому настоящие файлы бота и data/ не затрагиваются. После установки
+манифест должен покрывать все файлы: повторное сканирование ничего не хэширует,
+иначе скрипт завершается с кодом 1.
+"""
+import argparse
+import asyncio
+import os
+import shutil
+import sys
+import tempfile
+import time
+import zipfile
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parent.parent
+
+def build_archive(source_dir, zip_path, paths, changed=()):
+    """Архив как у GitHub (Huekka-main/...); в файлы changed дописывается строка"""
+    with zipfile.ZipFile(zip_path, 'w') as archive:
+        for path in paths:
+            data = (source_dir / path).read_bytes()
+            if path in changed:
+                data += b"\n# update_sim\n"
+            archive.writestr(f"Huekka-main/{path}", data)
+
+class CountingUpdater:
+    """GitHubUpdater, который считает хэши, пересчитанные в установке (а не в архиве)"""
+    
+    def __init__(self, updater):
+        self.updater = updater
+        self.rehashed = 0
+        hash_files = updater._hash_files
+        
+        def counting(root, paths):
+            paths = list(paths)
+            if Path(root) == Path("."):
+                self.rehashed += len(paths)
+            return hash_files(root, paths)
+        
+        updater._hash_files = counting
+    
+    def scan(self):
+        self.rehashed = 0
+        started = time.perf_counter()
+        files = len(self.updater.scan_local_files())
+        return files, self.rehashed, time.perf_counter() - started
+    
+    async def update(self, commit):
+        self.rehashed = 0
+        started = time.perf_counter()
+        updated = await self.updater.perform_update(commit, progress=lambda done, total: None)
+        return updated, self.rehashed, time.perf_counter() - started
+
+def print_step(name, files, rehashed, seconds):
+    print(f"{name:<28} {files:>6} {rehashed:>9} {seconds * 1000:>9.1f}")
+
+async def run(args):
+    from core.updater import GitHubUpdater, LocalArchiveSource
+    
+    workspace = Path(tempfile.mkdtemp(prefix="huekka-update-"))
+    install = workspace / "install"
+    paths = sorted(GitHubUpdater()._iter_update_paths(ROOT))
+    for path in paths:
+        (install / path).parent.mkdir(parents=True, exist_ok=True)
+        shutil.copy2(ROOT / path, install / path)
+    
+    zip_path = workspace / "huekka.zip"
+    build_archive(install, zip_path, paths, changed=paths[:args.changed])
+    
+    cwd = os.getcwd()
+    os.chdir(install)
+    try:
+        counting = CountingUpdater(GitHubUpdater(source=LocalArchiveSource(zip_path)))
+        
+        print(f"{'step':<28} {'files':>6} {'rehashed':>9} {'ms':>9}")
+        print_step("scan (no manifest)", *counting.scan())
+        updated, rehashed, seconds = await counting.update("1" * 40)
+        print_step(f"update ({'installed' if updated else 'not installed'})", len(paths), rehashed, seconds)
+        files, rehashed_after, seconds = counting.scan()
+        print_step("scan after update", files, rehashed_after, seconds)
+    finally:
+        os.chdir(cwd)
+        shutil.rmtree(workspace, ignore_errors=True)
+    
+    if not updated or rehashed_after:
+        print("\nFAIL: after an update the manifest must cover every installed file")
+        return 1
+    return 0
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Huekka updater manifest check on a local archive")
+    parser.add_argument("--changed", type=int, default=1, help="files changed in the archive")
+    parser.add_argument("-v", "--verbose", action="store_true", help="show updater logs")
+    args = parser.parse_args(argv)
+    
+    import logging
+    # Вывод updater'а мешает таблице результатов
+    if not args.verbose:
+        logging.disable(logging.CRITICAL)
+    
+    return asyncio.run(run(args))
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -13,7 +13,7 @@ class BotConfig:
     
     # Список основных модулей ядра
     CORE_MODULES = ["Help", "System", "Loader", "Updater", "Configurator", 
-                    "AutoCleaner", "LimiterTest", "DependencyInstaller"]
+                    "AutoCleaner", "LimiterTest", "DependencyInstaller", "Limits"]
     
     # Настройки APILimiter с новой логикой ограничений
     API_LIMITER = {
@@ -30,15 +30,32 @@ class BotConfig:
         "monitored_groups": [    # Группы методов для мониторинга
             "account", "auth", "bots", "channels", "contacts", "folders", 
             "help", "langpack", "messages", "payments", "phone", "photos", 
-            "stickers", "updates", "upload", "users", "stats", "invites",
-            "messages", "updates", "photos", "help", "channels", "phone",
-            "langpack", "folders", "stats", "bots", "stickers", "payments"
+            "stickers", "updates", "upload", "users", "stats", "invites"
         ],
-        "forbidden_methods": [   # Запрещенные методы
+        "forbidden_methods": [   # Запрещенные методы: имя из схемы TL или класс Telethon (JoinChannelRequest)
             "channels.joinChannel", "messages.importChatInvite",
             "contacts.addContact", "account.deleteAccount",
             "channels.deleteChannel", "messages.sendInlineBotResult"
-        ]
+        ],
+        
+        # Телеметрия (команда .limits)
+        "metrics_file": "logs/limiter_metrics.json",  # Файл для выгрузки счётчиков
+        "metrics_interval": 60,                        # Период автоматической выгрузки (сек, 0 - выключено)
+        
+        # Состояние окон и кулдаунов, переживающее перезапуск
+        "state_file": "cash/apilimiter_state.json"
+    }
+    
+    # Настройки логирования (запись в файл идёт в отдельном потоке)
+    LOGGING = {
+        "queue_size": 10000,     # Максимум записей в очереди; при переполнении новые отбрасываются
+        "levels": {}             # Начальные уровни отдельных логгеров, например {"telethon": "WARNING"}
+    }
+    
+    # Шифрование сессии
+    SESSION = {
+        "kdf_iterations": 100000,  # PBKDF2 для новых и перешифрованных сессий (python userbot.py --migrate-session)
+        "handoff": True            # Передавать ключ через pipe при перезапуске вместо повторного PBKDF2
     }
     
     # Настройки загрузчика модулей
@@ -47,12 +64,21 @@ class BotConfig:
         "delete_delay": 50             # Задержка удаления сообщений (сек)
     }
     
+    # Анимации через редактирование сообщения (core/animation.py)
+    ANIMATION = {
+        "min_interval": 0.5,     # Не чаще одного редактирования за столько секунд
+        "period_reserve": 20,    # Запросы окна периода API_LIMITER, которые анимации не занимают
+        "max_flood_wait": 30     # FLOOD_WAIT дольше этого прерывает анимацию (сек)
+    }
+    
     # Настройки для Updater
     UPDATER = {
         "repo_url": "https://github.com/stepka5/Huekka",
+        "archive_url": None,     # Архив обновления (URL или путь к zip); None - main.zip репозитория
         "system_files": [        # Файлы для проверки обновлений
             "main.py",
             "userbot.py",
+            "startup.py",
             "core/parser.py",
             "core/__init__.py",
             "updater.py",
@@ -68,7 +94,12 @@ class BotConfig:
             "arts",
             "modules"
         ],
-        "min_display_time": 5.0  # Минимальное время отображения сообщения
+        "min_display_time": 5.0,  # Минимальное время отображения сообщения
+        "check_ttl": 21600,       # Фоновая проверка не чаще раза в 6 часов (0 - отключить)
+        "check_retry": 600,       # Повтор через 10 минут, если сеть недоступна
+        "check_timeout": 30,      # Таймаут git ls-remote (сек)
+        "hash_workers": None,     # Потоков для хэширования файлов (None - по числу ядер, не больше 8)
+        "keep_releases": 3        # Сколько установленных версий хранить для .rollback
     }
     
     # ID эмодзи для различных статусов
@@ -96,12 +127,21 @@ class BotConfig:
     
     # Настройки для System модуля
     SYSTEM = {
-        "info_file": "core/information.txt"  # Файл с информацией о боте
+        "info_file": "core/information.txt",  # Файл с информацией о боте
+        "channel": "BotHuekka",               # Канал, на который подписывается бот
+        "channel_join_ttl": 604800            # Подписка перепроверяется раз в неделю (сек)
+    }
+    
+    # Настройки для Help модуля
+    HELP = {
+        "render_cache_size": 256  # Максимум закэшированных страниц справки
     }
     
     # Настройки для парсера
     PARSER = {
-        "max_message_length": 4096  # Максимальная длина сообщения
+        "max_message_length": 4096,      # Максимальная длина сообщения
+        "parse_cache_size": 512,         # Количество закэшированных результатов разбора HTML
+        "parse_cache_max_length": 16384  # Тексты длиннее не кэшируются
     }
     
     # Маппинг импортов на имена пакетов pip
@@ -113,6 +153,12 @@ class BotConfig:
         'mysql': 'mysql-connector-python'
     }
     
+    # Настройки установщика зависимостей
+    DEP_INSTALLER = {
+        "wheelhouse_dir": "cash/wheelhouse",  # Локальный кэш колёс для офлайн-установки
+        "pip_timeout": 600                    # Максимальное время одного вызова pip (сек)
+    }
+
     # Настройки для артера
     ARTER = {
         # Все возможные символы фона, которые нужно заменить на пробелы
@@ -4,6 +4,12 @@
 # 🌐 https://github.com/nnnrodnoy/Huekka/
 # You can redistribute it and/or modify it under the terms of the MIT License
 # 🔑 https://opensource.org/licenses/MIT
-from .parser import CustomParseMode, EmojiHandler
-
 __all__ = ['CustomParseMode', 'EmojiHandler']
+
+def __getattr__(name):
+    # Парсер (и telethon) грузится по первому обращению: core.startup_trace
+    # импортируется в main.py до тяжёлых импортов
+    if name in __all__:
+        from . import parser
+        return getattr(parser, name)
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
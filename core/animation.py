@@ -0,0 +1,192 @@
+# ©️ nnnrodnoy, 2025
+# 💬 @nnnrodnoy
+# This file is part of Huekka
+# 🌐 https://github.com/nnnrodnoy/Huekka/
+# You can redistribute it and/or modify it under the terms of the MIT License
+# 🔑 https://opensource.org/licenses/MIT
+import asyncio
+import bisect
+import itertools
+import logging
+import time
+from functools import lru_cache
+from typing import NamedTuple, Optional
+from telethon import utils
+from telethon.errors import FloodWaitError, MessageNotModifiedError
+from config import BotConfig
+
+logger = logging.getLogger("UserBot.Animation")
+
+class Frame(NamedTuple):
+    """
+    Кадр анимации
+    
+    text: текст кадра в разметке parse_mode
+    delay: сколько кадр показывается до следующего (сек)
+    parse_mode: "html", "md" или None, если разметка уже разобрана в entities
+    entities: готовые сущности (например, MessageEntityCustomEmoji)
+    """
+    text: str
+    delay: float = 0.0
+    parse_mode: Optional[str] = "html"
+    entities: Optional[tuple] = None
+
+@lru_cache(maxsize=1024)
+def render_markup(text, parse_mode):
+    """Разбор разметки кадра; повторяющиеся кадры разбираются один раз"""
+    parser = utils.sanitize_parse_mode(parse_mode)
+    message, entities = parser.parse(text)
+    return message, tuple(entities)
+
+def render_frame(frame):
+    """Текст и сущности кадра для client.edit_message"""
+    if frame.entities is not None or not frame.parse_mode:
+        return frame.text, tuple(frame.entities or ())
+    return render_markup(frame.text, frame.parse_mode)
+
+class Animator:
+    """
+    Проигрывание анимаций редактированием одного сообщения
+    
+    Кадры идут по расписанию из их задержек. Если запрос не укладывается в
+    интервал, допустимый лимитером, промежуточные кадры выбрасываются, а не
+    копятся в очереди: после паузы сразу показывается кадр, положенный по времени.
+    Последний кадр показывается всегда, поэтому анимация заканчивается вовремя
+    """
+    
+    def __init__(self, bot, config=None):
+        self.bot = bot
+        self.config = config or BotConfig.ANIMATION
+        self._clock = time.monotonic
+        self._running = {}  # (chat_id, message_id) -> задача с анимацией
+        self.stats = {"played": 0, "cancelled": 0, "sent": 0, "dropped": 0, "flood_waits": 0}
+    
+    def _flood_wait_count(self):
+        """FLOOD_WAIT, которые Telethon пережидает сам, видны только в счётчике лимитера"""
+        limiter = getattr(self.bot, 'apilimiter', None)
+        return sum(limiter.stats.flood_waits.values()) if limiter else 0
+    
+    def _interval(self, remaining_time, remaining_frames, backoff):
+        """Пауза до следующего редактирования с учётом бюджета лимитера"""
+        interval = self.config["min_interval"] * backoff
+        limiter = getattr(self.bot, 'apilimiter', None)
+        if limiter is None or remaining_frames <= 0:
+            return interval
+        
+        cooldown = limiter.cooldown_left()
+        if cooldown:
+            return max(interval, cooldown)
+        
+        budget = limiter.budget(remaining_time, self.config["period_reserve"])
+        if budget < remaining_frames:
+            # Оставшиеся кадры растягиваются на бюджет; без бюджета - сразу к последнему
+            interval = max(interval, remaining_time / budget if budget else remaining_time)
+        return interval
+    
+    async def play(self, message, frames):
+        """
+        Проигрывает кадры в сообщении
+        Новая анимация в том же сообщении отменяет предыдущую
+        
+        Args:
+            message: сообщение, которое редактируется
+            frames: последовательность Frame
+        
+        Returns:
+            True, если показан последний кадр
+        """
+        frames = list(frames)
+        if not frames:
+            return True
+        
+        key = (message.chat_id, message.id)
+        previous = self._running.get(key)
+        if previous is not None and previous is not asyncio.current_task():
+            previous.cancel()
+        self._running[key] = asyncio.current_task()
+        
+        try:
+            finished = await self._play(message, frames)
+            self.stats["played"] += finished
+            return finished
+        except asyncio.CancelledError:
+            self.stats["cancelled"] += 1
+            raise
+        finally:
+            if self._running.get(key) is asyncio.current_task():
+                del self._running[key]
+    
+    async def _play(self, message, frames):
+        # Время показа каждого кадра от начала анимации
+        offsets = list(itertools.accumulate((frame.delay for frame in frames[:-1]), initial=0.0))
+        last = len(frames) - 1
+        entity = await message.get_input_chat()
+        started = self._clock()
+        shown = None
+        backoff = 1
+        index = 0
+        
+        while True:
+            # Кадр, положенный по времени; пропущенные до него не отправляются
+            due = bisect.bisect_right(offsets, self._clock() - started) - 1
+            if due > index:
+                self.stats["dropped"] += due - index
+                index = due
+            
+            rendered = render_frame(frames[index])
+            if rendered != shown:
+                flood_waits = self._flood_wait_count()
+                try:
+                    await self.bot.client.edit_message(
+                        entity, message.id, rendered[0],
+                        formatting_entities=list(rendered[1]), parse_mode=None
+                    )
+                    self.stats["sent"] += 1
+                except MessageNotModifiedError:
+                    pass
+                except FloodWaitError as e:
+                    self.stats["flood_waits"] += 1
+                    if e.seconds > self.config["max_flood_wait"]:
+                        logger.warning(f"Анимация прервана: FloodWait {e.seconds} сек.")
+                        return False
+                    logger.warning(f"Анимация ждёт FloodWait: {e.seconds} сек.")
+                    backoff *= 2
+                    await self._sleep_until(self._clock() + e.seconds)
+                    continue
+                
+                if self._flood_wait_count() > flood_waits:
+                    # Telethon уже переждал FLOOD_WAIT внутри запроса: дальше реже
+                    self.stats["flood_waits"] += 1
+                    backoff *= 2
+                shown = rendered
+            
+            if index == last:
+                return True
+            
+            index += 1
+            sent_at = self._clock()
+            interval = self._interval(offsets[last] - (sent_at - started), last - index + 1, backoff)
+            await self._sleep_until(max(started + offsets[index], sent_at + interval))
+    
+    async def _sleep_until(self, deadline):
+        """Единственная точка ожидания анимации, она же точка отмены"""
+        delay = deadline - self._clock()
+        if delay > 0:
+            await asyncio.sleep(delay)
+    
+    def cancel(self, chat_id=None, message_id=None):
+        """
+        Отменяет анимации: все, в чате или в одном сообщении
+        
+        Returns:
+            Число отменённых анимаций
+        """
+        cancelled = 0
+        for (chat, msg_id), task in list(self._running.items()):
+            if chat_id is not None and chat != chat_id:
+                continue
+            if message_id is not None and msg_id != message_id:
+                continue
+            task.cancel()
+            cancelled += 1
+        return cancelled
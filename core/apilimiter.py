@@ -5,31 +5,122 @@
 # You can redistribute it and/or modify it under the terms of the MIT License
 # 🔑 https://opensource.org/licenses/MIT
 import asyncio
+import contextlib
+import contextvars
+import json
 import logging
+import os
 import random
 import time
-from collections import deque
+from collections import Counter, deque
+from telethon import errors
 from telethon.tl.tlobject import TLRequest
 from config import BotConfig
 
 logger = logging.getLogger("UserBot.APILimiter")
 
+class LimiterStats:
+    """Счётчики и накопители APILimiter; обновление - одно сложение на событие"""
+    
+    def __init__(self):
+        self.started = time.time()
+        self.requests = Counter()          # группа методов -> все запросы
+        self.monitored = Counter()         # группа методов -> запросы, прошедшие проверку лимитов
+        self.delayed = Counter()           # группа методов -> запросы, ждавшие окончания кулдауна
+        self.forbidden = Counter()         # имя запроса -> заблокированные вызовы
+        self.flood_waits = Counter()       # имя запроса -> полученные FLOOD_WAIT
+        self.flood_wait_seconds = 0
+        self.last_flood_wait = None        # (имя запроса, секунды, время)
+        self.cooldowns = Counter()         # "speed"/"period" -> число включений кулдауна
+        self.cooldown_wait = Counter()     # "speed"/"period" -> суммарное ожидание запросов (сек)
+        self.max_cooldown_wait = Counter() # "speed"/"period" -> самое долгое ожидание одного запроса
+        self.waiting = Counter()           # "speed"/"period" -> запросов ждёт прямо сейчас
+    
+    def record_flood_wait(self, request_name, seconds):
+        self.flood_waits[request_name] += 1
+        self.flood_wait_seconds += seconds
+        self.last_flood_wait = (request_name, seconds, time.time())
+    
+    def record_wait(self, kind, group, seconds):
+        self.delayed[group] += 1
+        self.cooldown_wait[kind] += seconds
+        if seconds > self.max_cooldown_wait[kind]:
+            self.max_cooldown_wait[kind] = seconds
+
+class _FloodWaitCounter(logging.Filter):
+    """
+    Telethon сам пережидает FLOOD_WAIT не длиннее flood_sleep_threshold и не выбрасывает исключение;
+    единственный след такого ожидания - запись "Sleeping for Ns on X flood wait" в его логе.
+    Фильтр считает такие записи и пропускает дальше только записи не ниже прежнего уровня логгера
+    """
+    
+    def __init__(self, stats_owner, level):
+        super().__init__()
+        self.stats_owner = stats_owner
+        self.level = level
+    
+    def filter(self, record):
+        if isinstance(record.msg, str) and record.msg.startswith("Sleeping") and len(record.args) == 4:
+            early, seconds, _, request_name = record.args
+            # "Sleeping early" - новый запрос дожидается уже учтённого FLOOD_WAIT
+            if early != " early":
+                self.stats_owner.stats.record_flood_wait(request_name, seconds)
+        return record.levelno >= self.level
+
+_flood_wait_counter = None
+
+# Разрешение запрещённых методов для собственных вызовов ядра (см. APILimiter.trusted)
+_trusted_call = contextvars.ContextVar("apilimiter_trusted", default=False)
+
+def tl_method_name(request_type):
+    """
+    Имя метода в схеме TL по классу запроса Telethon:
+    telethon.tl.functions.channels.JoinChannelRequest -> channels.joinChannel
+    """
+    name = request_type.__name__
+    if name.endswith("Request"):
+        name = name[:-len("Request")]
+    name = name[:1].lower() + name[1:]
+    
+    module = request_type.__module__
+    if module.startswith("telethon.tl.functions."):
+        return f"{module.rsplit('.', 1)[-1]}.{name}"
+    return name
+
+class RequestClass:
+    """Классификация типа запроса, вычисляется один раз на тип"""
+    __slots__ = ("group", "name", "monitored", "forbidden")
+    
+    def __init__(self, group, name, monitored, forbidden):
+        self.group = group          # группа методов, она же корзина счётчиков телеметрии
+        self.name = name            # имя класса Telethon для логов и счётчиков
+        self.monitored = monitored  # проходит через ограничения скорости и периода
+        self.forbidden = forbidden  # блокируется политикой безопасности
+
 class APILimiter:
-    def __init__(self, bot):
+    def __init__(self, bot, config=None, clock=None, rng=None):
         self.bot = bot
         
+        # Часы и генератор случайной задержки подменяются в симуляторе (benchmarks.limiter_sim)
+        self._clock = clock or time.perf_counter
+        self._random = rng or random.Random()
+        
         # Для ограничения по количеству запросов
         self._period_requests = deque()
         self._period_lock = asyncio.Lock()
         self._period_cooldown = None
+        self._period_cooldown_until = 0.0
         
         # Для ограничения по скорости
         self._speed_requests = deque()
         self._speed_lock = asyncio.Lock()
         self._speed_cooldown = None
+        self._speed_cooldown_until = 0.0
+        
+        self.stats = LimiterStats()
         
         # Настройки из конфига
-        api_limiter_config = BotConfig.API_LIMITER
+        api_limiter_config = config or BotConfig.API_LIMITER
         
         # Ограничение по количеству запросов
         self.requests_per_period = api_limiter_config["requests_per_period"]
@@ -40,27 +131,67 @@ class APILimiter:
         self.max_requests_per_second = api_limiter_config["max_requests_per_second"]
         self.high_load_cooldown = api_limiter_config["high_load_cooldown"]
         
-        self.monitored_groups = api_limiter_config["monitored_groups"]
-        self.forbidden_methods = api_limiter_config["forbidden_methods"]
+        self.monitored_groups = frozenset(api_limiter_config["monitored_groups"])
+        self.forbidden_methods = frozenset(api_limiter_config["forbidden_methods"])
+        
+        # Тип запроса -> RequestClass
+        self._classes = {}
+        
+        # Снимок окон и кулдаунов переживает перезапуск через os.execl
+        self.state_file = api_limiter_config.get("state_file")
         
         # Устанавливаем защиту
         self._install_protection()
         logger.info("API Limiter инициализирован с новой логикой ограничений")
 
+    def _classify(self, request):
+        """Классификация запроса: поиск по типу в словаре, разбор имени - только для нового типа"""
+        request_type = type(request)
+        try:
+            return self._classes[request_type]
+        except KeyError:
+            pass
+        
+        if request_type is list:
+            # Пакет запросов классифицируется по самому строгому из вложенных
+            parts = [self._classify(item) for item in request]
+            return RequestClass(
+                parts[0].group if parts else "list",
+                ",".join(part.name for part in parts),
+                any(part.monitored for part in parts),
+                any(part.forbidden for part in parts)
+            )
+        
+        group = request_type.__module__.rsplit('.', 1)[-1]
+        name = request_type.__name__
+        # Запрет задаётся именем метода из схемы TL (channels.joinChannel) или именем класса Telethon
+        forbidden = name in self.forbidden_methods or tl_method_name(request_type) in self.forbidden_methods
+        
+        request_class = RequestClass(group, name, group in self.monitored_groups, forbidden)
+        self._classes[request_type] = request_class
+        return request_class
+    
     def _should_monitor(self, request):
         """Определяем, нужно ли мониторить этот запрос"""
-        module_name = request.__class__.__module__.split('.')[-1]
-        return module_name in self.monitored_groups
+        return self._classify(request).monitored
 
     def _is_forbidden(self, request):
         """Проверяет, запрещен ли этот запрос"""
-        request_name = type(request).__name__
-        return request_name in self.forbidden_methods
+        return self._classify(request).forbidden
+    
+    @contextlib.contextmanager
+    def trusted(self):
+        """Разрешает запрещённые методы для вызовов ядра внутри блока (например, подписка на канал бота)"""
+        token = _trusted_call.set(True)
+        try:
+            yield
+        finally:
+            _trusted_call.reset(token)
 
     async def _check_period_limit(self, request_name):
         """Проверяет ограничение по количеству запросов за период"""
         async with self._period_lock:
-            current_time = time.perf_counter()
+            current_time = self._clock()
             
             # Удаляем старые запросы
             while self._period_requests and current_time - self._period_requests[0] > self.period_duration:
@@ -73,6 +204,8 @@ class APILimiter:
             if len(self._period_requests) > self.requests_per_period:
                 if not self._period_cooldown:
                     self._period_cooldown = asyncio.Event()
+                    self._period_cooldown_until = current_time + self.cooldown_after_period
+                    self.stats.cooldowns["period"] += 1
                     error_msg = (f"PeriodLimitExceeded - wait {self.cooldown_after_period} seconds\n"
                                f"Запросов: {len(self._period_requests)}/{self.requests_per_period} "
                                f"за {self.period_duration} сек")
@@ -80,6 +213,7 @@ class APILimiter:
                     
                     # Запускаем сброс кулдауна
                     asyncio.create_task(self._reset_period_cooldown())
+                    self.save_state()
                 
                 return False
             return True
@@ -87,7 +221,7 @@ class APILimiter:
     async def _check_speed_limit(self, request_name):
         """Проверяет ограничение по скорости (запросов в секунду)"""
         async with self._speed_lock:
-            current_time = time.perf_counter()
+            current_time = self._clock()
             
             # Удаляем запросы старше 1 секунды
             while self._speed_requests and current_time - self._speed_requests[0] > 1:
@@ -100,6 +234,8 @@ class APILimiter:
             if len(self._speed_requests) > self.max_requests_per_second:
                 if not self._speed_cooldown:
                     self._speed_cooldown = asyncio.Event()
+                    self._speed_cooldown_until = current_time + self.high_load_cooldown
+                    self.stats.cooldowns["speed"] += 1
                     error_msg = (f"SpeedLimitExceeded - wait {self.high_load_cooldown} seconds\n"
                                f"Скорость: {len(self._speed_requests)} запросов/сек, "
                                f"максимум разрешено {self.max_requests_per_second}")
@@ -107,14 +243,15 @@ class APILimiter:
                     
                     # Запускаем сброс кулдауна
                     asyncio.create_task(self._reset_speed_cooldown())
+                    self.save_state()
                 
                 return False
             
             return True
 
-    async def _reset_period_cooldown(self):
+    async def _reset_period_cooldown(self, delay=None):
         """Сбрасывает флаги кулдауна для ограничения по количеству"""
-        await asyncio.sleep(self.cooldown_after_period)
+        await asyncio.sleep(self.cooldown_after_period if delay is None else delay)
         async with self._period_lock:
             self._period_requests.clear()
             if self._period_cooldown:
@@ -122,9 +259,9 @@ class APILimiter:
                 self._period_cooldown = None
         logger.info("Period limit cooldown finished")
 
-    async def _reset_speed_cooldown(self):
+    async def _reset_speed_cooldown(self, delay=None):
         """Сбрасывает флаги кулдауна для ограничения по скорости"""
-        await asyncio.sleep(self.high_load_cooldown)
+        await asyncio.sleep(self.high_load_cooldown if delay is None else delay)
         async with self._speed_lock:
             self._speed_requests.clear()
             if self._speed_cooldown:
@@ -132,6 +269,183 @@ class APILimiter:
                 self._speed_cooldown = None
         logger.info("Speed limit cooldown finished")
 
+    def save_state(self):
+        """
+        Сохраняет окна, активные кулдауны и FLOOD_WAIT Telethon в файл состояния.
+        Моменты переводятся из часов лимитера (perf_counter) во время эпохи
+        """
+        if not self.state_file:
+            return
+        
+        offset = time.time() - self._clock()
+        
+        def cooldown_deadline(cooldown, until):
+            return until + offset if cooldown else None
+        
+        flood_waited = getattr(self.bot.client, "_flood_waited_requests", None) or {}
+        state = {
+            "saved_at": time.time(),
+            "speed_requests": [moment + offset for moment in self._speed_requests],
+            "period_requests": [moment + offset for moment in self._period_requests],
+            "speed_cooldown_until": cooldown_deadline(self._speed_cooldown, self._speed_cooldown_until),
+            "period_cooldown_until": cooldown_deadline(self._period_cooldown, self._period_cooldown_until),
+            "flood_waited": {str(constructor_id): due for constructor_id, due in flood_waited.items()}
+        }
+        
+        try:
+            os.makedirs(os.path.dirname(self.state_file) or ".", exist_ok=True)
+            temp_file = f"{self.state_file}.tmp"
+            with open(temp_file, "w") as f:
+                json.dump(state, f)
+            os.replace(temp_file, self.state_file)
+        except OSError as e:
+            logger.error(f"Ошибка сохранения состояния лимитера: {str(e)}")
+    
+    def load_state(self):
+        """
+        Восстанавливает состояние, сохранённое до перезапуска: запросы, ещё попадающие в окна,
+        недосиженные кулдауны и FLOOD_WAIT. Вызывается из запущенного цикла событий
+        """
+        if not self.state_file or not os.path.exists(self.state_file):
+            return
+        
+        try:
+            with open(self.state_file, "r") as f:
+                state = json.load(f)
+        except (OSError, ValueError) as e:
+            logger.error(f"Ошибка чтения состояния лимитера: {str(e)}")
+            return
+        
+        now = time.time()
+        offset = self._clock() - now
+        
+        self._speed_requests.extend(
+            moment + offset for moment in state.get("speed_requests", []) if now - moment <= 1
+        )
+        self._period_requests.extend(
+            moment + offset for moment in state.get("period_requests", []) if now - moment <= self.period_duration
+        )
+        
+        speed_until = state.get("speed_cooldown_until")
+        if speed_until and speed_until > now and not self._speed_cooldown:
+            self._speed_cooldown = asyncio.Event()
+            self._speed_cooldown_until = speed_until + offset
+            asyncio.create_task(self._reset_speed_cooldown(speed_until - now))
+        
+        period_until = state.get("period_cooldown_until")
+        if period_until and period_until > now and not self._period_cooldown:
+            self._period_cooldown = asyncio.Event()
+            self._period_cooldown_until = period_until + offset
+            asyncio.create_task(self._reset_period_cooldown(period_until - now))
+        
+        flood_waited = getattr(self.bot.client, "_flood_waited_requests", None)
+        if flood_waited is not None:
+            for constructor_id, due in state.get("flood_waited", {}).items():
+                if due > now:
+                    flood_waited[int(constructor_id)] = due
+        
+        logger.info(f"Состояние лимитера восстановлено: окно {len(self._period_requests)}/{self.requests_per_period}, "
+                    f"кулдауны: скорость {max(0, (speed_until or now) - now):.0f} сек, "
+                    f"период {max(0, (period_until or now) - now):.0f} сек")
+    
+    async def _send(self, old_call, sender, request, ordered, flood_sleep_threshold):
+        """Отправка запроса с учётом FLOOD_WAIT, который Telethon не стал пережидать"""
+        try:
+            return await old_call(sender, request, ordered, flood_sleep_threshold)
+        except errors.FloodWaitError as e:
+            self.stats.record_flood_wait(self._classify(request).name, e.seconds)
+            raise
+    
+    async def _wait_cooldown(self, kind, cooldown, group):
+        """Ожидание окончания кулдауна с учётом времени ожидания"""
+        started = self._clock()
+        self.stats.waiting[kind] += 1
+        try:
+            await cooldown.wait()
+        finally:
+            self.stats.waiting[kind] -= 1
+            self.stats.record_wait(kind, group, self._clock() - started)
+    
+    def cooldown_left(self):
+        """Секунды до конца активного кулдауна скорости или периода (0 - кулдауна нет)"""
+        now = self._clock()
+        left = 0.0
+        if self._speed_cooldown:
+            left = max(left, self._speed_cooldown_until - now)
+        if self._period_cooldown:
+            left = max(left, self._period_cooldown_until - now)
+        return left
+    
+    def budget(self, horizon, reserve=0):
+        """
+        Сколько отслеживаемых запросов можно сделать за horizon секунд, не переполнив окно периода
+        
+        Args:
+            horizon: интервал планирования (сек)
+            reserve: запросы окна, оставляемые командам пользователя
+        
+        Returns:
+            Число запросов (0 - окно уже занято)
+        """
+        now = self._clock()
+        window_start = now - self.period_duration
+        in_window = 0
+        expiring = 0
+        for requested_at in self._period_requests:
+            if requested_at > window_start:
+                in_window += 1
+                # Запрос покинет окно до конца интервала
+                if requested_at <= window_start + horizon:
+                    expiring += 1
+        
+        allowed = self.requests_per_period - reserve
+        budget = allowed - in_window + expiring
+        if horizon > self.period_duration:
+            budget += int(allowed * (horizon - self.period_duration) / self.period_duration)
+        return max(0, budget)
+    
+    def get_stats(self):
+        """Снимок счётчиков и текущего состояния лимитов"""
+        now = self._clock()
+        stats = self.stats
+        
+        def cooldown_left(cooldown, until):
+            return max(0.0, until - now) if cooldown else 0.0
+        
+        return {
+            "uptime": time.time() - stats.started,
+            "requests": dict(stats.requests),
+            "monitored": dict(stats.monitored),
+            "delayed": dict(stats.delayed),
+            "forbidden": dict(stats.forbidden),
+            "flood_waits": dict(stats.flood_waits),
+            "flood_wait_seconds": stats.flood_wait_seconds,
+            "last_flood_wait": stats.last_flood_wait,
+            "speed": {
+                "window": len(self._speed_requests),
+                "limit": self.max_requests_per_second,
+                "cooldown_left": cooldown_left(self._speed_cooldown, self._speed_cooldown_until),
+                "cooldowns": stats.cooldowns["speed"],
+                "waiting": stats.waiting["speed"],
+                "wait_total": stats.cooldown_wait["speed"],
+                "wait_max": stats.max_cooldown_wait["speed"]
+            },
+            "period": {
+                "window": len(self._period_requests),
+                "limit": self.requests_per_period,
+                "duration": self.period_duration,
+                "cooldown_left": cooldown_left(self._period_cooldown, self._period_cooldown_until),
+                "cooldowns": stats.cooldowns["period"],
+                "waiting": stats.waiting["period"],
+                "wait_total": stats.cooldown_wait["period"],
+                "wait_max": stats.max_cooldown_wait["period"]
+            }
+        }
+    
+    def reset_stats(self):
+        """Обнуление счётчиков (окна и активные кулдауны не трогаются)"""
+        self.stats = LimiterStats()
+    
     def _install_protection(self):
         """Установка перехватчика API вызовов"""
         if hasattr(self.bot.client._call, "_api_limiter_installed"):
@@ -146,45 +460,63 @@ class APILimiter:
             ordered: bool = False,
             flood_sleep_threshold: int = None,
         ):
+            request_class = self._classify(request)
+            group = request_class.group
+            self.stats.requests[group] += 1
+            
             # Проверяем, не запрещен ли запрос
-            if self._is_forbidden(request):
-                logger.warning(f"Запрещенный запрос: {type(request).__name__}")
+            if request_class.forbidden and not _trusted_call.get():
+                self.stats.forbidden[request_class.name] += 1
+                logger.warning(f"Запрещенный запрос: {request_class.name}")
                 raise Exception("This API method is forbidden by security policy")
             
             # Пропускаем запросы, которые не нужно мониторить
-            if not self._should_monitor(request):
-                return await old_call(sender, request, ordered, flood_sleep_threshold)
+            if not request_class.monitored:
+                return await self._send(old_call, sender, request, ordered, flood_sleep_threshold)
 
             # Добавляем случайную задержку (5-15 мс)
-            delay = random.randint(5, 15) / 1000
+            delay = self._random.randint(5, 15) / 1000
             await asyncio.sleep(delay)
 
             # Получаем имя метода
-            request_name = type(request).__name__
+            request_name = request_class.name
             
             # Проверяем ограничение по скорости
             speed_allowed = await self._check_speed_limit(request_name)
             if not speed_allowed and self._speed_cooldown:
-                await self._speed_cooldown.wait()
+                await self._wait_cooldown("speed", self._speed_cooldown, group)
                 # После ожидания снова проверяем
                 speed_allowed = await self._check_speed_limit(request_name)
                 if not speed_allowed:
                     # Если все еще не разрешено, ждем окончания кулдауна
-                    await self._speed_cooldown.wait()
+                    await self._wait_cooldown("speed", self._speed_cooldown, group)
             
             # Проверяем ограничение по количеству
             period_allowed = await self._check_period_limit(request_name)
             if not period_allowed and self._period_cooldown:
-                await self._period_cooldown.wait()
+                await self._wait_cooldown("period", self._period_cooldown, group)
                 # После ожидания снова проверяем
                 period_allowed = await self._check_period_limit(request_name)
                 if not period_allowed:
                     # Если все еще не разрешено, ждем окончания кулдауна
-                    await self._period_cooldown.wait()
+                    await self._wait_cooldown("period", self._period_cooldown, group)
             
-            return await old_call(sender, request, ordered, flood_sleep_threshold)
+            self.stats.monitored[group] += 1
+            return await self._send(old_call, sender, request, ordered, flood_sleep_threshold)
 
         # Сохраняем оригинальный метод и заменяем его
         self.bot.client._call = new_call
         self.bot.client._call._api_limiter_installed = True
+        
+        # Короткие FLOOD_WAIT Telethon пережидает сам и сообщает о них только в лог
+        global _flood_wait_counter
+        if _flood_wait_counter is None:
+            flood_logger = logging.getLogger("telethon.client.users")
+            level = flood_logger.getEffectiveLevel()
+            _flood_wait_counter = _FloodWaitCounter(self, level)
+            flood_logger.addFilter(_flood_wait_counter)
+            # INFO нужен только фильтру: записи ниже прежнего уровня он дальше в лог не пропускает
+            if level > logging.INFO:
+                flood_logger.setLevel(logging.INFO)
+        _flood_wait_counter.stats_owner = self
         logger.info("✅ API protection installed with new limiting logic")
@@ -27,7 +27,7 @@ class AutoCleaner:
             r'^{}\s*lm\b',
             r'^{}\s*(help|h|помощь)\b',
             r'^{}\s*(restart|reboot)\b',
-            r'^{}\s*(update|upgrade)\b',
+            r'^{}\s*(update|upgrade|rollback)\b',
             r'^{}\s*(upcheck|checkupdate)\b',
             r'^{}\s*(config|conf|настройки)\b',
             r'^{}\s*config\s+prefix\b'
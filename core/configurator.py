@@ -10,6 +10,7 @@ import re
 from pathlib import Path
 from telethon import events
 from config import BotConfig
+from core import log
 
 logger = logging.getLogger("UserBot.Configurator")
 
@@ -60,6 +61,8 @@ class ConfiguratorModule:
             await self.set_autostart(event, args[2].lower())
         elif subcommand == "status":
             await self.show_status(event)
+        elif subcommand == "log":
+            await self.set_log_level(event, args[2:])
         else:
             await self.show_help(event)
 
@@ -76,12 +79,14 @@ class ConfiguratorModule:
  <emoji document_id=5251522431977291010>▪️</emoji><code>{prefix}config autoclean_delay</code> <code>&lt;секунды&gt;</code> - <i>Установить задержку автоклинера</i>
  <emoji document_id=5251522431977291010>▪️</emoji><code>{prefix}config autostart</code> <code>&lt;on/off&gt;</code> - <i>Включить/выключить автозапуск</i>
  <emoji document_id=5251522431977291010>▪️</emoji><code>{prefix}config status</code> - <i>Показать текущие настройки</i>
+ <emoji document_id=5251522431977291010>▪️</emoji><code>{prefix}config log</code> <code>[логгер] [уровень]</code> - <i>Уровни логирования</i>
 
 <b>Примеры:</b>
 <emoji document_id=5251481573953405172>▫️</emoji> <code>{prefix}config prefix !</code> - <i>Установить префикс "!"</i>
 <emoji document_id=5251481573953405172>▫️</emoji> <code>{prefix}config autoclean on</code> - <i>Включить автоклинер</i>
 <emoji document_id=5251481573953405172>▫️</emoji> <code>{prefix}config autoclean_delay 3600</code> - <i>Установить задержку 1 час</i>
 <emoji document_id=5251481573953405172>▫️</emoji> <code>{prefix}config autostart on</code> - <i>Включить автозапуск</i>
+<emoji document_id=5251481573953405172>▫️</emoji> <code>{prefix}config log UserBot.Loader DEBUG</code> - <i>Подробный лог загрузчика</i>
 """
         await event.edit(help_text)
 
@@ -213,6 +218,37 @@ class ConfiguratorModule:
             logger.error(f"Ошибка изменения автозапуска: {str(e)}")
             await event.edit("<emoji document_id=5210952531676504517>❌</emoji> <b>Ошибка при изменении настроек автозапуска!</b>")
 
+    async def set_log_level(self, event, args):
+        """Показать или изменить уровни логгеров во время работы"""
+        if len(args) >= 2:
+            name, level = args[0], args[1]
+            if log.set_level(name, level) is None:
+                await event.edit(f"<emoji document_id=5210952531676504517>❌</emoji> <b>Неизвестный уровень:</b> <code>{level}</code>\n"
+                                 f"<b>Доступны:</b> <code>DEBUG INFO WARNING ERROR CRITICAL NOTSET</code>")
+                return
+            
+            logger.info(f"Уровень логгера {name} изменён на {level.upper()}")
+            await event.edit(f"<emoji document_id=5206607081334906820>✅</emoji> <b>Уровень</b> <code>{name}</code> <b>:</b> <code>{level.upper()}</code>")
+            return
+        
+        levels = "\n".join(
+            f"<emoji document_id=5251481573953405172>▪️</emoji> <code>{name}</code>: {level}"
+            for name, level in log.get_levels().items()
+        )
+        dropped = log.get_dropped()
+        dropped_str = ", ".join(f"{level} {count}" for level, count in dropped.items()) if dropped else "нет"
+        
+        await event.edit(f"""
+<emoji document_id=5370932688993656500>⚙️</emoji> <b>Логирование</b>
+
+{levels}
+
+<b>В очереди:</b> {log.get_queue_depth()}
+<b>Отброшено при переполнении:</b> {dropped_str}
+
+Используйте <code>{self.bot.command_prefix}config log</code> <code>&lt;логгер&gt; &lt;уровень&gt;</code> для изменения
+""")
+
     async def show_status(self, event):
         """Показать текущие настройки"""
         # Получаем настройки из базы данных
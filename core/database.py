@@ -28,6 +28,7 @@ class DatabaseManager:
         self.init_autoclean_db()
         self.init_modules_db()
         self.init_module_info_db()  # Новая таблица для информации о модулях
+        self.init_media_db()
     
     def get_db_path(self, db_name: str) -> str:
         """Получение полного пути к файлу базы данных"""
@@ -78,6 +79,41 @@ class DatabaseManager:
         
         return result
     
+    def execute_transaction(self, db_name: str, statements: List[Tuple[str, Union[tuple, List[tuple]]]]) -> bool:
+        """
+        Выполнение нескольких запросов в одной транзакции с одним commit
+        
+        Args:
+            db_name: Имя файла базы данных
+            statements: Список пар (запрос, параметры); если параметры - список кортежей,
+                        запрос выполняется через executemany
+        
+        Returns:
+            True при успешном выполнении
+        """
+        db_path = self.get_db_path(db_name)
+        
+        try:
+            conn = sqlite3.connect(db_path)
+            cursor = conn.cursor()
+            
+            for query, params in statements:
+                if isinstance(params, list):
+                    cursor.executemany(query, params)
+                else:
+                    cursor.execute(query, params)
+            
+            conn.commit()
+            return True
+        except sqlite3.Error as e:
+            logger.error(f"Ошибка выполнения транзакции к {db_name}: {str(e)}")
+            if 'conn' in locals():
+                conn.rollback()
+            raise e
+        finally:
+            if 'conn' in locals():
+                conn.close()
+    
     def init_config_db(self):
         """Инициализация базы данных конфигурации"""
         db_name = "config.db"
@@ -209,6 +245,75 @@ class DatabaseManager:
         
         return modules
     
+    @staticmethod
+    def _module_info_row(info: Dict) -> tuple:
+        """Строка таблицы module_info из словаря с информацией о модуле"""
+        return (
+            info['name'],
+            info.get('developer', '@BotHuekka'),
+            info.get('version', '1.0.0'),
+            info.get('description', ''),
+            json.dumps(info.get('commands', [])),
+            int(bool(info.get('is_stock', False)))
+        )
+    
+    def sync_module_info(self, modules: List[Dict], removed: List[str] = ()) -> bool:
+        """Upsert информации о модулях и удаление устаревших записей одной транзакцией"""
+        statements = []
+        
+        if modules:
+            statements.append((
+                """INSERT OR REPLACE INTO module_info 
+                   (name, developer, version, description, commands, is_stock) 
+                   VALUES (?, ?, ?, ?, ?, ?)""",
+                [self._module_info_row(info) for info in modules]
+            ))
+        
+        if removed:
+            statements.append((
+                "DELETE FROM module_info WHERE name = ?",
+                [(name,) for name in removed]
+            ))
+        
+        if not statements:
+            return True
+        
+        try:
+            return self.execute_transaction("module_info.db", statements)
+        except Exception as e:
+            logger.error(f"Ошибка синхронизации информации о модулях: {str(e)}")
+            return False
+    
+    def reconcile_module_info(self, modules: Dict[str, Dict]) -> Tuple[int, int]:
+        """
+        Сверка таблицы module_info с реестром загруженных модулей
+        
+        Args:
+            modules: Словарь {имя модуля: информация о модуле}
+        
+        Returns:
+            Кортеж (обновлено записей, удалено записей)
+        """
+        existing = {
+            row[0]: tuple(row)
+            for row in self.execute_query(
+                "module_info.db",
+                "SELECT name, developer, version, description, commands, is_stock FROM module_info",
+                fetchall=True
+            ) or []
+        }
+        
+        changed = [
+            info for name, info in modules.items()
+            if existing.get(name) != self._module_info_row(info)
+        ]
+        removed = [name for name in existing if name not in modules]
+        
+        if not self.sync_module_info(changed, removed):
+            return 0, 0
+        
+        return len(changed), len(removed)
+    
     def get_config_value(self, key: str, default: Any = None) -> Any:
         """Получение значения из глобальной конфигурации"""
         result = self.execute_query(
@@ -305,6 +410,16 @@ class DatabaseManager:
         
         return result[0] if result else "☺️"
     
+    def get_all_smiles(self) -> List[str]:
+        """Получение всех смайлов"""
+        results = self.execute_query(
+            "smiles.db",
+            "SELECT smile FROM smiles",
+            fetchall=True
+        )
+        
+        return [row[0] for row in results] if results else []
+    
     def add_smile(self, smile: str) -> bool:
         """Добавление нового смайла"""
         try:
@@ -459,6 +574,65 @@ class DatabaseManager:
             logger.error(f"Ошибка изменения состояния модуля {module_name}: {str(e)}")
             return False
 
+    def init_media_db(self):
+        """Инициализация базы данных загруженных файлов"""
+        db_name = "media.db"
+        
+        query = '''CREATE TABLE IF NOT EXISTS media_cache (
+            file_key TEXT PRIMARY KEY,
+            kind TEXT NOT NULL,
+            media_id INTEGER NOT NULL,
+            access_hash INTEGER NOT NULL,
+            file_reference BLOB NOT NULL,
+            chat_id INTEGER,
+            message_id INTEGER,
+            updated_at INTEGER DEFAULT (strftime('%s', 'now'))
+        )'''
+        
+        self.execute_query(db_name, query, commit=True)
+    
+    def get_media_handle(self, file_key: str) -> Optional[Dict]:
+        """Сохранённые id, access_hash и file_reference загруженного файла"""
+        result = self.execute_query(
+            "media.db",
+            "SELECT kind, media_id, access_hash, file_reference, chat_id, message_id FROM media_cache WHERE file_key = ?",
+            (file_key,),
+            fetchone=True
+        )
+        
+        return dict(result) if result else None
+    
+    def set_media_handle(self, file_key: str, kind: str, media_id: int, access_hash: int,
+                         file_reference: bytes, chat_id: int = None, message_id: int = None) -> bool:
+        """Сохранение ссылки на загруженный файл"""
+        try:
+            self.execute_query(
+                "media.db",
+                '''INSERT OR REPLACE INTO media_cache
+                   (file_key, kind, media_id, access_hash, file_reference, chat_id, message_id, updated_at)
+                   VALUES (?, ?, ?, ?, ?, ?, ?, strftime('%s', 'now'))''',
+                (file_key, kind, media_id, access_hash, file_reference, chat_id, message_id),
+                commit=True
+            )
+            return True
+        except Exception as e:
+            logger.error(f"Ошибка сохранения файла {file_key}: {str(e)}")
+            return False
+    
+    def delete_media_handle(self, file_key: str) -> bool:
+        """Удаление ссылки на загруженный файл"""
+        try:
+            self.execute_query(
+                "media.db",
+                "DELETE FROM media_cache WHERE file_key = ?",
+                (file_key,),
+                commit=True
+            )
+            return True
+        except Exception as e:
+            logger.error(f"Ошибка удаления файла {file_key}: {str(e)}")
+            return False
+
 db_manager = DatabaseManager()
 
 def setup(bot):
@@ -10,6 +10,8 @@ import subprocess
 import importlib
 import logging
 import asyncio
+import re
+from pathlib import Path
 from typing import List, Tuple
 from config import BotConfig
 
@@ -20,6 +22,22 @@ class DependencyInstaller:
         self.standard_libs = self.get_standard_libraries()
         self.package_mapping = BotConfig.PACKAGE_MAPPING
     
+        # Локальный кэш колёс, из которого повторные установки идут без сети
+        self.wheelhouse = Path(BotConfig.DEP_INSTALLER["wheelhouse_dir"])
+        self.pip_timeout = BotConfig.DEP_INSTALLER["pip_timeout"]
+        
+        # Строки вывода pip, по которым отслеживается прогресс
+        self.progress_patterns = [
+            (re.compile(r'^Collecting\s+([A-Za-z0-9_.\-]+)'), "collecting"),
+            (re.compile(r'^\s*Downloading\s+([A-Za-z0-9_.]+?)-\d'), "downloading"),
+            (re.compile(r'^\s*Using cached\s+([A-Za-z0-9_.]+?)-\d'), "cached"),
+            (re.compile(r'^Processing\s+\S*?([A-Za-z0-9_.]+?)-\d[^/]*\.whl'), "cached"),
+            (re.compile(r'^\s*Building wheel for\s+([A-Za-z0-9_.\-]+)'), "building"),
+            (re.compile(r'^Saved\s+\S*?([A-Za-z0-9_.]+?)-\d[^/]*\.whl'), "saved"),
+            (re.compile(r'^Installing collected packages:\s+(.+)$'), "installing"),
+        ]
+        self.failure_pattern = re.compile(r'No matching distribution found for ([A-Za-z0-9_.\-]+)')
+    
     def get_standard_libraries(self):
         """Получаем список стандартных библиотек Python"""
         try:
@@ -49,8 +67,6 @@ class DependencyInstaller:
             with open(file_path, 'r', encoding='utf-8') as f:
                 content = f.read()
             
-            import re
-            
             import_pattern = r'^\s*import\s+([a-zA-Z_][a-zA-Z0-9_]*(?:\s*,\s*[a-zA-Z_][a-zA-Z0-9_]*)*)'
             from_pattern = r'^\s*from\s+([a-zA-Z_][a-zA-Z0-9_]*(?:\.[a-zA-Z_][a-zA-Z0-9_]*)*)\s+import'
             
@@ -89,59 +105,163 @@ class DependencyInstaller:
         """Получает имя пакета в pip для импорта"""
         return self.package_mapping.get(import_name, import_name)
     
-    async def install_dependencies(self, file_path: str) -> Tuple[List[str], List[str]]:
+    def get_missing_packages(self, file_path: str) -> List[str]:
+        """Возвращает список pip-пакетов, которых не хватает модулю"""
+        packages = []
+        for import_name in sorted(self.extract_imports(file_path)):
+            if import_name in self.standard_libs or self.is_package_installed(import_name):
+                continue
+            
+            package_name = self.get_pip_package_name(import_name)
+            if package_name not in packages:
+                packages.append(package_name)
+        
+        return packages
+    
+    def has_wheelhouse(self) -> bool:
+        """Проверяет, есть ли в локальном кэше хотя бы одно колесо"""
+        return self.wheelhouse.exists() and any(self.wheelhouse.glob("*.whl"))
+    
+    def _parse_pip_line(self, line: str):
+        """Извлекает (пакет, стадия) из строки вывода pip"""
+        for pattern, stage in self.progress_patterns:
+            match = pattern.match(line)
+            if match:
+                return match.group(1), stage
+        return None
+    
+    async def _run_pip(self, args: List[str], progress_callback=None) -> Tuple[int, str]:
+        """
+        Запускает pip с указанными аргументами
+        Возвращает кортеж (код_возврата, вывод)
+        """
+        process = await asyncio.create_subprocess_exec(
+            sys.executable, '-m', 'pip', *args,
+            '--disable-pip-version-check', '--progress-bar', 'off',
+            stdout=asyncio.subprocess.PIPE,
+            stderr=asyncio.subprocess.STDOUT
+        )
+        
+        output = []
+        
+        async def read_output():
+            async for raw_line in process.stdout:
+                line = raw_line.decode(errors='replace').rstrip()
+                output.append(line)
+                
+                if progress_callback:
+                    progress = self._parse_pip_line(line)
+                    if progress:
+                        try:
+                            progress_callback(*progress)
+                        except Exception as e:
+                            logger.debug(f"Ошибка обработчика прогресса pip: {str(e)}")
+        
+        try:
+            await asyncio.wait_for(read_output(), timeout=self.pip_timeout)
+        except asyncio.TimeoutError:
+            process.kill()
+            output.append(f"pip timed out after {self.pip_timeout} seconds")
+        
+        await process.wait()
+        return process.returncode, "\n".join(output)
+    
+    def _failed_packages(self, output: str, packages: List[str]) -> List[str]:
+        """Определяет по выводу pip, какие из пакетов не удалось разрешить"""
+        failed = set()
+        for match in self.failure_pattern.finditer(output):
+            failed.add(match.group(1).lower())
+        
+        return [package for package in packages if package.lower() in failed]
+    
+    def _error_text(self, output: str) -> str:
+        """Возвращает строки с ошибками из вывода pip"""
+        errors = [line for line in output.splitlines() if line.startswith("ERROR:")]
+        return "\n".join(errors) if errors else (output.strip().splitlines() or ["Неизвестная ошибка"])[-1]
+    
+    async def _install_batch(self, packages: List[str], progress_callback=None) -> Tuple[int, str]:
+        """Устанавливает пакеты одним вызовом pip, используя локальный кэш колёс"""
+        find_links = ['--find-links', str(self.wheelhouse)]
+        
+        # Сначала пробуем полностью офлайн-установку из кэша
+        if self.has_wheelhouse():
+            returncode, output = await self._run_pip(
+                ['install', '--no-index', *find_links, *packages], progress_callback
+            )
+            if returncode == 0:
+                logger.info(f"Пакеты установлены из локального кэша: {', '.join(packages)}")
+                return returncode, output
+            logger.debug("Офлайн-установка не удалась, обращаемся к индексу pip")
+        
+        # Докачиваем недостающие колёса в кэш (уже имеющиеся берутся из него же)
+        returncode, output = await self._run_pip(
+            ['wheel', '--wheel-dir', str(self.wheelhouse), *find_links, *packages], progress_callback
+        )
+        if returncode == 0:
+            returncode, output = await self._run_pip(
+                ['install', '--no-index', *find_links, *packages], progress_callback
+            )
+            if returncode == 0:
+                return returncode, output
+        elif self._failed_packages(output, packages):
+            # Пакет отсутствует в индексе - прямая установка тоже не поможет
+            return returncode, output
+        
+        # Кэш колёс не помог (например, нет прав или пакет только в sdist) - обычная установка
+        logger.warning("Не удалось установить пакеты через кэш колёс, выполняется прямая установка")
+        return await self._run_pip(['install', *find_links, *packages], progress_callback)
+    
+    async def install_dependencies(self, file_path: str, progress_callback=None) -> Tuple[List[str], List[str]]:
         """
-        Устанавливает зависимости для модуля
+        Устанавливает зависимости для модуля одним вызовом pip
+        progress_callback(package, stage) вызывается для каждой распознанной строки вывода pip
         Возвращает кортеж (установленные_пакеты, ошибки)
         """
-        imports = self.extract_imports(file_path)
         installed = []
         errors = []
         
-        # Проверяем, есть ли зависимости для установки
-        needs_installation = False
-        for import_name in imports:
-            if import_name not in self.standard_libs and not self.is_package_installed(import_name):
-                needs_installation = True
-                break
-        
-        if not needs_installation:
+        packages = self.get_missing_packages(file_path)
+        if not packages:
             return installed, errors  # Пустые списки - зависимости не требуются
         
-        for import_name in imports:
-            if import_name in self.standard_libs or self.is_package_installed(import_name):
-                continue
-            
-            package_name = self.get_pip_package_name(import_name)
+        self.wheelhouse.mkdir(parents=True, exist_ok=True)
             
-            try:
-                process = await asyncio.create_subprocess_exec(
-                    sys.executable, '-m', 'pip', 'install', package_name,
-                    stdout=asyncio.subprocess.PIPE,
-                    stderr=asyncio.subprocess.PIPE
-                )
+        try:
+            returncode, output = await self._install_batch(packages, progress_callback)
 
-                stdout, stderr = await process.communicate()
+            # Если часть пакетов не найдена, повторяем установку для остальных
+            if returncode != 0:
+                failed = self._failed_packages(output, packages)
+                remaining = [package for package in packages if package not in failed]
+                
+                for package in failed:
+                    errors.append(f"{package}: пакет не найден")
+                    logger.error(f"Ошибка установки {package}: пакет не найден")
                 
-                if process.returncode == 0:
-                    installed.append(package_name)
-                    logger.info(f"Установлен пакет: {package_name}")
-                else:
-                    error_msg = stderr.decode().strip() if stderr else "Неизвестная ошибка"
-                    errors.append(f"{package_name}: {error_msg}")
-                    logger.error(f"Ошибка установки {package_name}: {error_msg}")
+                if failed and remaining:
+                    returncode, output = await self._install_batch(remaining, progress_callback)
+                packages = remaining
             
-            except Exception as e:
-                error_msg = f"{package_name}: {str(e)}"
-                errors.append(error_msg)
-                logger.error(f"Исключение при установке {package_name}: {str(e)}")
+            if returncode == 0:
+                installed.extend(packages)
+                importlib.invalidate_caches()
+                logger.info(f"Установлены пакеты: {', '.join(packages)}")
+            elif packages:
+                error_msg = self._error_text(output)
+                errors.append(f"{', '.join(packages)}: {error_msg}")
+                logger.error(f"Ошибка установки {', '.join(packages)}: {error_msg}")
+            
+        except Exception as e:
+            error_msg = f"{', '.join(packages)}: {str(e)}"
+            errors.append(error_msg)
+            logger.error(f"Исключение при установке {', '.join(packages)}: {str(e)}")
         
         return installed, errors
 
 dependency_installer = DependencyInstaller()
 
-async def install_module_dependencies(file_path: str) -> Tuple[List[str], List[str]]:
-    return await dependency_installer.install_dependencies(file_path)
+async def install_module_dependencies(file_path: str, progress_callback=None) -> Tuple[List[str], List[str]]:
+    return await dependency_installer.install_dependencies(file_path, progress_callback)
 
 def setup(bot):
     bot.dependency_installer = dependency_installer
@@ -8,6 +8,7 @@ import logging
 import time
 from datetime import datetime
 from typing import List, Dict, Any, Union
+from core.templates import MessageTemplate, join
 
 logger = logging.getLogger("UserBot.Formatters")
 
@@ -88,6 +89,101 @@ class TextFormatters:
             return "\n".join([f"- {item}" for item in items])
         return "\n".join(items)
 
+# Шаблоны разбираются один раз при импорте, при отправке HTML уже не парсится
+ERROR_TEMPLATE = MessageTemplate("<emoji document_id=5240241223632954241>🚫</emoji> <b>Ошибка:</b> {message}")
+ERROR_DETAILS_TEMPLATE = MessageTemplate(
+    "<emoji document_id=5240241223632954241>🚫</emoji> <b>Ошибка:</b> {message}\n<code>{details}</code>"
+)
+WARNING_TEMPLATE = MessageTemplate("⚠️ <b>Внимание:</b> {message}")
+SUCCESS_TEMPLATE = MessageTemplate("<emoji document_id=5206607081334906820>✅</emoji> <b>Успех:</b> {message}")
+INFO_TEMPLATE = MessageTemplate("<emoji document_id=5422439311196834318>ℹ️</emoji> <b>Информация:</b> {message}")
+QUESTION_TEMPLATE = MessageTemplate("<emoji document_id=5436113877181941026>❓</emoji> <b>Вопрос:</b> {message}")
+TIP_TEMPLATE = MessageTemplate("<emoji document_id=5422439311196834318>💡</emoji> <b>Подсказка:</b> {message}")
+
+# Шаблоны карточек модулей: обычная и премиум-версия (с кастомными эмодзи)
+MODULE_INFO_TEMPLATES = {
+    False: MessageTemplate(
+        "<b>{name} (v{version})</b>\n"
+        "<i>{description}</i>\n"
+        "<b><i>{smile}</i></b>\n\n"
+        "{commands}"
+        "\n🫶 <b>Разработчик:</b> {developer}"
+    ),
+    True: MessageTemplate(
+        "<emoji document_id={title_emoji_id}>🕒</emoji> <b>{name} (v{version})</b>\n"
+        "<i>{description}</i>\n"
+        "<b><i>{smile}</i></b>\n\n"
+        "{commands}"
+        "\n<emoji document_id={developer_emoji_id}>🫶</emoji> <b>Разработчик:</b> {developer}"
+    )
+}
+LOADED_MESSAGE_TEMPLATES = {
+    False: MessageTemplate(
+        "<b>{name} загружен (v{version})</b>\n"
+        "{description}"
+        "<b><i>{smile}</i></b>\n\n"
+        "{commands}"
+        "\n🫶 <b>Разработчик:</b> {developer}"
+    ),
+    True: MessageTemplate(
+        "<emoji document_id={title_emoji_id}>🌘</emoji> <b>{name} загружен (v{version})</b>\n"
+        "{description}"
+        "<b><i>{smile}</i></b>\n\n"
+        "{commands}"
+        "\n<emoji document_id={developer_emoji_id}>🫶</emoji> <b>Разработчик:</b> {developer}"
+    )
+}
+DESCRIPTION_LINE_TEMPLATE = MessageTemplate("<i>{description}</i>\n")
+COMMAND_LINE_TEMPLATES = {
+    False: MessageTemplate("▫️ <code>{prefix}{command}</code> - <i>{description}</i>\n"),
+    True: MessageTemplate(
+        "<emoji document_id={command_emoji_id}>▫️</emoji> <code>{prefix}{command}</code> - <i>{description}</i>\n"
+    )
+}
+UNLOADED_MESSAGE_TEMPLATES = {
+    False: MessageTemplate(
+        "▪️<b>Модуль {name} успешно удален.</b>\n"
+        "<i>(Используйте <code>{prefix}help</code> для просмотра модулей и команд.)</i>"
+    ),
+    True: MessageTemplate(
+        "<emoji document_id={info_emoji_id}>▪️</emoji><b>Модуль {name} успешно удален.</b>\n"
+        "<i>(Используйте <code>{prefix}help</code> для просмотра модулей и команд.)</i>"
+    )
+}
+MODULE_LINE_TEMPLATES = {
+    False: MessageTemplate("▪️ <b>{name}</b>: ( {commands} )"),
+    True: MessageTemplate("<emoji document_id={command_emoji_id}>▪️</emoji> <b>{name}</b>: ( {commands} )")
+}
+COMMAND_CODE_TEMPLATE = MessageTemplate("<code>{prefix}{command}</code>")
+COMMAND_INFO_TEMPLATES = {
+    False: MessageTemplate(
+        "<b>Информация о команде:</b> <code>{prefix}{command}</code>\n\n"
+        "<b>Описание:</b> {description}\n"
+        "<b>Модуль:</b> {module}"
+    ),
+    True: MessageTemplate(
+        "<emoji document_id={command_emoji_id}>⚙️</emoji> <b>Информация о команде:</b> <code>{prefix}{command}</code>\n\n"
+        "<b>Описание:</b> {description}\n"
+        "<b>Модуль:</b> {module}"
+    )
+}
+MAIN_HELP_TEMPLATES = {
+    False: MessageTemplate(
+        "<b>Доступно модулей:</b> {total}\n"
+        "<i>Используйте <code>{prefix}help &lt;команда&gt;</code> для информации о команде</i>\n"
+        "<i>Или <code>{prefix}help &lt;модуль&gt;</code> для информации о модуле</i>\n\n"
+        "<b>Модули:</b>\n"
+        "{modules}"
+    ),
+    True: MessageTemplate(
+        "<emoji document_id={total_emoji_id}>🕒</emoji> <b>Доступно модулей:</b> {total}\n"
+        "<i>Используйте <code>{prefix}help &lt;команда&gt;</code> для информации о команде</i>\n"
+        "<i>Или <code>{prefix}help &lt;модуль&gt;</code> для информации о модуле</i>\n\n"
+        "<emoji document_id={section_emoji_id}>👁️</emoji> <b>Модули:</b>\n"
+        "{modules}"
+    )
+}
+
 class MessageFormatters:
     """Форматирование сообщений для различных ситуаций"""
     
@@ -95,108 +191,93 @@ class MessageFormatters:
     def error(message: str, details: str = "") -> str:
         """Форматирование сообщения об ошибке"""
         if details:
-            return f"<emoji document_id=5240241223632954241>🚫</emoji> <b>Ошибка:</b> {message}\n<code>{details}</code>"
-        return f"<emoji document_id=5240241223632954241>🚫</emoji> <b>Ошибка:</b> {message}"
+            return ERROR_DETAILS_TEMPLATE.render(message=message, details=details)
+        return ERROR_TEMPLATE.render(message=message)
     
     @staticmethod
     def warning(message: str) -> str:
         """Форматирование предупреждения"""
-        return f"⚠️ <b>Внимание:</b> {message}"
+        return WARNING_TEMPLATE.render(message=message)
     
     @staticmethod
     def success(message: str) -> str:
         """Форматирование успешного выполнения"""
-        return f"<emoji document_id=5206607081334906820>✅</emoji> <b>Успех:</b> {message}"
+        return SUCCESS_TEMPLATE.render(message=message)
     
     @staticmethod
     def info(message: str) -> str:
         """Форматирование информационного сообщения"""
-        return f"<emoji document_id=5422439311196834318>ℹ️</emoji> <b>Информация:</b> {message}"
+        return INFO_TEMPLATE.render(message=message)
     
     @staticmethod
     def question(message: str) -> str:
         """Форматирование вопроса"""
-        return f"<emoji document_id=5436113877181941026>❓</emoji> <b>Вопрос:</b> {message}"
+        return QUESTION_TEMPLATE.render(message=message)
     
     @staticmethod
     def tip(message: str) -> str:
         """Форматирование подсказки"""
-        return f"<emoji document_id=5422439311196834318>💡</emoji> <b>Подсказка:</b> {message}"
+        return TIP_TEMPLATE.render(message=message)
 
 class ModuleInfoFormatters:
     """Универсальные форматеры информации о модулях"""
     
+    @staticmethod
+    def format_commands(commands, is_premium, command_emoji_id, prefix):
+        """Форматирование списка команд модуля (каждая команда с новой строки)"""
+        template = COMMAND_LINE_TEMPLATES[bool(is_premium)]
+        return join(
+            template.render(
+                strip=False, command_emoji_id=command_emoji_id, prefix=prefix,
+                command=cmd['command'], description=cmd['description']
+            )
+            for cmd in commands
+        )
+    
     @staticmethod
     def format_module_info(module_info, is_premium, total_emoji_id, random_smile,
                           command_emoji_id, developer_emoji_id, prefix):
         """Форматирование информации о модуле (универсальный)"""
-        text = ""
-        if is_premium:
-            text += f"<emoji document_id={total_emoji_id}>🕒</emoji> "
-        text += f"<b>{module_info['name']} (v{module_info['version']})</b>\n"
-        text += f"<i>{module_info['description']}</i>\n"
-        text += f"<b><i>{random_smile}</i></b>\n\n" 
-                              
-        for cmd in module_info['commands']:
-            if is_premium:
-                text += f"<emoji document_id={command_emoji_id}>▫️</emoji> "
-            else:
-                text += "▫️ "
-            
-            text += f"<code>{prefix}{cmd['command']}</code> - <i>{cmd['description']}</i>\n"
-        
-        if is_premium:
-            text += f"\n<emoji document_id={developer_emoji_id}>🫶</emoji> "
-        else:
-            text += "\n🫶 "
-        text += f"<b>Разработчик:</b> {module_info['developer']}"
-        
-        return text
+        return MODULE_INFO_TEMPLATES[bool(is_premium)].render(
+            title_emoji_id=total_emoji_id,
+            developer_emoji_id=developer_emoji_id,
+            name=module_info['name'],
+            version=module_info['version'],
+            description=module_info['description'],
+            smile=random_smile,
+            commands=ModuleInfoFormatters.format_commands(
+                module_info['commands'], is_premium, command_emoji_id, prefix
+            ),
+            developer=module_info['developer']
+        )
 
     @staticmethod
     def format_loaded_message(module_info, is_premium, loaded_emoji_id, random_smile,
                              command_emoji_id, dev_emoji_id, prefix):
         """Форматирование сообщения о загруженном модуле (универсальный)"""
-        text = ""
-        if is_premium:
-            text += f"<emoji document_id={loaded_emoji_id}>🌘</emoji> "
-        text += f"<b>{module_info['name']} загружен (v{module_info['version']})</b>\n"
-        
+        description = ""
         if module_info['description']:
-            text += f"<i>{module_info['description']}</i>\n"
-            
-        text += f"<b><i>{random_smile}</i></b>\n\n"
+            description = DESCRIPTION_LINE_TEMPLATE.render(strip=False, description=module_info['description'])
         
-        for cmd in module_info['commands']:
-            if is_premium:
-                text += f"<emoji document_id={command_emoji_id}>▫️</emoji> "
-            else:
-                text += "▫️ "
-                
-            text += f"<code>{prefix}{cmd['command']}</code> - <i>{cmd['description']}</i>\n"
-        
-        text += "\n"
-        if is_premium:
-            text += f"<emoji document_id={dev_emoji_id}>🫶</emoji> "
-        else:
-            text += "🫶 "
-        text += f"<b>Разработчик:</b> {module_info['developer']}"
-        
-        return text
+        return LOADED_MESSAGE_TEMPLATES[bool(is_premium)].render(
+            title_emoji_id=loaded_emoji_id,
+            developer_emoji_id=dev_emoji_id,
+            name=module_info['name'],
+            version=module_info['version'],
+            description=description,
+            smile=random_smile,
+            commands=ModuleInfoFormatters.format_commands(
+                module_info['commands'], is_premium, command_emoji_id, prefix
+            ),
+            developer=module_info['developer']
+        )
 
     @staticmethod
     def format_unloaded_message(module_name, is_premium, info_emoji_id, prefix):
         """Форматирование сообщения об удалении модуля (универсальный)"""
-        text = ""
-        if is_premium:
-            text += f"<emoji document_id={info_emoji_id}>▪️</emoji>"
-        else:
-            text += "▪️"
-        
-        text += f"<b>Модуль {module_name} успешно удален.</b>\n"
-        text += f"<i>(Используйте <code>{prefix}help</code> для просмотра модулей и команд.)</i>"
-        
-        return text
+        return UNLOADED_MESSAGE_TEMPLATES[bool(is_premium)].render(
+            info_emoji_id=info_emoji_id, name=module_name, prefix=prefix
+        )
 
 class HelpFormatters:
     """Форматирование для help модуля"""
@@ -210,24 +291,40 @@ class HelpFormatters:
             command_emoji_id, developer_emoji_id, prefix
         )
 
+    @staticmethod
+    def format_module_line(module_info, is_premium, command_emoji_id, prefix):
+        """Форматирование строки модуля для главной справки"""
+        commands = join(
+            (COMMAND_CODE_TEMPLATE.render(strip=False, prefix=prefix, command=cmd["command"])
+             for cmd in module_info['commands']),
+            " | "
+        )
+        return MODULE_LINE_TEMPLATES[bool(is_premium)].render(
+            strip=False, command_emoji_id=command_emoji_id, name=module_info['name'], commands=commands
+        )
+    
+    @staticmethod
+    def format_command_info(command_info, is_premium, command_emoji_id, prefix):
+        """Форматирование информации о команде без данных о модуле"""
+        return COMMAND_INFO_TEMPLATES[bool(is_premium)].render(
+            command_emoji_id=command_emoji_id,
+            prefix=prefix,
+            command=command_info['command'],
+            description=command_info['description'],
+            module=command_info['module']
+        )
+    
     @staticmethod
     def format_main_help(total_modules, is_premium, total_emoji_id, section_emoji_id,
                         command_emoji_id, modules_list, prefix):
         """Форматирование главной справки (как в help.py)"""
-        reply = ""
-        
-        if is_premium:
-            reply += f"<emoji document_id={total_emoji_id}>🕒</emoji> "
-        reply += f"<b>Доступно модулей:</b> {total_modules}\n"
-        reply += f"<i>Используйте <code>{prefix}help &lt;команда&gt;</code> для информации о команде</i>\n"
-        reply += f"<i>Или <code>{prefix}help &lt;модуль&gt;</code> для информации о модуле</i>\n\n"
-        
-        if is_premium:
-            reply += f"<emoji document_id={section_emoji_id}>👁️</emoji> "
-        reply += "<b>Модули:</b>\n"
-        reply += "\n".join(modules_list)
-        
-        return reply
+        return MAIN_HELP_TEMPLATES[bool(is_premium)].render(
+            total_emoji_id=total_emoji_id,
+            section_emoji_id=section_emoji_id,
+            total=total_modules,
+            prefix=prefix,
+            modules=join(modules_list, "\n")
+        )
 
 class LoaderFormatters:
     """Форматирование для loader модуля"""
@@ -5,15 +5,20 @@
 # You can redistribute it and/or modify it under the terms of the MIT License
 # 🔑 https://opensource.org/licenses/MIT
 import logging
-import difflib
 import os
 import sys
+import random
 from telethon import events
 from config import BotConfig
 from core.formatters import help_format, msg
+from core.reply import edit_or_split
+from core.templates import substitute
 
 logger = logging.getLogger("UserBot.Help")
 
+# Метка на месте случайного смайла в закэшированных страницах
+SMILE_PLACEHOLDER = "\x00smile\x00"
+
 def get_module_info():
     return {
         "name": "Help",
@@ -39,6 +44,11 @@ class HelpModule:
         self.developer_emoji_id = BotConfig.EMOJI_IDS["dev"]
         self.command_emoji_id = BotConfig.EMOJI_IDS["command"]
         
+        self._render_cache = {}
+        self._render_state = None
+        self.render_cache_size = BotConfig.HELP["render_cache_size"]
+        self._smiles = []
+        
         bot.register_command(
             cmd=MODULE_INFO["commands"][0]["command"],
             handler=self.show_help,
@@ -47,7 +57,9 @@ class HelpModule:
         )
     
     def get_random_smile(self):
-        return self.bot.db.get_random_smile()
+        if not self._smiles:
+            self._smiles = self.bot.db.get_all_smiles() or ["☺️"]
+        return random.choice(self._smiles)
 
     async def get_module_info(self, module_name):
         # Сначала пытаемся получить информацию из базы данных
@@ -137,18 +149,26 @@ class HelpModule:
         }
 
     async def get_command_info(self, command_name):
-        normalized_cmd = command_name.lstrip(self.bot.command_prefix).lower()
+        cmd = self.bot.command_index.get(command_name.lstrip(self.bot.command_prefix))
         
-        for cmd, data in self.bot.commands.items():
-            if cmd.lower() == normalized_cmd:
-                return {
-                    "command": cmd,
-                    "description": data.get("description", "Без описания"),
-                    "module": data.get("module", "Неизвестный модуль")
-                }
+        if cmd and cmd in self.bot.commands:
+            data = self.bot.commands[cmd]
+            return {
+                "command": cmd,
+                "description": data.get("description", "Без описания"),
+                "module": data.get("module", "Неизвестный модуль")
+            }
         
         return None
 
+    def _get_render_cache(self):
+        """Кэш отрисованных страниц; сбрасывается при загрузке/выгрузке модулей и смене префикса"""
+        state = (self.bot.registry_version, self.bot.command_prefix)
+        if state != self._render_state or len(self._render_cache) > self.render_cache_size:
+            self._render_cache.clear()
+            self._render_state = state
+        return self._render_cache
+
     async def show_help(self, event):
         try:
             user = await event.get_sender()
@@ -157,77 +177,65 @@ class HelpModule:
             logger.error(f"Ошибка проверки премиум-статуса: {str(e)}")
             is_premium = False
         
-        prefix = self.bot.command_prefix
         args = event.text.split()
+        query = " ".join(args[1:]).strip() if len(args) > 1 else ""
+        
+        cache = self._get_render_cache()
+        key = (query.lower(), is_premium)
+        page = cache.get(key)
+        if page is None:
+            page = await self.render_page(query, is_premium, self.bot.command_prefix)
+            cache[key] = page
         
-        if len(args) > 1:
-            command_query = " ".join(args[1:]).strip()
+        if SMILE_PLACEHOLDER in page:
+            page = substitute(page, SMILE_PLACEHOLDER, self.get_random_smile())
+        
+        await edit_or_split(event, page)
             
-            command_info = await self.get_command_info(command_query)
+    async def render_page(self, query, is_premium, prefix):
+        """Отрисовка страницы справки (главной при пустом запросе)"""
+        if not query:
+            return self.render_main_page(is_premium, prefix)
+        
+        command_info = await self.get_command_info(query)
             
-            if command_info:
-                module_info = await self.get_module_info(command_info["module"])
+        if command_info:
+            module_info = await self.get_module_info(command_info["module"])
                 
-                if not module_info:
-                    text = ""
-                    if is_premium:
-                        text += f"<emoji document_id={self.command_emoji_id}>⚙️</emoji> "
-                    text += f"<b>Информация о команде:</b> <code>{prefix}{command_info['command']}</code>\n\n"
-                    text += f"<b>Описание:</b> {command_info['description']}\n"
-                    text += f"<b>Модуль:</b> {command_info['module']}"
+            if not module_info:
+                return help_format.format_command_info(command_info, is_premium, self.command_emoji_id, prefix)
                     
-                    await event.edit(text)
-                    return
+            return help_format.format_module_info(
+                module_info, is_premium, self.total_emoji_id, SMILE_PLACEHOLDER,
+                self.command_emoji_id, self.developer_emoji_id, prefix
+            )
                 
-                text = help_format.format_module_info(
-                    module_info, is_premium, self.total_emoji_id, self.get_random_smile(),
-                    self.command_emoji_id, self.developer_emoji_id, prefix
-                )
-                
-                await event.edit(text)
-                return
-            
-            module_query = command_query
-            normalized_query = module_query.lower()
-            
-            found_module = None
-            for name in self.bot.modules.keys():
-                if name.lower() == normalized_query:
-                    found_module = name
-                    break
-            
-            if not found_module:
-                closest = difflib.get_close_matches(
-                    normalized_query,
-                    [name.lower() for name in self.bot.modules.keys()],
-                    n=1,
-                    cutoff=0.3
-                )
-                if closest:
-                    for name in self.bot.modules.keys():
-                        if name.lower() == closest[0]:
-                            found_module = name
-                            break
+        found_module = self.bot.module_index.find(query, cutoff=0.3)
             
-            if found_module:
-                module_info = await self.get_module_info(found_module)
+        if found_module:
+            module_info = await self.get_module_info(found_module)
                 
-                if not module_info:
-                    await event.edit(f"<emoji document_id=5240241223632954241>🚫</emoji> <b>Информация о модуле</b> <code>{found_module}</code> недоступна")
-                    return
+            if not module_info:
+                return f"<emoji document_id=5240241223632954241>🚫</emoji> <b>Информация о модуле</b> <code>{found_module}</code> недоступна"
                 
-                text = help_format.format_module_info(
-                    module_info, is_premium, self.total_emoji_id, self.get_random_smile(),
-                    self.command_emoji_id, self.developer_emoji_id, prefix
-                )
+            return help_format.format_module_info(
+                module_info, is_premium, self.total_emoji_id, SMILE_PLACEHOLDER,
+                self.command_emoji_id, self.developer_emoji_id, prefix
+            )
                 
-                await event.edit(text)
-                return
-            else:
-                error_msg = msg.error(f"Команда или модуль <code>{command_query}</code> не найден")
-                await event.edit(error_msg)
-                return
+        suggestions = [
+            f"<code>{prefix}{name}</code>"
+            for name, _ in self.bot.command_index.suggest(query.lstrip(prefix), limit=3)
+        ]
+        if suggestions:
+            return msg.error(
+                f"Команда или модуль <code>{query}</code> не найден. "
+                f"Возможно, вы имели в виду: {', '.join(suggestions)}"
+            )
+        return msg.error(f"Команда или модуль <code>{query}</code> не найден")
 
+    def render_main_page(self, is_premium, prefix):
+        """Отрисовка главной страницы справки со списком модулей"""
         total_modules = len(self.bot.modules)
         
         # Получаем информацию о всех модулях из базы данных
@@ -238,21 +246,13 @@ class HelpModule:
             if module_info['name'] not in self.bot.modules:
                 continue
                 
-            commands_list = [f'<code>{prefix}{cmd["command"]}</code>' for cmd in module_info['commands']]
-            
-            if is_premium:
-                modules_list.append(f"<emoji document_id={self.command_emoji_id}>▪️</emoji> <b>{module_info['name']}</b>: ( {' | '.join(commands_list)} )")
-            else:
-                modules_list.append(f"▪️ <b>{module_info['name']}</b>: ( {' | '.join(commands_list)} )")
+            modules_list.append(help_format.format_module_line(module_info, is_premium, self.command_emoji_id, prefix))
         
-        # Исправленный вызов format_main_help - теперь передаем только один список модулей
-        reply = help_format.format_main_help(
+        return help_format.format_main_help(
             total_modules, is_premium, self.total_emoji_id, self.section_emoji_id,
             self.command_emoji_id, modules_list, prefix
         )
         
-        await event.edit(reply)
-
 def setup(bot):
     bot.set_module_description(MODULE_INFO["name"], MODULE_INFO["description"])
-    HelpModule(bot)
+    bot.help_module = HelpModule(bot)
@@ -107,7 +107,7 @@ class HuekkaModule:
             )
             
             await event.delete() 
-            await self.bot.client.send_file(
+            await self.bot.media.send_cached(
                 event.chat_id,
                 self.image_path,
                 caption=message_text,
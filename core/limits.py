@@ -0,0 +1,167 @@
+# ©️ nnnrodnoy, 2025
+# 💬 @nnnrodnoy
+# This file is part of Huekka
+# 🌐 https://github.com/nnnrodnoy/Huekka/
+# You can redistribute it and/or modify it under the terms of the MIT License
+# 🔑 https://opensource.org/licenses/MIT
+import asyncio
+import json
+import logging
+import os
+import time
+from pathlib import Path
+from config import BotConfig
+from core.formatters import text, msg
+
+logger = logging.getLogger("UserBot.Limits")
+
+def get_module_info():
+    return {
+        "name": "Limits",
+        "description": "Состояние и счётчики API Limiter",
+        "developer": "@BotHuekka",
+        "version": "1.0.0",
+        "commands": [
+            {
+                "command": "limits",
+                "description": "Показать счётчики лимитера (export - выгрузить в файл, reset - обнулить)"
+            }
+        ]
+    }
+
+MODULE_INFO = get_module_info()
+
+class LimitsModule:
+    def __init__(self, bot):
+        self.bot = bot
+        
+        limiter_config = BotConfig.API_LIMITER
+        self.metrics_file = Path(limiter_config.get("metrics_file", "logs/limiter_metrics.json"))
+        self.metrics_interval = limiter_config.get("metrics_interval", 0)
+        
+        bot.register_command(
+            cmd=MODULE_INFO["commands"][0]["command"],
+            handler=self.cmd_limits,
+            description=MODULE_INFO["commands"][0]["description"],
+            module_name=MODULE_INFO["name"]
+        )
+        
+        bot.set_module_description(MODULE_INFO["name"], MODULE_INFO["description"])
+        
+        self.export_task = None
+        if self.metrics_interval > 0:
+            self.export_task = asyncio.create_task(self.export_loop())
+    
+    @property
+    def limiter(self):
+        return getattr(self.bot, "apilimiter", None)
+    
+    def export_metrics(self):
+        """Атомарная запись снимка счётчиков в файл метрик"""
+        snapshot = self.limiter.get_stats()
+        snapshot["timestamp"] = time.time()
+        
+        self.metrics_file.parent.mkdir(parents=True, exist_ok=True)
+        temp_file = self.metrics_file.with_suffix(".tmp")
+        with open(temp_file, "w", encoding="utf-8") as f:
+            json.dump(snapshot, f, indent=2, ensure_ascii=False)
+        os.replace(temp_file, self.metrics_file)
+        return self.metrics_file
+    
+    async def export_loop(self):
+        """Периодическая выгрузка метрик"""
+        while True:
+            await asyncio.sleep(self.metrics_interval)
+            try:
+                if self.limiter:
+                    self.export_metrics()
+            except Exception as e:
+                logger.error(f"Ошибка выгрузки метрик лимитера: {str(e)}")
+    
+    async def stop(self):
+        """Остановка периодической выгрузки метрик"""
+        if self.export_task:
+            self.export_task.cancel()
+            try:
+                await self.export_task
+            except asyncio.CancelledError:
+                pass
+            self.export_task = None
+    
+    def format_limit(self, name, state, window):
+        """Строка состояния одного ограничения"""
+        line = f"<b>{name}:</b> {state['window']}/{state['limit']} за {window}"
+        if state["cooldown_left"]:
+            line += f" · <b>кулдаун</b> {text.format_time(state['cooldown_left'])}"
+        if state["waiting"]:
+            line += f" · ждут {state['waiting']}"
+        return line
+    
+    def format_wait(self, name, state):
+        """Строка ожидания кулдаунов одного ограничения"""
+        return (f"<emoji document_id=5251481573953405172>▪️</emoji> {name}: {state['cooldowns']} раз, "
+                f"ожидание {state['wait_total']:.1f} сек (макс. {state['wait_max']:.1f} сек)")
+    
+    def format_stats(self, stats):
+        """Отрисовка снимка счётчиков"""
+        speed = stats["speed"]
+        period = stats["period"]
+        
+        lines = [
+            "<emoji document_id=5370932688993656500>⚙️</emoji> <b>API Limiter</b>",
+            "",
+            self.format_limit("Скорость", speed, "1 сек"),
+            self.format_limit("Период", period, f"{period['duration']} сек"),
+            "",
+            "<b>Кулдауны:</b>",
+            self.format_wait("скорость", speed),
+            self.format_wait("период", period)
+        ]
+        
+        flood_total = sum(stats["flood_waits"].values())
+        lines.append("")
+        lines.append(f"<b>FLOOD_WAIT:</b> {flood_total} (всего {stats['flood_wait_seconds']} сек)")
+        if stats["last_flood_wait"]:
+            request_name, seconds, moment = stats["last_flood_wait"]
+            lines.append(f"<emoji document_id=5251481573953405172>▪️</emoji> последний: <code>{request_name}</code> "
+                         f"на {seconds} сек, {text.format_time(time.time() - moment)} назад")
+        
+        if stats["forbidden"]:
+            forbidden = ", ".join(f"<code>{name}</code> ×{count}" for name, count in sorted(stats["forbidden"].items()))
+            lines.append(f"<b>Заблокировано:</b> {forbidden}")
+        
+        if stats["requests"]:
+            lines.append("")
+            lines.append(f"<b>Запросы за {text.format_time(stats['uptime'])}:</b>")
+            for group, count in sorted(stats["requests"].items(), key=lambda item: -item[1])[:10]:
+                delayed = stats["delayed"].get(group, 0)
+                line = f"<emoji document_id=5251522431977291010>▪️</emoji> <code>{group}</code>: {count}"
+                if delayed:
+                    line += f" (ждали {delayed})"
+                lines.append(line)
+        
+        return "\n".join(lines)
+    
+    async def cmd_limits(self, event):
+        """Обработчик команды .limits [export|reset]"""
+        if not self.limiter:
+            await event.edit(msg.error("API Limiter не запущен"))
+            return
+        
+        args = event.text.split()
+        subcommand = args[1].lower() if len(args) > 1 else ""
+        
+        if subcommand == "export":
+            try:
+                path = self.export_metrics()
+                await event.edit(msg.success(f"Метрики сохранены в <code>{path}</code>"))
+            except Exception as e:
+                await event.edit(msg.error("Ошибка выгрузки метрик", str(e)))
+        elif subcommand == "reset":
+            self.limiter.reset_stats()
+            await event.edit(msg.success("Счётчики лимитера обнулены"))
+        else:
+            await event.edit(self.format_stats(self.limiter.get_stats()))
+
+def setup(bot):
+    bot.limits_module = LimitsModule(bot)
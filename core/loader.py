@@ -9,16 +9,16 @@ import sys
 import importlib
 import asyncio
 import logging
-import difflib
 from pathlib import Path
 from telethon import events, types
 from telethon.errors import MessageNotModifiedError
 import traceback
 import time
 import random
-import re
 from config import BotConfig
 from core.formatters import loader_format, msg
+from core.name_index import NameIndex
+from core.reply import edit_or_split
 
 logger = logging.getLogger("UserBot.Loader")
 
@@ -56,6 +56,11 @@ class LoaderModule:
         self.min_animation_time = BotConfig.LOADER["min_animation_time"]
         self.delete_delay = BotConfig.LOADER["delete_delay"]
         
+        # Индекс файлов папки modules, перестраивается только при её изменении
+        self.file_index = NameIndex()
+        self._module_files = {}
+        self._files_mtime = None
+        
         bot.register_command(
             cmd="lm",
             handler=self.load_module,
@@ -105,76 +110,41 @@ class LoaderModule:
             logger.error(f"Ошибка получения информации о пользователе: {str(e)}")
             return {"premium": False, "username": "unknown"}
 
-    def _camel_to_snake(self, name):
-        """Преобразует CamelCase в snake_case"""
-        name = re.sub('(.)([A-Z][a-z]+)', r'\1_\2', name)
-        return re.sub('([a-z0-9])([A-Z])', r'\1_\2', name).lower()
-
-    def _module_name_to_filename(self, module_name):
-        """Преобразует имя модуля в предполагаемое имя файла"""
-        variants = [
-            module_name.lower() + '.py',
-            self._camel_to_snake(module_name) + '.py',
-            module_name + '.py'
-        ]
-        return variants
-
     async def find_module_info(self, module_name):
-        normalized_query = module_name.lower().strip()
+        found_name = self.bot.module_index.find(module_name, cutoff=0.6)
         
-        if module_name in self.bot.modules:
-            return module_name, await self.get_module_info(module_name)
+        if found_name and found_name in self.bot.modules:
+            return found_name, await self.get_module_info(found_name)
         
-        for name in self.bot.modules.keys():
-            if name.lower() == normalized_query:
-                return name, await self.get_module_info(name)
-        
-        closest = difflib.get_close_matches(
-            normalized_query,
-            [name.lower() for name in self.bot.modules.keys()],
-            n=1,
-            cutoff=0.6
-        )
+        return None, None
         
-        if closest:
-            for name in self.bot.modules.keys():
-                if name.lower() == closest[0]:
-                    return name, await self.get_module_info(name)
+    def _refresh_file_index(self, modules_dir):
+        """Перестраивает индекс файлов модулей, если содержимое папки изменилось"""
+        mtime = modules_dir.stat().st_mtime_ns
+        if mtime == self._files_mtime:
+            return
         
-        return None, None
+        self._module_files = {
+            f.stem: f for f in modules_dir.iterdir() if f.is_file() and f.suffix == '.py'
+        }
+        self.file_index = NameIndex(self._module_files.keys())
+        self._files_mtime = mtime
 
     def find_module_file(self, query):
-        normalized_query = query.lower().strip().replace('.py', '')
         modules_dir = Path("modules").resolve()
         
         if not modules_dir.exists():
             logger.error(f"Директория модулей не найдена: {modules_dir}")
             return None
 
-        files = [f for f in modules_dir.iterdir() if f.is_file() and f.suffix == '.py']
+        self._refresh_file_index(modules_dir)
         
-        for file in files:
-            if file.stem.lower() == normalized_query:
-                return file
-
-        closest = difflib.get_close_matches(
-            normalized_query,
-            [f.stem.lower() for f in files],
-            n=1,
-            cutoff=0.7
-        )
-        
-        if closest:
-            for file in files:
-                if file.stem.lower() == closest[0]:
-                    return file
-        
-        snake_case_name = self._camel_to_snake(normalized_query)
-        for file in files:
-            if file.stem.lower() == snake_case_name:
-                return file
+        found_stem = self.file_index.find(query, cutoff=0.7)
+        return self._module_files.get(found_stem) if found_stem else None
         
-        return None
+    def suggest_modules(self, query, limit=3):
+        """Похожие имена загруженных модулей для подсказки при опечатке"""
+        return [name for name, _ in self.bot.module_index.suggest(query, limit=limit)]
 
     async def get_module_info(self, module_name):
         if module_name not in self.bot.modules:
@@ -219,13 +189,14 @@ class LoaderModule:
                 anim_task.cancel()
 
     async def _run_animation(self, event, message, is_premium, animation):
-        """Запускает анимацию"""
+        """Запускает анимацию (message может быть функцией, возвращающей текущий текст)"""
         i = 0
         try:
             while True:
                 frame = animation[i % len(animation)]
                 prefix = f"<emoji document_id={self.loader_emoji_id}>⌛️</emoji> " if is_premium else "⌛️ "
-                await event.edit(f"{prefix}{message} {frame}")
+                text = message() if callable(message) else message
+                await event.edit(f"{prefix}{text} {frame}")
                 i += 1
                 await asyncio.sleep(0.3)
         except MessageNotModifiedError:
@@ -238,8 +209,23 @@ class LoaderModule:
         if not hasattr(self.bot, 'dependency_installer'):
             return True
             
+        stages = {
+            "collecting": "поиск",
+            "downloading": "скачивание",
+            "cached": "из кэша",
+            "building": "сборка",
+            "saved": "сохранён в кэш",
+            "installing": "установка"
+        }
+        status = {"text": "Устанавливаю зависимости..."}
+        
+        def on_progress(package, stage):
+            status["text"] = f"Устанавливаю зависимости... <code>{package}</code> <i>({stages.get(stage, stage)})</i>"
+        
         async def install_deps():
-            installed, errors = await self.bot.dependency_installer.install_dependencies(module_file)
+            installed, errors = await self.bot.dependency_installer.install_dependencies(
+                module_file, progress_callback=on_progress
+            )
             
             if errors:
                 error_list = "\n".join([f"• {error}" for error in errors[:3]])
@@ -249,11 +235,11 @@ class LoaderModule:
             
         try:
             return await self.animate_loading_until_done(
-                event, "Устанавливаю зависимости...", is_premium, install_deps()
+                event, lambda: status["text"], is_premium, install_deps()
             )
         except Exception as e:
             logger.error(f"Ошибка установки зависимостей: {str(e)}")
-            await event.edit(f"<emoji document_id=5210952531676504517>❌</emoji> {str(e)}")
+            await edit_or_split(event, f"<emoji document_id=5210952531676504517>❌</emoji> {str(e)}")
             return False
 
     async def unload_existing_module(self, module_name):
@@ -268,34 +254,15 @@ class LoaderModule:
             
         logger.info(f"Выгружаем модуль {module_name}")
         
-        # Удаляем команды модуля
-        commands_to_remove = []
-        for cmd, data in self.bot.commands.items():
-            if data.get("module"):
-                if data.get("module").lower() == module_name.lower():
-                    commands_to_remove.append(cmd)
-        
-        logger.info(f"Найдены команды для удаления: {commands_to_remove}")
-        
-        for cmd in commands_to_remove:
-            del self.bot.commands[cmd]
-            logger.info(f"Команда {cmd} удалена")
+        # Удаляем команды модуля, его описание и записи индекса
+        removed_commands = self.bot.unregister_module(module_name)
+        logger.info(f"Удалены команды: {removed_commands}")
         
         # Удаляем модуль из sys.modules
         if module_name in sys.modules:
             del sys.modules[module_name]
             logger.info(f"Модуль {module_name} удален из sys.modules")
         
-        # Удаляем модуль из self.bot.modules
-        if module_name in self.bot.modules:
-            del self.bot.modules[module_name]
-            logger.info(f"Модуль {module_name} удален из self.bot.modules")
-        
-        # Удаляем описание модуля
-        if module_name in self.bot.module_descriptions:
-            del self.bot.module_descriptions[module_name]
-            logger.info(f"Описание модуля {module_name} удалено")
-        
         # Удаляем информацию о модуле из базы данных
         self.bot.db.delete_module_info(module_name)
         logger.info(f"Информация о модуле {module_name} удалена из БД")
@@ -392,29 +359,6 @@ class LoaderModule:
                 logger.info(f"Количество команд после загрузки: {len(after_commands)}")
                 logger.info(f"Новые команды: {new_commands}")
                 
-                # Полностью очищаем базу данных модулей
-                self.bot.db.execute_query(
-                    "module_info.db",
-                    "DELETE FROM module_info",
-                    commit=True
-                )
-                logger.info("База данных модулей полностью очищена")
-                
-                # Пересоздаем информацию о всех модулях
-                for name in self.bot.modules.keys():
-                    module_info = await self.get_module_info(name)
-                    if module_info:
-                        is_stock = name in self.bot.core_modules
-                        self.bot.db.set_module_info(
-                            module_info['name'],
-                            module_info['developer'],
-                            module_info['version'],
-                            module_info['description'],
-                            module_info['commands'],
-                            is_stock
-                        )
-                        logger.info(f"Информация о модуле {name} сохранена в БД")
-                
                 # Получаем информацию о текущем модуле
                 if hasattr(module, 'get_module_info'):
                     module_info = module.get_module_info()
@@ -432,6 +376,13 @@ class LoaderModule:
                     }
                     logger.info(f"Сформирована информация о модуле {module_name}: {module_info}")
                 
+                # Сохраняем в БД только загруженный модуль, остальные записи не трогаем
+                self.bot.db.sync_module_info([
+                    dict(module_info, is_stock=module_info['name'] in self.bot.core_modules)
+                ])
+                self.bot.bump_registry()
+                logger.info(f"Информация о модуле {module_info['name']} сохранена в БД")
+                
                 # Формируем сообщение о успешной загрузке
                 loaded_message = loader_format.format_loaded_message(
                     module_info, is_premium, self.loaded_emoji_id, 
@@ -448,7 +399,7 @@ class LoaderModule:
             )
             
             # Показываем результат
-            await event.edit(loaded_message)
+            await edit_or_split(event, loaded_message)
                 
         except Exception as e:
             error_trace = traceback.format_exc()
@@ -468,7 +419,7 @@ class LoaderModule:
                     pass
             
             error_msg = msg.error("Ошибка загрузка модуля", str(e))
-            await event.edit(error_msg)
+            await edit_or_split(event, error_msg)
         finally:
             try:
                 if temp_file.exists():
@@ -493,32 +444,26 @@ class LoaderModule:
         if not found_name:
             found_file = self.find_module_file(module_query)
             if found_file:
-                for loaded_name in self.bot.modules.keys():
-                    if loaded_name.lower() == found_file.stem.lower():
-                        found_name = loaded_name
-                        module_info = await self.get_module_info(found_name)
-                        break
+                found_name = self.bot.module_index.get(found_file.stem)
+                if found_name:
+                    module_info = await self.get_module_info(found_name)
                 else:
                     found_name = found_file.stem
 
                 module_path = found_file
 
         if not found_name:
-            error_msg = msg.error(f"Модуль <code>{module_query}</code> не найден")
+            suggestions = self.suggest_modules(module_query)
+            if suggestions:
+                names = ", ".join(f"<code>{name}</code>" for name in suggestions)
+                error_msg = msg.error(f"Модуль <code>{module_query}</code> не найден. Возможно, вы имели в виду: {names}")
+            else:
+                error_msg = msg.error(f"Модуль <code>{module_query}</code> не найден")
             await event.edit(error_msg)
             return
 
         if not module_path:
-            possible_filenames = self._module_name_to_filename(found_name)
-            modules_dir = Path("modules").resolve()
-            
-            for filename in possible_filenames:
-                possible_path = modules_dir / filename
-                if possible_path.exists():
-                    module_path = possible_path
-                    break
-            else:
-                module_path = self.find_module_file(found_name)
+            module_path = self.find_module_file(found_name)
 
         if not module_path or not module_path.exists():
             error_msg = msg.error(f"Файл модуля <code>{found_name}</code> не найден")
@@ -542,25 +487,13 @@ class LoaderModule:
             start_time = time.time()
             
             if found_name in self.bot.modules:
-                commands_to_remove = [
-                    cmd for cmd, data in self.bot.commands.items() 
-                    if data.get("module") and data.get("module").lower() == found_name.lower()
-                ]
-                
-                for cmd in commands_to_remove:
-                    del self.bot.commands[cmd]
+                self.bot.unregister_module(found_name)
             
             if found_name in sys.modules:
                 del sys.modules[found_name]
             
             os.remove(module_path)
             
-            if found_name in self.bot.modules:
-                del self.bot.modules[found_name]
-            
-            if found_name in self.bot.module_descriptions:
-                del self.bot.module_descriptions[found_name]
-            
             # Удаляем информацию о модуле из базы данных
             self.bot.db.delete_module_info(found_name)
             
@@ -589,7 +522,7 @@ class LoaderModule:
             error_trace = traceback.format_exc()
             logger.error(f"Ошибка выгрузки модуля: {str(e)}\n{error_trace}")
             error_msg = msg.error("Ошибка выгрузки модуля", str(e))
-            await event.edit(error_msg)
+            await edit_or_split(event, error_msg)
 
 def setup(bot):
     LoaderModule(bot)
@@ -4,12 +4,36 @@
 # 🌐 https://github.com/nnnrodnoy/Huekka/
 # You can redistribute it and/or modify it under the terms of the MIT License
 # 🔑 https://opensource.org/licenses/MIT
+import atexit
 import logging
 import os
-from logging.handlers import RotatingFileHandler
+import queue
+from collections import Counter
+from logging.handlers import QueueHandler, QueueListener, RotatingFileHandler
+from config import BotConfig
+
+# Запись в консоль и файл (с ротацией) идёт в отдельном потоке QueueListener,
+# цикл событий только кладёт готовую запись в очередь
+_listener = None
+_queue_handler = None
+
+class DroppingQueueHandler(QueueHandler):
+    """QueueHandler с ограниченной очередью: при переполнении запись отбрасывается, а не блокирует поток"""
+    
+    def __init__(self, log_queue):
+        super().__init__(log_queue)
+        self.dropped = Counter()  # уровень -> отброшенные записи
+    
+    def enqueue(self, record):
+        try:
+            self.queue.put_nowait(record)
+        except queue.Full:
+            self.dropped[record.levelname] += 1
 
 def setup_logging():
     """Настраивает систему логирования"""
+    global _listener, _queue_handler
+    
     log_dir = "logs"
     os.makedirs(log_dir, exist_ok=True)
     
@@ -19,10 +43,12 @@ def setup_logging():
     logger = logging.getLogger()
     logger.setLevel(logging.INFO)
     
+    if _listener is not None:
+        return logger
+    
     console_handler = logging.StreamHandler()
     console_handler.setFormatter(formatter)
     console_handler.setLevel(logging.WARNING)
-    logger.addHandler(console_handler)
     
     file_handler = RotatingFileHandler(
         os.path.join(log_dir, "userbot.log"),
@@ -30,9 +56,63 @@ def setup_logging():
         backupCount=3
     )
     file_handler.setFormatter(formatter)
-    logger.addHandler(file_handler)
+    
+    _queue_handler = DroppingQueueHandler(queue.Queue(BotConfig.LOGGING["queue_size"]))
+    logger.addHandler(_queue_handler)
+    
+    _listener = QueueListener(_queue_handler.queue, console_handler, file_handler, respect_handler_level=True)
+    _listener.start()
+    atexit.register(stop_logging)
     
     httpx_logger = logging.getLogger("httpx")
     httpx_logger.setLevel(logging.WARNING)
     
+    for name, level in BotConfig.LOGGING["levels"].items():
+        logging.getLogger(name).setLevel(level)
+    
     return logger
+
+def stop_logging():
+    """
+    Дописывает очередь и останавливает поток записи.
+    Вызывается перед os.execl: atexit при замене процесса не срабатывает
+    """
+    global _listener
+    if _listener is not None:
+        _listener.stop()
+        _listener = None
+
+def get_dropped():
+    """Число отброшенных из-за переполнения очереди записей по уровням"""
+    return dict(_queue_handler.dropped) if _queue_handler else {}
+
+def get_queue_depth():
+    """Сколько записей ждут записи прямо сейчас"""
+    return _queue_handler.queue.qsize() if _queue_handler else 0
+
+def set_level(name, level):
+    """
+    Уровень логгера во время работы
+    
+    Args:
+        name: имя логгера ("UserBot.Loader") или "root"
+        level: имя уровня (DEBUG, INFO, WARNING, ERROR, CRITICAL) или NOTSET для наследования
+    
+    Returns:
+        Числовой уровень или None, если имя уровня неизвестно
+    """
+    level = level.upper()
+    if level != "NOTSET" and not isinstance(logging.getLevelName(level), int):
+        return None
+    
+    logger = logging.getLogger(None if name == "root" else name)
+    logger.setLevel(level)
+    return logger.level
+
+def get_levels():
+    """Логгеры с явно заданным уровнем"""
+    levels = {"root": logging.getLevelName(logging.getLogger().level)}
+    for name, logger in sorted(logging.Logger.manager.loggerDict.items()):
+        if isinstance(logger, logging.Logger) and logger.level:
+            levels[name] = logging.getLevelName(logger.level)
+    return levels
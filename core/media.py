@@ -0,0 +1,201 @@
+# ©️ nnnrodnoy, 2025
+# 💬 @nnnrodnoy
+# This file is part of Huekka
+# 🌐 https://github.com/nnnrodnoy/Huekka/
+# You can redistribute it and/or modify it under the terms of the MIT License
+# 🔑 https://opensource.org/licenses/MIT
+import asyncio
+import hashlib
+import logging
+import os
+from collections import Counter
+from telethon import errors
+from telethon.tl.types import InputPhoto, InputDocument
+
+logger = logging.getLogger("UserBot.Media")
+
+# Ответы Telegram, после которых сохранённая ссылка на файл больше не годится
+STALE_HANDLE_ERRORS = (
+    errors.FileReferenceInvalidError,
+    errors.FileReferenceEmptyError,
+    errors.MediaEmptyError
+)
+
+class MediaCache:
+    """
+    Повторная отправка файлов без повторной загрузки
+    
+    После первой отправки id, access_hash и file_reference фото или документа
+    сохраняются в media.db под sha256 содержимого файла; следующие отправки
+    передают Telegram только ссылку. Устаревший file_reference обновляется
+    по последнему сообщению с этим файлом, а если его уже нет - файл загружается заново
+    """
+    
+    def __init__(self, bot):
+        self.bot = bot
+        self._digests = {}     # путь -> (размер, mtime_ns, sha256)
+        self._handles = {}     # ключ файла -> запись media.db
+        self._uploads = {}     # ключ файла -> asyncio.Lock первой загрузки
+        self.stats = Counter() # hits / uploads / refreshes
+    
+    def _cached_digest(self, path):
+        """sha256 из памяти, если размер и mtime файла не менялись"""
+        stat = os.stat(path)
+        cached = self._digests.get(path)
+        if cached and cached[:2] == (stat.st_size, stat.st_mtime_ns):
+            return cached[2]
+        return None
+    
+    def _digest(self, path):
+        """sha256 файла по кускам в 1 МБ"""
+        stat = os.stat(path)
+        digest = hashlib.sha256()
+        with open(path, 'rb') as f:
+            for chunk in iter(lambda: f.read(1024 * 1024), b''):
+                digest.update(chunk)
+        
+        self._digests[path] = (stat.st_size, stat.st_mtime_ns, digest.hexdigest())
+        return self._digests[path][2]
+    
+    async def file_key(self, path, force_document=False):
+        """Ключ файла в media.db: одно содержимое, отправленное как фото и как документ, - разные файлы"""
+        path = os.path.abspath(path)
+        digest = self._cached_digest(path) or await asyncio.to_thread(self._digest, path)
+        return f"{digest}:{'document' if force_document else 'auto'}"
+    
+    def get_handle(self, key):
+        if key not in self._handles:
+            self._handles[key] = self.bot.db.get_media_handle(key)
+        return self._handles[key]
+    
+    def forget(self, key):
+        """Убирает ссылку на файл; следующая отправка загрузит его заново"""
+        self._handles[key] = None
+        self.bot.db.delete_media_handle(key)
+    
+    def remember(self, key, message):
+        """Сохраняет ссылку на фото или документ из отправленного сообщения"""
+        media = message.photo or message.document if message else None
+        if media is None:
+            return None
+        
+        handle = {
+            "kind": "photo" if message.photo else "document",
+            "media_id": media.id,
+            "access_hash": media.access_hash,
+            "file_reference": media.file_reference,
+            "chat_id": message.chat_id,
+            "message_id": message.id
+        }
+        self._handles[key] = handle
+        self.bot.db.set_media_handle(key, **handle)
+        return handle
+    
+    @staticmethod
+    def to_input(handle):
+        input_type = InputPhoto if handle["kind"] == "photo" else InputDocument
+        return input_type(
+            id=handle["media_id"],
+            access_hash=handle["access_hash"],
+            file_reference=handle["file_reference"]
+        )
+    
+    async def refresh(self, key, handle):
+        """
+        Свежий file_reference из последнего сообщения с файлом
+        
+        Returns:
+            Обновлённая запись или None, если сообщение недоступно или файл в нём другой
+        """
+        if not handle.get("message_id"):
+            return None
+        
+        try:
+            message = await self.bot.client.get_messages(handle["chat_id"], ids=handle["message_id"])
+        except (ValueError, errors.RPCError) as e:
+            logger.debug(f"Не удалось получить сообщение с файлом {key}: {str(e)}")
+            return None
+        
+        media = message.photo or message.document if message else None
+        if media is None or media.id != handle["media_id"]:
+            return None
+        
+        handle = dict(handle, file_reference=media.file_reference)
+        self._handles[key] = handle
+        self.bot.db.set_media_handle(key, **handle)
+        self.stats["refreshes"] += 1
+        return handle
+    
+    async def _send_handle(self, key, entity, handle, kwargs):
+        """Отправка по сохранённой ссылке; None, если ссылку восстановить не удалось"""
+        try:
+            return await self.bot.client.send_file(entity, self.to_input(handle), **kwargs)
+        except errors.FileReferenceExpiredError:
+            handle = await self.refresh(key, handle)
+        except STALE_HANDLE_ERRORS as e:
+            logger.info(f"Ссылка на файл {key} недействительна ({e.__class__.__name__}), загружаю заново")
+            handle = None
+        
+        if handle is not None:
+            try:
+                return await self.bot.client.send_file(entity, self.to_input(handle), **kwargs)
+            except (errors.FileReferenceExpiredError,) + STALE_HANDLE_ERRORS:
+                pass
+        
+        self.forget(key)
+        return None
+    
+    async def send_cached(self, entity, file, force_document=False, **kwargs):
+        """
+        Отправляет локальный файл, загружая его в Telegram только в первый раз
+        
+        Args:
+            entity: чат
+            file: путь к файлу
+            force_document: отправить как документ (хранится отдельно от фото)
+            **kwargs: остальные аргументы client.send_file (caption, reply_to, ...)
+        
+        Returns:
+            Отправленное сообщение
+        """
+        path = os.path.abspath(file)
+        key = await self.file_key(path, force_document)
+        
+        message = await self._send_existing(key, entity, kwargs)
+        if message is not None:
+            return message
+        
+        # Одновременные первые отправки одного файла ждут одну загрузку
+        async with self._uploads.setdefault(key, asyncio.Lock()):
+            message = await self._send_existing(key, entity, kwargs)
+            if message is not None:
+                return message
+            
+            message = await self.bot.client.send_file(entity, path, force_document=force_document, **kwargs)
+            self.stats["uploads"] += 1
+            if self.remember(key, message) is None:
+                logger.debug(f"В ответе на отправку {path} нет фото или документа, ссылка не сохранена")
+            return message
+    
+    async def _send_existing(self, key, entity, kwargs):
+        """Отправка по ссылке из памяти или media.db; None, если ссылки нет"""
+        handle = self.get_handle(key)
+        if handle is None:
+            return None
+        
+        message = await self._send_handle(key, entity, handle, kwargs)
+        if message is not None:
+            self.stats["hits"] += 1
+            self._remember_message(key, message)
+        return message
+    
+    def _remember_message(self, key, message):
+        """
+        Последнее сообщение с файлом - источник свежего file_reference
+        Запоминается только в памяти, чтобы отправка по ссылке не писала в базу
+        """
+        handle = self._handles.get(key)
+        if handle is None or not message or handle.get("message_id") == message.id:
+            return
+        handle["chat_id"] = message.chat_id
+        handle["message_id"] = message.id
@@ -0,0 +1,137 @@
+# ©️ nnnrodnoy, 2025
+# 💬 @nnnrodnoy
+# This file is part of Huekka
+# 🌐 https://github.com/nnnrodnoy/Huekka/
+# You can redistribute it and/or modify it under the terms of the MIT License
+# 🔑 https://opensource.org/licenses/MIT
+import re
+from typing import List, Optional, Tuple
+
+_SEPARATORS = re.compile(r'[\s_\-.]+')
+
+class NameIndex:
+    """Индекс имён модулей и команд с точным, регистронезависимым и нечётким поиском"""
+    
+    def __init__(self, names=None):
+        self._names = {}
+        self._lower = {}
+        self._normalized = {}
+        self._trigrams = {}
+        self._name_trigrams = {}
+        
+        for name in names or ():
+            self.add(name)
+    
+    @staticmethod
+    def normalize(name: str) -> str:
+        """Приводит имя к виду без регистра, расширения .py и разделителей (UserInfo == user_info)"""
+        name = name.strip()
+        if name.lower().endswith('.py'):
+            name = name[:-3]
+        return _SEPARATORS.sub('', name.lower())
+    
+    @staticmethod
+    def trigrams(key: str) -> frozenset:
+        """Разбивает нормализованное имя на триграммы"""
+        padded = f"  {key} "
+        return frozenset(padded[i:i + 3] for i in range(len(padded) - 2))
+    
+    def __contains__(self, name) -> bool:
+        return name in self._names
+    
+    def __len__(self) -> int:
+        return len(self._names)
+    
+    def __iter__(self):
+        return iter(self._names)
+    
+    def add(self, name: str):
+        """Добавление имени в индекс"""
+        if name in self._names:
+            return
+        
+        self._names[name] = name
+        self._lower.setdefault(name.lower(), []).append(name)
+        
+        key = self.normalize(name)
+        self._normalized.setdefault(key, []).append(name)
+        
+        grams = self.trigrams(key)
+        self._name_trigrams[name] = grams
+        for gram in grams:
+            self._trigrams.setdefault(gram, set()).add(name)
+    
+    def remove(self, name: str):
+        """Удаление имени из индекса"""
+        if name not in self._names:
+            return
+        
+        del self._names[name]
+        self._discard(self._lower, name.lower(), name)
+        self._discard(self._normalized, self.normalize(name), name)
+        
+        for gram in self._name_trigrams.pop(name, ()):
+            names = self._trigrams.get(gram)
+            if names is not None:
+                names.discard(name)
+                if not names:
+                    del self._trigrams[gram]
+    
+    def clear(self):
+        """Очистка индекса"""
+        self._names.clear()
+        self._lower.clear()
+        self._normalized.clear()
+        self._trigrams.clear()
+        self._name_trigrams.clear()
+    
+    @staticmethod
+    def _discard(mapping, key, name):
+        names = mapping.get(key)
+        if names and name in names:
+            names.remove(name)
+            if not names:
+                del mapping[key]
+    
+    def get(self, query: str) -> Optional[str]:
+        """Точный поиск: по имени, без учёта регистра, без учёта snake/camel-записи"""
+        if not query:
+            return None
+        
+        if query in self._names:
+            return query
+        
+        query = query.strip()
+        names = self._lower.get(query.lower()) or self._normalized.get(self.normalize(query))
+        return names[0] if names else None
+    
+    def suggest(self, query: str, limit: int = 5, cutoff: float = 0.3) -> List[Tuple[str, float]]:
+        """Ранжированный список похожих имён (name, score) по коэффициенту Дайса на триграммах"""
+        key = self.normalize(query or "")
+        if not key:
+            return []
+        
+        query_grams = self.trigrams(key)
+        matches = {}
+        for gram in query_grams:
+            for name in self._trigrams.get(gram, ()):
+                matches[name] = matches.get(name, 0) + 1
+        
+        ranked = []
+        total = len(query_grams)
+        for name, common in matches.items():
+            score = 2.0 * common / (total + len(self._name_trigrams[name]))
+            if score >= cutoff:
+                ranked.append((name, score))
+        
+        ranked.sort(key=lambda item: (-item[1], item[0]))
+        return ranked[:limit]
+    
+    def find(self, query: str, cutoff: float = 0.3) -> Optional[str]:
+        """Точный поиск, а при неудаче - наиболее похожее имя"""
+        name = self.get(query)
+        if name is not None:
+            return name
+        
+        suggestions = self.suggest(query, limit=1, cutoff=cutoff)
+        return suggestions[0][0] if suggestions else None
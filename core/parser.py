@@ -6,53 +6,206 @@
 # 🔑 https://opensource.org/licenses/MIT
 import logging
 import re
+from bisect import bisect_right
+from collections import OrderedDict
 from telethon import types
 from telethon.extensions import html
+from telethon.helpers import del_surrogate, strip_text
 from telethon.errors.rpcerrorlist import MessageNotModifiedError
+from config import BotConfig
 
 logger = logging.getLogger("UserBot.Parser")
 
-class CustomHtmlParser:
-    """Чистый HTML парсер с поддержкой кастомных эмодзи и спойлеров"""
+# Маркер кастомного эмодзи: <emoji document_id=5370932688993656500>🌕</emoji>
+EMOJI_MARKER_PATTERN = re.compile(
+    r'<emoji\s+document_id\s*=\s*["\']?(\d+)["\']?\s*>(.*?)</emoji>',
+    flags=re.DOTALL
+)
+
+# Символы вне BMP: в UTF-16 (и в смещениях Telegram) занимают две единицы
+_ASTRAL_PATTERN = re.compile('[\U00010000-\U0010FFFF]')
+
+def _surrogate_pair(match):
+    code = ord(match.group()) - 0x10000
+    return chr(0xD800 + (code >> 10)) + chr(0xDC00 + (code & 0x3FF))
+
+def add_surrogate(text):
+    """
+    То же, что telethon.helpers.add_surrogate, но без посимвольного генератора:
+    строки без символов вне BMP возвращаются как есть
+    """
+    return _ASTRAL_PATTERN.sub(_surrogate_pair, text)
+
+def _clone_entity(entity):
+    """Быстрая поверхностная копия сущности (в несколько раз дешевле copy.copy)"""
+    clone = entity.__class__.__new__(entity.__class__)
+    clone.__dict__.update(entity.__dict__)
+    return clone
+
+def shift_entities(entities, replacements):
+    """
+    Сдвигает сущности после замены отрезков текста
+    replacements - отсортированный список (начало, конец, новая_длина) в UTF-16 единицах
+    """
+    ends = []
+    deltas = []
+    delta = 0
+    for start, end, length in replacements:
+        delta += length - (end - start)
+        ends.append(end)
+        deltas.append(delta)
     
-    def __init__(self):
-        pass
+    def shift(position):
+        index = bisect_right(ends, position)
+        return position + (deltas[index - 1] if index else 0)
+    
+    shifted = []
+    for entity in entities:
+        clone = _clone_entity(entity)
+        clone.offset = shift(entity.offset)
+        clone.length = shift(entity.offset + entity.length) - clone.offset
+        shifted.append(clone)
+    
+    return shifted
 
-    def parse(self, text):
-        """Парсинг HTML текста в текст и сущности"""
-        # Сначала преобразуем все специальные маркеры в HTML формат
-        text = self._convert_emoji_markers_to_html(text)
-        
-        # Используем стандартный HTML парсер Telethon
-        text, entities = html.parse(text)
-        new_entities = []
-        
-        for entity in entities:
-            if isinstance(entity, types.MessageEntityTextUrl):
-                if entity.url == 'spoiler':
-                    # Преобразуем <a href="spoiler">Text</a> в сущность спойлера
-                    new_entities.append(types.MessageEntitySpoiler(
-                        offset=entity.offset,
-                        length=entity.length
-                    ))
-                elif entity.url.startswith('emoji/'):
-                    try:
-                        # Преобразуем <a href="emoji/ID">Text</a> в сущность кастомного эмодзи
-                        emoji_id = int(entity.url.split('/')[1])
-                        new_entities.append(types.MessageEntityCustomEmoji(
-                            offset=entity.offset,
-                            length=entity.length,
-                            document_id=emoji_id
-                        ))
-                    except (ValueError, IndexError):
-                        logger.warning(f"Невалидный ID эмодзи: {entity.url}")
-                        new_entities.append(entity)
-                else:
-                    new_entities.append(entity)
+class PreparsedText(str):
+    """
+    HTML-строка, для которой уже известны итоговый текст и сущности.
+    Ведёт себя как обычная строка, но CustomHtmlParser не разбирает её повторно
+    """
+    
+    def __new__(cls, html_text, text, entities, surrogate_text=None):
+        obj = super().__new__(cls, html_text)
+        obj.text = text
+        obj.entities = tuple(entities)
+        # Текст в UTF-16 представлении, чтобы вложенные шаблоны не пересчитывали его
+        obj.surrogate_text = add_surrogate(text) if surrogate_text is None else surrogate_text
+        return obj
+
+class _HuekkaHTMLParser(html.HTMLToTelegramParser):
+    """
+    HTML-токенизатор Telethon, который сразу создаёт сущности кастомных эмодзи и спойлеров
+    из <emoji document_id=ID>, <a href="emoji/ID">, <a href="spoiler"> и <tg-spoiler>
+    """
+    
+    def _open_entity(self, tag, entity):
+        self._open_tags.appendleft(tag)
+        self._open_tags_meta.appendleft(None)
+        if tag not in self._building_entities:
+            self._building_entities[tag] = entity
+    
+    def handle_starttag(self, tag, attrs):
+        if tag == 'emoji':
+            try:
+                emoji_id = int(dict(attrs)['document_id'])
+            except (KeyError, ValueError, TypeError):
+                logger.warning(f"Невалидный маркер эмодзи: {self.get_starttag_text()}")
             else:
-                new_entities.append(entity)
+                self._open_entity(tag, types.MessageEntityCustomEmoji(
+                    offset=len(self.text), length=0, document_id=emoji_id
+                ))
+                return
+        
+        elif tag == 'tg-spoiler':
+            self._open_entity(tag, types.MessageEntitySpoiler(offset=len(self.text), length=0))
+            return
+        
+        elif tag == 'a':
+            url = dict(attrs).get('href') or ''
+            if url == 'spoiler':
+                # Преобразуем <a href="spoiler">Text</a> в сущность спойлера
+                self._open_entity(tag, types.MessageEntitySpoiler(offset=len(self.text), length=0))
+                return
+            if url.startswith('emoji/'):
+                try:
+                    # Преобразуем <a href="emoji/ID">Text</a> в сущность кастомного эмодзи
+                    emoji_id = int(url.split('/')[1])
+                except (ValueError, IndexError):
+                    logger.warning(f"Невалидный ID эмодзи: {url}")
+                else:
+                    self._open_entity(tag, types.MessageEntityCustomEmoji(
+                        offset=len(self.text), length=0, document_id=emoji_id
+                    ))
+                    return
+        
+        super().handle_starttag(tag, attrs)
+
+class CustomHtmlParser:
+    """Чистый HTML парсер с поддержкой кастомных эмодзи и спойлеров"""
                 
-        return text, new_entities
+    def __init__(self, cache_size=None):
+        # LRU-кэш результатов разбора: одни и те же строки ядро отправляет постоянно
+        self.cache_size = BotConfig.PARSER["parse_cache_size"] if cache_size is None else cache_size
+        self.cache_max_length = BotConfig.PARSER["parse_cache_max_length"]
+        self._cache = OrderedDict()
+    
+    def parse(self, text):
+        """Парсинг HTML текста в текст и сущности за один проход"""
+        if isinstance(text, PreparsedText):
+            # Готовые шаблоны (core.templates) уже содержат разобранные сущности
+            return text.text, [_clone_entity(entity) for entity in text.entities]
+        
+        if not text:
+            return text, []
+        
+        cached = self._cached(text)
+        if cached is not None:
+            return cached
+        
+        parser = _HuekkaHTMLParser()
+        parser.feed(add_surrogate(text))
+        parser.close()
+        
+        parsed_text = strip_text(parser.text, parser.entities)
+        parser.entities.reverse()
+        parser.entities.sort(key=lambda entity: entity.offset)
+        return self._store(text, text, del_surrogate(parsed_text), parser.entities)
+    
+    def parse_fragment(self, text):
+        """
+        Разбор фрагмента HTML без обрезки пробелов по краям
+        Возвращает текст в UTF-16 представлении (add_surrogate) и сущности
+        """
+        if isinstance(text, PreparsedText):
+            return text.surrogate_text, [_clone_entity(entity) for entity in text.entities]
+        
+        # Фрагменты кэшируются отдельно от целых сообщений
+        key = (text,)
+        cached = self._cached(key)
+        if cached is not None:
+            return cached
+        
+        parser = _HuekkaHTMLParser()
+        parser.feed(add_surrogate(text))
+        parser.close()
+        parser.entities.reverse()
+        parser.entities.sort(key=lambda entity: entity.offset)
+        return self._store(key, text, parser.text, parser.entities)
+    
+    def _cached(self, key):
+        """Результат из LRU-кэша (с копиями сущностей) или None"""
+        cached = self._cache.get(key)
+        if cached is None:
+            return None
+        
+        self._cache.move_to_end(key)
+        parsed_text, entities = cached
+        # Telethon изменяет список сущностей после разбора, поэтому отдаём копии
+        return parsed_text, [_clone_entity(entity) for entity in entities]
+    
+    def _store(self, key, text, parsed_text, entities):
+        """Сохранение результата разбора в LRU-кэш"""
+        if not self.cache_size or len(text) > self.cache_max_length:
+            return parsed_text, entities
+        
+        self._cache[key] = (parsed_text, tuple(entities))
+        if len(self._cache) > self.cache_size:
+            self._cache.popitem(last=False)
+        return parsed_text, [_clone_entity(entity) for entity in entities]
+    
+    def clear_cache(self):
+        """Очистка кэша результатов разбора"""
+        self._cache.clear()
 
     def unparse(self, text, entities):
         """Обратное преобразование сущностей в HTML"""
@@ -80,53 +233,92 @@ class CustomHtmlParser:
     def _convert_emoji_markers_to_html(self, text):
         """Преобразует специальные маркеры эмодзи в HTML формат"""
         # Преобразуем <emoji document_id=5370932688993656500>🌕</emoji> в <a href="emoji/5370932688993656500">🌕</a>
-        text = re.sub(
-            r'<emoji\s+document_id\s*=\s*["\']?(\d+)["\']?\s*>(.*?)</emoji>',
-            r'<a href="emoji/\1">\2</a>',
-            text,
-            flags=re.DOTALL
-        )
-        return text
+        return EMOJI_MARKER_PATTERN.sub(r'<a href="emoji/\1">\2</a>', text)
 
 class EmojiHandler:
     """Обработчик премиум-эмодзи для HTML"""
     
+    # Быстрая проверка перед регулярным выражением: обычные сообщения отсеиваются поиском подстроки
+    MARKER_PREFIX = '<emoji'
+    
     @staticmethod
-    async def process_message(event):
-        """Обработка всех исходящих сообщений с автоматическим преобразованием маркеров эмодзи"""
+    async def process_message(event, command_prefix='.'):
+        """Обработка исходящего сообщения с автоматическим преобразованием маркеров эмодзи"""
         try:
-            if not event.text:
-                return
+            raw_text = event.raw_text
+            if not raw_text or raw_text.startswith(command_prefix):
+                return False
                 
-            # Пропускаем команды (начинающиеся с префикса)
-            if event.text.startswith('.'):
-                return
+            if EmojiHandler.MARKER_PREFIX not in raw_text:
+                return False
                 
-            # Проверяем наличие специальных маркеров эмодзи
-            if '<emoji document_id=' in event.text:
-                # Преобразуем маркеры в HTML формат
-                new_text = EmojiHandler.convert_emoji_markers(event.text)
+            converted = EmojiHandler.convert_message(raw_text, event.message.entities)
+            if converted is None:
+                return False
                 
-                # Если текст изменился, редактируем сообщение
-                if new_text != event.text:
-                    await event.edit(new_text)
+            new_text, entities = converted
+            logger.debug("Преобразованы эмодзи-маркеры в сообщении %s", event.id)
+            await event.edit(new_text, formatting_entities=entities)
+            return True
                     
         except MessageNotModifiedError:
-            pass
+            return False
         except Exception as e:
             logger.error(f"Ошибка обработки эмодзи: {str(e)}", exc_info=True)
+            return False
+    
+    @staticmethod
+    def convert_message(text, entities=None):
+        """
+        Заменяет маркеры эмодзи в уже отправленном тексте на сущности кастомных эмодзи,
+        сохраняя остальное форматирование сообщения
+        
+        Returns:
+            Пара (текст, сущности) или None, если маркеров нет
+        """
+        text = add_surrogate(text)
+        
+        pieces = []
+        emoji_entities = []
+        replacements = []
+        last = 0
+        delta = 0
+        for match in EMOJI_MARKER_PATTERN.finditer(text):
+            start, end = match.span()
+            emoji_text = match.group(2)
+            
+            pieces.append(text[last:start])
+            pieces.append(emoji_text)
+            emoji_entities.append(types.MessageEntityCustomEmoji(
+                offset=start + delta, length=len(emoji_text), document_id=int(match.group(1))
+            ))
+            replacements.append((start, end, len(emoji_text)))
+            delta += len(emoji_text) - (end - start)
+            last = end
+        
+        if not replacements:
+            return None
+        
+        pieces.append(text[last:])
+        new_text = "".join(pieces)
+        
+        new_entities = [
+            entity for entity in shift_entities(entities or [], replacements) + emoji_entities
+            if entity.length > 0 and entity.offset + entity.length <= len(new_text)
+        ]
+        new_entities.sort(key=lambda entity: entity.offset)
+        return del_surrogate(new_text), new_entities
 
     @staticmethod
     def convert_emoji_markers(text):
         """Конвертирует маркеры эмодзи в HTML формат"""
-        # Используем тот же метод, что и в парсере
-        parser = CustomHtmlParser()
-        return parser._convert_emoji_markers_to_html(text)
+        # Преобразуем <emoji document_id=5370932688993656500>🌕</emoji> в <a href="emoji/5370932688993656500">🌕</a>
+        return EMOJI_MARKER_PATTERN.sub(r'<a href="emoji/\1">\2</a>', text)
 
     @staticmethod
     def has_emoji_markers(text):
         """Проверяет, содержит ли текст эмодзи-маркеры"""
-        return text and '<emoji document_id=' in text
+        return bool(text) and EmojiHandler.MARKER_PREFIX in text and EMOJI_MARKER_PATTERN.search(text) is not None
 
     @classmethod
     async def process_command_output(cls, text):
@@ -0,0 +1,144 @@
+# ©️ nnnrodnoy, 2025
+# 💬 @nnnrodnoy
+# This file is part of Huekka
+# 🌐 https://github.com/nnnrodnoy/Huekka/
+# You can redistribute it and/or modify it under the terms of the MIT License
+# 🔑 https://opensource.org/licenses/MIT
+import copy
+import logging
+from telethon import types
+from telethon.helpers import del_surrogate
+from config import BotConfig
+from core.parser import add_surrogate
+
+logger = logging.getLogger("UserBot.Reply")
+
+# Сущности, которые нельзя разрезать между сообщениями
+UNSPLITTABLE_ENTITIES = (
+    types.MessageEntityCustomEmoji,
+    types.MessageEntityTextUrl,
+    types.MessageEntityMentionName,
+    types.MessageEntityUrl,
+    types.MessageEntityMention,
+    types.MessageEntityEmail
+)
+
+# Запас под отметку страницы вида "\n\n[12/34]"
+PAGE_MARK_RESERVE = 16
+
+def _safe_cut(text, entities, start, end):
+    """Находит точку разреза не дальше end, не разрывающую строки, суррогатные пары и эмодзи"""
+    min_cut = start + (end - start) // 2
+    
+    cut = text.rfind('\n', min_cut, end)
+    if cut == -1:
+        cut = text.rfind(' ', min_cut, end)
+    if cut == -1:
+        cut = end
+    
+    # Не разрываем суррогатную пару (astral-символ занимает две UTF-16 единицы)
+    if '\udc00' <= text[cut] <= '\udfff':
+        cut -= 1
+    
+    moved = True
+    while moved:
+        moved = False
+        for entity in entities:
+            entity_end = entity.offset + entity.length
+            if isinstance(entity, UNSPLITTABLE_ENTITIES) and entity.offset < cut < entity_end:
+                cut = entity.offset if entity.offset > start else entity_end
+                moved = True
+    
+    return cut
+
+def _slice_entities(entities, start, end):
+    """Сущности, попадающие в отрезок [start, end), со сдвинутыми смещениями"""
+    sliced = []
+    for entity in entities:
+        entity_start = max(entity.offset, start)
+        entity_end = min(entity.offset + entity.length, end)
+        if entity_start >= entity_end:
+            continue
+        
+        part = copy.copy(entity)
+        part.offset = entity_start - start
+        part.length = entity_end - entity_start
+        sliced.append(part)
+    
+    return sliced
+
+def split_message(text, entities=None, limit=None):
+    """
+    Делит уже разобранный текст с сущностями на части не длиннее limit
+    (в UTF-16 единицах, как считает Telegram), не разрывая сущности вроде кастомных эмодзи
+    
+    Returns:
+        Список пар (текст, сущности)
+    """
+    limit = limit or BotConfig.PARSER["max_message_length"]
+    entities = entities or []
+    text = add_surrogate(text)
+    
+    if len(text) <= limit:
+        return [(del_surrogate(text), entities)]
+    
+    chunks = []
+    start = 0
+    total = len(text)
+    
+    while start < total:
+        end = min(start + limit, total)
+        if end < total:
+            end = _safe_cut(text, entities, start, end)
+        
+        chunks.append((del_surrogate(text[start:end]), _slice_entities(entities, start, end)))
+        
+        # Переносы строк на границе частей не нужны ни в одной из них
+        start = end
+        while start < total and text[start] in '\n ':
+            start += 1
+    
+    return chunks
+
+def parse_text(client, text):
+    """Разбор HTML один раз через parse_mode клиента (CustomHtmlParser)"""
+    parser = getattr(client, 'parse_mode', None)
+    if parser is None:
+        return text, []
+    return parser.parse(text)
+
+async def edit_or_split(event, text, limit=None, page_marks=True):
+    """
+    Редактирует сообщение, а если разобранный текст длиннее лимита Telegram,
+    оставляет в нём первую часть и отправляет остальные ответами по цепочке
+    
+    Returns:
+        Отредактированное сообщение (первая часть)
+    """
+    limit = limit or BotConfig.PARSER["max_message_length"]
+    parsed_text, entities = parse_text(event.client, text)
+    
+    if len(add_surrogate(parsed_text)) <= limit:
+        return await event.edit(parsed_text, formatting_entities=entities)
+    
+    chunks = split_message(parsed_text, entities, limit - PAGE_MARK_RESERVE if page_marks else limit)
+    total = len(chunks)
+    logger.debug(f"Длинный ответ разделён на {total} сообщений")
+    
+    if page_marks:
+        chunks = [(f"{chunk_text}\n\n[{i}/{total}]", chunk_entities)
+                  for i, (chunk_text, chunk_entities) in enumerate(chunks, 1)]
+    
+    first_text, first_entities = chunks[0]
+    first = await event.edit(first_text, formatting_entities=first_entities)
+    
+    previous = first if first is not None else event
+    for chunk_text, chunk_entities in chunks[1:]:
+        previous = await event.client.send_message(
+            event.chat_id,
+            chunk_text,
+            formatting_entities=chunk_entities,
+            reply_to=previous.id
+        )
+    
+    return first
@@ -0,0 +1,16 @@
+# ©️ nnnrodnoy, 2025
+# 💬 @nnnrodnoy
+# This file is part of Huekka
+# 🌐 https://github.com/nnnrodnoy/Huekka/
+# You can redistribute it and/or modify it under the terms of the MIT License
+# 🔑 https://opensource.org/licenses/MIT
+"""Хронология запуска из startup.py или заглушка, если его нет"""
+from types import SimpleNamespace
+
+try:
+    import startup
+except ImportError:
+    # startup.py мог не приехать при обновлении старым updater'ом (он копирует core/, но не новые
+    # системные файлы): замеры запуска просто отключены
+    _noop = lambda *args, **kwargs: None
+    startup = SimpleNamespace(mark=_noop, handoff=_noop, restart=_noop, finish=_noop)
@@ -16,6 +16,8 @@ from telethon import events
 from telethon.errors import MessageNotModifiedError
 from config import BotConfig
 from core.formatters import text, msg
+from core.log import stop_logging
+from core.startup_trace import startup
 
 logger = logging.getLogger("UserBot.System")
 
@@ -132,6 +134,10 @@ class SystemModule:
             
             await asyncio.sleep(1)
             
+            self.bot.apilimiter.save_state()
+            stop_logging()
+            startup.restart()
+            self.bot.handoff_session()
             os.execl(sys.executable, sys.executable, "main.py")
             
         except Exception as e:
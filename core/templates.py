@@ -0,0 +1,159 @@
+# ©️ nnnrodnoy, 2025
+# 💬 @nnnrodnoy
+# This file is part of Huekka
+# 🌐 https://github.com/nnnrodnoy/Huekka/
+# You can redistribute it and/or modify it under the terms of the MIT License
+# 🔑 https://opensource.org/licenses/MIT
+import logging
+import re
+from html import escape
+from telethon.helpers import del_surrogate, strip_text
+from core.parser import CustomHtmlParser, PreparsedText, _clone_entity, add_surrogate, shift_entities
+
+logger = logging.getLogger("UserBot.Templates")
+
+# Поля шаблона: {name}
+_FIELD_PATTERN = re.compile(r'\{(\w+)\}')
+# Теги HTML, внутри которых поля подставляются до разбора (например, document_id эмодзи)
+_TAG_PATTERN = re.compile(r'<[^>]*>')
+
+_parser = CustomHtmlParser()
+
+def _to_parts(value):
+    """Приводит значение поля к паре (текст в UTF-16 представлении, сущности)"""
+    if isinstance(value, PreparsedText):
+        return value.surrogate_text, [_clone_entity(entity) for entity in value.entities]
+    
+    value = str(value)
+    if '<' in value or '&' in value:
+        return _parser.parse_fragment(value)
+    return add_surrogate(value), []
+
+def _enclosed(entity, entities):
+    """Сущность лежит внутри сущности того же типа (HTML-парсер такие вложенные теги пропускает)"""
+    end = entity.offset + entity.length
+    return any(
+        type(outer) is type(entity) and outer.offset <= entity.offset and end <= outer.offset + outer.length
+        for outer in entities
+    )
+
+def _finish(html_text, text, entities, strip):
+    """Собирает PreparsedText из текста в UTF-16 представлении"""
+    entities = [entity for entity in entities if entity.length > 0]
+    entities.sort(key=lambda entity: entity.offset)
+    if strip:
+        text = strip_text(text, entities)
+    return PreparsedText(html_text, del_surrogate(text), entities, text)
+
+class MessageTemplate:
+    """
+    HTML-шаблон сообщения, разобранный в текст и сущности один раз.
+    Подстановка значений только сдвигает смещения сущностей (в UTF-16 единицах),
+    поэтому результат отправляется без повторного разбора HTML
+    """
+    
+    def __init__(self, source):
+        self.source = source
+        
+        # Поля внутри тегов влияют на сущности, для них держим отдельные разборы
+        self.tag_fields = tuple(dict.fromkeys(
+            name for tag in _TAG_PATTERN.findall(source) for name in _FIELD_PATTERN.findall(tag)
+        ))
+        self._layouts = {}
+    
+    def _layout(self, tag_values):
+        """Разобранный шаблон для конкретных значений полей внутри тегов"""
+        layout = self._layouts.get(tag_values)
+        if layout is not None:
+            return layout
+        
+        source = self.source
+        for name, value in zip(self.tag_fields, tag_values):
+            source = source.replace(f"{{{name}}}", str(value))
+        
+        text, entities = _parser.parse_fragment(source)
+        fields = [(match.start(), match.end(), match.group(1)) for match in _FIELD_PATTERN.finditer(text)]
+        
+        layout = (text, tuple(entities), tuple(fields))
+        self._layouts[tag_values] = layout
+        return layout
+    
+    def render(self, strip=True, **values):
+        """
+        Подстановка значений в шаблон
+        Значения могут быть простым текстом, HTML или результатом другого шаблона
+        """
+        text, entities, fields = self._layout(tuple(values[name] for name in self.tag_fields))
+        
+        pieces = []
+        value_entities = []
+        replacements = []
+        last = 0
+        delta = 0
+        for start, end, name in fields:
+            value_text, parts_entities = _to_parts(values[name])
+            for entity in parts_entities:
+                entity.offset += start + delta
+            
+            pieces.append(text[last:start])
+            pieces.append(value_text)
+            value_entities.extend(parts_entities)
+            replacements.append((start, end, len(value_text)))
+            delta += len(value_text) - (end - start)
+            last = end
+        pieces.append(text[last:])
+        
+        entities = shift_entities(entities, replacements)
+        entities += [entity for entity in value_entities if not _enclosed(entity, entities)]
+        return _finish(self.source.format_map(values), "".join(pieces), entities, strip)
+
+def join(parts, separator="", strip=False):
+    """Склеивает результаты шаблонов (и HTML-строки) через текстовый разделитель"""
+    parts = list(parts)
+    pieces = []
+    entities = []
+    offset = 0
+    separator_text = add_surrogate(separator)
+    
+    for index, part in enumerate(parts):
+        if index:
+            pieces.append(separator_text)
+            offset += len(separator_text)
+        
+        part_text, part_entities = _to_parts(part)
+        for entity in part_entities:
+            entity.offset += offset
+        
+        pieces.append(part_text)
+        entities.extend(part_entities)
+        offset += len(part_text)
+    
+    return _finish(escape(separator, quote=False).join(parts), "".join(pieces), entities, strip)
+
+def substitute(message, old, new):
+    """Замена простого текста в готовом сообщении со сдвигом сущностей"""
+    if not isinstance(message, PreparsedText):
+        return message.replace(old, escape(new, quote=False))
+    
+    text = message.surrogate_text
+    old_text = add_surrogate(old)
+    new_text = add_surrogate(new)
+    
+    pieces = []
+    replacements = []
+    last = 0
+    start = text.find(old_text)
+    while start != -1:
+        end = start + len(old_text)
+        pieces.append(text[last:start])
+        pieces.append(new_text)
+        replacements.append((start, end, len(new_text)))
+        last = end
+        start = text.find(old_text, end)
+    
+    if not replacements:
+        return message
+    
+    pieces.append(text[last:])
+    entities = shift_entities(message.entities, replacements)
+    return _finish(message.replace(old, escape(new, quote=False)), "".join(pieces), entities, False)
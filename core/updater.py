@@ -8,7 +8,6 @@ import os
 import sys
 import shutil
 import tempfile
-import subprocess
 import asyncio
 import json
 import time
@@ -16,8 +15,10 @@ import hashlib
 import logging
 import requests
 import zipfile
+from concurrent.futures import ThreadPoolExecutor
 from pathlib import Path
 from config import BotConfig
+from core.formatters import msg
 
 logger = logging.getLogger("UserBot.Updater")
 
@@ -28,19 +29,92 @@ class UpdateColors:
     RED = '\033[91m'
     ENDC = '\033[0m'
 
+class HttpArchiveSource:
+    """Архив обновления по HTTP: скачивается потоково, на диск, частями по chunk_size"""
+    
+    def __init__(self, url, timeout=60, chunk_size=65536):
+        self.url = url
+        self.timeout = timeout
+        self.chunk_size = chunk_size
+    
+    def __str__(self):
+        return self.url
+    
+    def fetch(self, dest_path, progress=None):
+        """Блокирующая загрузка в dest_path (вызывается из рабочего потока), возвращает размер"""
+        with requests.get(self.url, stream=True, timeout=self.timeout) as response:
+            response.raise_for_status()
+            total = int(response.headers.get("Content-Length") or 0)
+            done = 0
+            with open(dest_path, 'wb') as f:
+                for chunk in response.iter_content(self.chunk_size):
+                    f.write(chunk)
+                    done += len(chunk)
+                    if progress:
+                        progress(done, total)
+        return done
+
+class LocalArchiveSource:
+    """Архив обновления из локального файла: для тестов и установки без сети"""
+    
+    def __init__(self, path, chunk_size=65536):
+        self.path = Path(path)
+        self.chunk_size = chunk_size
+    
+    def __str__(self):
+        return str(self.path)
+    
+    def fetch(self, dest_path, progress=None):
+        total = self.path.stat().st_size
+        done = 0
+        with open(self.path, 'rb') as src, open(dest_path, 'wb') as f:
+            while True:
+                chunk = src.read(self.chunk_size)
+                if not chunk:
+                    break
+                f.write(chunk)
+                done += len(chunk)
+                if progress:
+                    progress(done, total)
+        return done
+
+def make_update_source(location):
+    """Источник архива по адресу: http(s):// - HTTP, file:// или путь - локальный файл"""
+    if location.startswith(("http://", "https://")):
+        return HttpArchiveSource(location)
+    if location.startswith("file://"):
+        location = location[len("file://"):]
+    return LocalArchiveSource(location)
+
 class GitHubUpdater:
-    def __init__(self, bot=None):
+    def __init__(self, bot=None, source=None):
         self.bot = bot
         self.repo_url = BotConfig.UPDATER["repo_url"]
+        # Откуда берётся архив обновления; по умолчанию main.zip репозитория
+        self.source = source or make_update_source(
+            BotConfig.UPDATER.get("archive_url") or f"{self.repo_url}/archive/refs/heads/main.zip"
+        )
         self.update_files = BotConfig.UPDATER["system_files"]
         self.update_dirs = ['asset', 'arts', 'core']
         self.last_update_file = Path("data") / "last_update.txt"
         self.last_update_file.parent.mkdir(exist_ok=True)
+        # Результат последней проверки: {"checked_at", "latest_commit", "notified_commit", "skipped_commit"}
+        self.check_file = Path("data") / "update_check.json"
+        self.check_timeout = BotConfig.UPDATER.get("check_timeout", 30)
         
         # Папки и файлы, которые нужно игнорировать при обновлении
-        self.ignore_dirs = {'session', 'logs', 'data', 'modules'}
+        self.ignore_dirs = {'session', 'logs', 'data', 'modules', '__pycache__'}
         self.ignore_files = {'config.db'}
     
+        # Манифест установленных файлов: путь -> [размер, mtime_ns, sha256]
+        self.manifest_file = Path("data") / "update_manifest.json"
+        
+        # Подготовленные версии: releases/<коммит>/{files,backup,release.json},
+        # указатели current.json и pending.json
+        self.releases_dir = Path("data") / "releases"
+        self.keep_releases = BotConfig.UPDATER.get("keep_releases", 3)
+        self.hash_workers = BotConfig.UPDATER.get("hash_workers") or min(8, os.cpu_count() or 1)
+    
     def _print_update_status(self, message):
         """Красивый вывод статуса обновления"""
         print(f"{UpdateColors.GREEN_BOLD}[Huekka Update]{UpdateColors.ENDC} {message}")
@@ -59,6 +133,47 @@ class GitHubUpdater:
                 hasher.update(data)
         return hasher.hexdigest()
     
+    def _extract_archive(self, zip_path, temp_dir):
+        """Распаковка в рабочем потоке; возвращает корневую папку репозитория в архиве"""
+        extract_dir = Path(temp_dir) / "extracted"
+        with zipfile.ZipFile(zip_path, 'r') as zip_ref:
+            zip_ref.extractall(extract_dir)
+        
+        # GitHub кладёт всё в Huekka-main/, локальный архив может быть и без корневой папки
+        entries = list(extract_dir.iterdir())
+        if len(entries) == 1 and entries[0].is_dir():
+            return entries[0]
+        return extract_dir
+    
+    def _print_progress(self, done, total):
+        """Прогресс загрузки в консоль (по умолчанию для perform_update)"""
+        if total:
+            self._print_update_status(f"Downloading: {done * 100 // total}% ({done // 1024} / {total // 1024} KB)")
+        else:
+            self._print_update_status(f"Downloading: {done // 1024} KB")
+    
+    async def download_archive(self, zip_path, progress=None, interval=0.5):
+        """
+        Потоковая загрузка архива из self.source в рабочем потоке
+        
+        Args:
+            progress: progress(done, total) - вызывается в цикле событий не чаще раза в interval секунд
+                и в конце загрузки; total = 0, если размер заранее неизвестен
+        """
+        loop = asyncio.get_running_loop()
+        last_report = 0.0
+        
+        def report(done, total):
+            nonlocal last_report
+            now = time.monotonic()
+            if progress and (now - last_report >= interval or done == total):
+                last_report = now
+                loop.call_soon_threadsafe(progress, done, total)
+        
+        size = await asyncio.to_thread(self.source.fetch, zip_path, report)
+        logger.info(f"Архив обновления загружен из {self.source}: {size} байт")
+        return size
+    
     def _should_ignore(self, file_path):
         """Проверяет, нужно ли игнорировать файл/папку"""
         path_str = str(file_path)
@@ -75,19 +190,26 @@ class GitHubUpdater:
         return False
     
     async def get_latest_commit_info(self):
-        """Получает информацию о последнем коммите из репозитория"""
+        """Получает информацию о последнем коммите из репозитория (git ls-remote не блокирует цикл событий)"""
+        process = None
         try:
             # Альтернативный способ получения информации о репозитории
-            result = subprocess.run([
-                'git', 'ls-remote', '--heads', self.repo_url
-            ], capture_output=True, text=True, timeout=30)
+            process = await asyncio.create_subprocess_exec(
+                'git', 'ls-remote', '--heads', self.repo_url,
+                stdout=asyncio.subprocess.PIPE, stderr=asyncio.subprocess.PIPE
+            )
+            stdout, _ = await asyncio.wait_for(process.communicate(), timeout=self.check_timeout)
             
-            if result.returncode == 0:
+            if process.returncode == 0:
                 # Получаем хэш последнего коммита
-                lines = result.stdout.strip().split('\n')
+                lines = stdout.decode().strip().split('\n')
                 if lines and lines[0]:
                     latest_commit_hash = lines[0].split()[0]
                     return latest_commit_hash
+        except asyncio.TimeoutError:
+            logger.warning(f"git ls-remote не ответил за {self.check_timeout} сек")
+            process.kill()
+            await process.wait()
         except Exception as e:
             logger.error(f"Ошибка получения информации о коммите: {str(e)}")
         
@@ -115,174 +237,338 @@ class GitHubUpdater:
             logger.error(f"Ошибка записи даты обновления: {str(e)}")
             return False
     
-    async def check_for_updates(self):
-        """Проверяет наличие обновлений"""
+    def load_check_state(self):
+        """Результат последней проверки из data/update_check.json"""
         try:
-            # Получаем хэш последнего коммита
-            latest_commit = await self.get_latest_commit_info()
-            if not latest_commit:
-                return False
+            with open(self.check_file, 'r', encoding='utf-8') as f:
+                state = json.load(f)
+            return state if isinstance(state, dict) else {}
+        except (OSError, ValueError):
+            return {}
+    
+    def save_check_state(self, state):
+        """Атомарная запись результата проверки"""
+        try:
+            temp_file = self.check_file.with_suffix(".tmp")
+            with open(temp_file, 'w', encoding='utf-8') as f:
+                json.dump(state, f, indent=2)
+            os.replace(temp_file, self.check_file)
+        except OSError as e:
+            logger.error(f"Ошибка сохранения результата проверки обновлений: {str(e)}")
+    
+    async def get_cached_update(self):
+        """Хэш коммита, если последняя проверка нашла обновление, которое ещё не установлено и не откачено"""
+        state = self.load_check_state()
+        latest_commit = state.get("latest_commit")
+        if latest_commit and latest_commit not in (await self.get_local_last_update(), state.get("skipped_commit")):
+            return latest_commit
+        return None
+    
+    async def check_for_updates(self, max_age=None):
+        """
+        Проверяет наличие обновлений
+        
+        Args:
+            max_age: результат проверки не старше max_age секунд берётся из кэша без обращения к сети
+        """
+        try:
+            state = self.load_check_state()
+            if max_age is None or time.time() - state.get("checked_at", 0) >= max_age:
+                # Получаем хэш последнего коммита
+                latest_commit = await self.get_latest_commit_info()
+                if not latest_commit:
+                    return False
             
-            # Получаем хэш последнего локального обновления
-            local_commit = await self.get_local_last_update()
+                state["checked_at"] = time.time()
+                state["latest_commit"] = latest_commit
+                self.save_check_state(state)
             
             # Если коммиты разные, есть обновление
-            return latest_commit != local_commit
+            return await self.get_cached_update() is not None
             
         except Exception as e:
             logger.error(f"Ошибка проверки обновлений: {str(e)}")
             return False
     
-    async def get_repo_file_list(self, extracted_dir):
-        """Получает список всех файлов в репозитории"""
-        repo_files = set()
+    def load_manifest(self):
+        """Манифест установленных файлов из data/update_manifest.json"""
+        try:
+            with open(self.manifest_file, 'r', encoding='utf-8') as f:
+                manifest = json.load(f)
+            return manifest if isinstance(manifest, dict) else {}
+        except (OSError, ValueError):
+            return {}
+    
+    def save_manifest(self, manifest):
+        """Атомарная запись манифеста"""
+        try:
+            temp_file = self.manifest_file.with_suffix(".tmp")
+            with open(temp_file, 'w', encoding='utf-8') as f:
+                json.dump(manifest, f, indent=1, sort_keys=True)
+            os.replace(temp_file, self.manifest_file)
+        except OSError as e:
+            logger.error(f"Ошибка сохранения манифеста обновлений: {str(e)}")
         
-        # Добавляем файлы из update_files
+    def _iter_update_paths(self, root):
+        """Относительные пути файлов обновления под root: update_files и содержимое update_dirs, без игнорируемых"""
+        paths = set()
         for file in self.update_files:
-            repo_file = extracted_dir / file
-            if repo_file.exists():
-                repo_files.add(str(file))
+            if (root / file).is_file():
+                paths.add(str(Path(file)))
         
-        # Добавляем файлы из update_dirs
         for dir_name in self.update_dirs:
-            repo_dir = extracted_dir / dir_name
-            if repo_dir.exists():
-                for root, _, files in os.walk(repo_dir):
-                    for file in files:
-                        repo_file_path = Path(root) / file
-                        relative_path = str(repo_file_path.relative_to(extracted_dir))
-                        repo_files.add(relative_path)
-        
-        return repo_files
+            for dir_path, _, files in os.walk(root / dir_name):
+                for file in files:
+                    paths.add(str((Path(dir_path) / file).relative_to(root)))
     
-    async def remove_deleted_files(self, extracted_dir, repo_files):
-        """Удаляет файлы, которые были удалены в репозитории, кроме игнорируемых"""
-        removed_count = 0
+        return {path for path in paths if not self._should_ignore(Path(path))}
         
-        # Проверяем файлы из update_files
-        for file in self.update_files:
-            local_file = Path(file)
-            repo_file = extracted_dir / file
+    def _hash_files(self, root, paths):
+        """sha256 файлов в пуле потоков: hashlib отпускает GIL, чтение и хэширование идут параллельно"""
+        paths = list(paths)
+        if not paths:
+            return {}
+        with ThreadPoolExecutor(max_workers=self.hash_workers) as pool:
+            return dict(zip(paths, pool.map(lambda path: self._get_file_hash(root / path), paths)))
             
-            if local_file.exists() and not repo_file.exists() and not self._should_ignore(local_file):
-                local_file.unlink()
-                self._print_update_status(f"Removed: {file}")
-                removed_count += 1
+    def scan_local_files(self):
+        """
+        Текущее состояние установленных файлов.
+        Хэш пересчитывается только у файлов, чей размер или mtime разошлись с манифестом
+        """
+        manifest = self.load_manifest()
+        local_root = Path(".")
+        current = {}
+        changed = {}
+                        
+        for path in self._iter_update_paths(local_root):
+            try:
+                stat = os.stat(path)
+            except OSError:
+                continue
+            entry = manifest.get(path)
+            if entry and entry[0] == stat.st_size and entry[1] == stat.st_mtime_ns:
+                current[path] = entry
+            else:
+                changed[path] = stat
         
-        # Проверяем файлы из update_dirs
-        for dir_name in self.update_dirs:
-            local_dir = Path(dir_name)
-            repo_dir = extracted_dir / dir_name
+        for path, file_hash in self._hash_files(local_root, changed).items():
+            current[path] = [changed[path].st_size, changed[path].st_mtime_ns, file_hash]
+        
+        logger.info(f"Манифест: {len(current)} файлов, пересчитано хэшей: {len(changed)}")
+        # Пересчитанные хэши сохраняются сразу: _activate_release дополняет манифест
+        # только скопированными файлами, остальные иначе хэшировались бы при каждом обновлении
+        if current != manifest:
+            self.save_manifest(current)
+        return current
+    
+    def _plan_update(self, extracted_dir):
+        """Сравнение манифеста с архивом: (манифест, что копировать, что удалить, хэши архива)"""
+        local = self.scan_local_files()
+        repo_hashes = self._hash_files(extracted_dir, self._iter_update_paths(extracted_dir))
+        
+        to_copy = sorted(path for path, file_hash in repo_hashes.items()
+                         if path not in local or local[path][2] != file_hash)
+        # Файлы, которых нет в репозитории (кроме игнорируемых)
+        to_delete = sorted(set(local) - set(repo_hashes))
+        return local, to_copy, to_delete, repo_hashes
+    
+    def _read_pointer(self, name):
+        try:
+            with open(self.releases_dir / f"{name}.json", 'r', encoding='utf-8') as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return None
+    
+    def _write_pointer(self, name, data):
+        """Атомарная смена указателя (os.replace)"""
+        pointer = self.releases_dir / f"{name}.json"
+        temp_file = pointer.with_suffix(".tmp")
+        with open(temp_file, 'w', encoding='utf-8') as f:
+            json.dump(data, f)
+        os.replace(temp_file, pointer)
+    
+    def _read_release(self, name):
+        with open(self.releases_dir / name / "release.json", 'r', encoding='utf-8') as f:
+            return json.load(f)
+    
+    def _stage_release(self, extracted_dir, latest_commit, local, to_copy, to_delete, repo_hashes):
+        """
+        Подготовка версии в data/releases/<коммит>: новые файлы и копии заменяемых/удаляемых.
+        Живые файлы на этом шаге не трогаются
+        """
+        name = latest_commit[:12]
+        release = self.releases_dir / name
+        shutil.rmtree(release, ignore_errors=True)
+        
+        for path in to_copy:
+            staged = release / "files" / path
+            staged.parent.mkdir(parents=True, exist_ok=True)
+            shutil.copy2(extracted_dir / path, staged)
+        
+        for path in to_copy + to_delete:
+            if Path(path).exists():
+                backup = release / "backup" / path
+                backup.parent.mkdir(parents=True, exist_ok=True)
+                shutil.copy2(path, backup)
+        
+        current = self._read_pointer("current") or {}
+        info = {
+            "commit": latest_commit,
+            "previous_commit": self.last_update_file.read_text().strip() if self.last_update_file.exists() else "",
+            "previous_release": current.get("release"),
+            "created": time.time(),
+            "copy": to_copy,
+            "delete": to_delete,
+            "added": [path for path in to_copy if path not in local],
+            "hashes": {path: repo_hashes[path] for path in to_copy}
+        }
+        with open(release / "release.json", 'w', encoding='utf-8') as f:
+            json.dump(info, f, indent=1)
+        return name
+    
+    def _activate_release(self, name, action="activate"):
+        """
+        Переключение на подготовленную версию (activate) или обратно (rollback).
+        Сначала атомарно пишется pending.json, затем каждый файл заменяется через os.replace.
+        Шаги идемпотентны: прерванное переключение целиком повторяется при следующем запуске
+        """
+        self._write_pointer("pending", {"release": name, "action": action})
+        release = self.releases_dir / name
+        info = self._read_release(name)
+        
+        if action == "activate":
+            source_dir = release / "files"
+            to_copy = info["copy"]
+            to_delete = info["delete"]
+            commit = info["commit"]
+            current = name
+        else:
+            # Откат: возвращаем сохранённые копии и убираем добавленные обновлением файлы
+            source_dir = release / "backup"
+            to_copy = [path for path in info["copy"] + info["delete"] if path not in info["added"]]
+            to_delete = info["added"]
+            commit = info["previous_commit"]
+            current = info["previous_release"]
+        
+        manifest = self.load_manifest()
+        for path in to_delete:
+            Path(path).unlink(missing_ok=True)
+            manifest.pop(path, None)
+        
+        for path in to_copy:
+            target = Path(path)
+            target.parent.mkdir(parents=True, exist_ok=True)
+            temp_file = target.with_name(target.name + ".huekka-new")
+            shutil.copy2(source_dir / path, temp_file)
+            os.replace(temp_file, target)
             
-            if local_dir.exists():
-                for root, _, files in os.walk(local_dir):
-                    for file in files:
-                        local_file_path = Path(root) / file
-                        relative_path = str(local_file_path.relative_to(local_dir.parent))
-                        
-                        # Если файл не существует в репозитории и не в списке игнорируемых
-                        if (relative_path not in repo_files and 
-                            not self._should_ignore(local_file_path)):
-                            local_file_path.unlink()
-                            self._print_update_status(f"Removed: {relative_path}")
-                            removed_count += 1
+            if action == "activate":
+                stat = target.stat()
+                manifest[path] = [stat.st_size, stat.st_mtime_ns, info["hashes"][path]]
+            else:
+                # Хэш пересчитается при следующем сканировании
+                manifest.pop(path, None)
+        
+        self.save_manifest(manifest)
+        self.last_update_file.write_text(commit)
+        self._write_pointer("current", {"release": current})
+        (self.releases_dir / "pending.json").unlink(missing_ok=True)
+        self._prune_releases()
+        logger.info(f"Версия {name}: {action} ({len(to_copy)} файлов заменено, {len(to_delete)} удалено)")
+    
+    def _prune_releases(self):
+        """Оставляет keep_releases версий в цепочке отката от текущей, остальные удаляются"""
+        keep = set()
+        name = (self._read_pointer("current") or {}).get("release")
+        while name and len(keep) < self.keep_releases:
+            keep.add(name)
+            try:
+                name = self._read_release(name).get("previous_release")
+            except (OSError, ValueError):
+                break
         
-        return removed_count
+        for release in self.releases_dir.iterdir():
+            if release.is_dir() and release.name not in keep:
+                shutil.rmtree(release, ignore_errors=True)
     
-    async def perform_update(self):
-        """Выполняет полное обновление с проверкой всех файлов"""
+    def resume_pending(self):
+        """Завершает переключение версии, прерванное остановкой процесса"""
+        pending = self._read_pointer("pending")
+        if not pending:
+            return False
+        
+        if not (self.releases_dir / pending["release"] / "release.json").exists():
+            (self.releases_dir / "pending.json").unlink(missing_ok=True)
+            return False
+        
+        self._print_update_status(f"Resuming interrupted {pending['action']} of {pending['release']}...")
+        self._activate_release(pending["release"], pending["action"])
+        return True
+    
+    def get_rollback_release(self):
+        """Версия, которую можно откатить, или None"""
+        name = (self._read_pointer("current") or {}).get("release")
+        if name and (self.releases_dir / name / "release.json").exists():
+            return name
+        return None
+    
+    def rollback(self):
+        """Мгновенный откат последней установленной версии из локальной копии, без загрузки"""
+        name = self.get_rollback_release()
+        if not name:
+            return None
+        
+        info = self._read_release(name)
+        self._activate_release(name, "rollback")
+        
+        # Откаченный коммит не ставится заново при запуске, только явным .upgrade
+        state = self.load_check_state()
+        state["skipped_commit"] = info["commit"]
+        self.save_check_state(state)
+        return info
+    
+    async def perform_update(self, latest_commit=None, progress=None):
+        """
+        Выполняет полное обновление с проверкой всех файлов.
+        Загрузка, распаковка, хэширование и копирование идут в рабочих потоках
+        
+        Args:
+            latest_commit: хэш устанавливаемого коммита (None - узнать через git ls-remote)
+            progress: progress(done, total) для загрузки, по умолчанию вывод в консоль
+        """
         temp_dir = tempfile.mkdtemp(prefix="huekka_update_")
-        updated_files = 0
-        removed_files = 0
         
         try:
-            # Получаем хэш последнего коммита перед обновлением
-            latest_commit = await self.get_latest_commit_info()
+            # Получаем хэш последнего коммита перед обновлением, если его не нашла проверка
+            if not latest_commit:
+                latest_commit = await self.get_latest_commit_info()
             if not latest_commit:
                 return False
             
             # Скачиваем архив с репозиторием
-            zip_url = f"{self.repo_url}/archive/refs/heads/main.zip"
             zip_path = Path(temp_dir) / "huekka.zip"
-            
-            response = requests.get(zip_url, timeout=60)
-            if response.status_code != 200:
-                return False
-            
-            with open(zip_path, 'wb') as f:
-                f.write(response.content)
+            await self.download_archive(zip_path, progress or self._print_progress)
             
             # Распаковываем архив
-            with zipfile.ZipFile(zip_path, 'r') as zip_ref:
-                zip_ref.extractall(temp_dir)
-            
-            extracted_dir = Path(temp_dir) / "Huekka-main"
-            
-            # Получаем список всех файлов в репозитории
-            repo_files = await self.get_repo_file_list(extracted_dir)
-            
-            # Удаляем файлы, которых нет в репозитории (кроме игнорируемых)
-            removed_files = await self.remove_deleted_files(extracted_dir, repo_files)
+            extracted_dir = await asyncio.to_thread(self._extract_archive, zip_path, temp_dir)
             
-            # Обновляем файлы только если они изменились и не в списке игнорируемых
-            for file in self.update_files:
-                repo_file = extracted_dir / file
-                local_file = Path(file)
-                
-                if repo_file.exists() and not self._should_ignore(local_file):
-                    # Создаем директорию, если её нет
-                    local_file.parent.mkdir(parents=True, exist_ok=True)
-                    
-                    # Проверяем, изменился ли файл
-                    repo_hash = self._get_file_hash(repo_file)
-                    local_hash = self._get_file_hash(local_file)
-                    
-                    if repo_hash != local_hash:
-                        # Копируем файл только если он изменился
-                        shutil.copy2(repo_file, local_file)
-                        self._print_update_status(f"Updated: {file}")
-                        updated_files += 1
-                    else:
-                        logger.info(f"File unchanged: {file}")
-            
-            # Обновляем папки с проверкой изменений
-            for dir_name in self.update_dirs:
-                repo_dir = extracted_dir / dir_name
-                local_dir = Path(dir_name)
-                
-                if repo_dir.exists():
-                    # Рекурсивно обходим все файлы в директории
-                    for root, _, files in os.walk(repo_dir):
-                        for file in files:
-                            repo_file_path = Path(root) / file
-                            relative_path = repo_file_path.relative_to(repo_dir)
-                            local_file_path = local_dir / relative_path
-                            
-                            # Пропускаем игнорируемые файлы
-                            if self._should_ignore(local_file_path):
-                                continue
-                                
-                            # Проверяем, изменился ли файл
-                            repo_hash = self._get_file_hash(repo_file_path)
-                            local_hash = self._get_file_hash(local_file_path)
-                            
-                            if repo_hash != local_hash:
-                                # Создаем директорию, если её нет
-                                local_file_path.parent.mkdir(parents=True, exist_ok=True)
-                                
-                                # Копируем файл только если он изменился
-                                shutil.copy2(repo_file_path, local_file_path)
-                                self._print_update_status(f"Updated: {local_file_path}")
-                                updated_files += 1
-                            else:
-                                logger.info(f"File unchanged: {local_file_path}")
+            # Сравниваем манифест с архивом: копируются и удаляются только различающиеся файлы
+            local, to_copy, to_delete, repo_hashes = await asyncio.to_thread(self._plan_update, extracted_dir)
             
-            if updated_files > 0 or removed_files > 0:
-                # Сохраняем хэш коммита как дату последнего обновления
-                await self.set_local_last_update(latest_commit)
-                self._print_update_status(f"Updated {updated_files} files, removed {removed_files} files")
+            if to_copy or to_delete:
+                self.releases_dir.mkdir(parents=True, exist_ok=True)
+                name = await asyncio.to_thread(
+                    self._stage_release, extracted_dir, latest_commit, local, to_copy, to_delete, repo_hashes
+                )
+                # Переключение также сохраняет хэш коммита как дату последнего обновления
+                await asyncio.to_thread(self._activate_release, name)
+                self._print_update_status(f"Updated {len(to_copy)} files, removed {len(to_delete)} files")
                 return True
             else:
+                # Коммит уже установлен: запоминаем его, иначе get_cached_update предлагал бы
+                # его снова и каждый запуск заново скачивал бы архив
+                await self.set_local_last_update(latest_commit)
                 self._print_update_status("No files need updating")
                 return False
             
@@ -291,25 +577,28 @@ class GitHubUpdater:
             return False
         finally:
             # Очищаем временные файлы
-            shutil.rmtree(temp_dir, ignore_errors=True)
+            await asyncio.to_thread(shutil.rmtree, temp_dir, True)
     
     async def auto_update(self):
-        """Автоматическая проверка и установка обновлений"""
+        """
+        Установка обновления при запуске.
+        Сеть здесь не опрашивается: решение берётся из результата фоновой проверки (UpdateChecker)
+        """
         try:
-            self._print_update_status("Checking for updates...")
-            has_update = await self.check_for_updates()
+            latest_commit = await self.get_cached_update()
             
-            if has_update:
-                self._print_update_status("Updates found, installing...")
-                success = await self.perform_update()
+            if latest_commit:
+                self._print_update_status(f"Update {latest_commit[:7]} found, installing...")
+                success = await self.perform_update(latest_commit)
                 
                 if success:
                     self._print_update_status("Update successfully installed")
                     return True
+                elif await self.get_cached_update() is None:
+                    # Файлы уже совпадали с коммитом, он записан как установленный
+                    self._print_update_status("Already up to date")
                 else:
                     self._print_update_status("Error installing update")
-            else:
-                self._print_update_status("No updates available")
             
             return False
             
@@ -317,12 +606,84 @@ class GitHubUpdater:
             logger.error(f"Ошибка автоматического обновления: {str(e)}")
             return False
 
+class UpdateChecker:
+    """Фоновая проверка обновлений: не чаще раза в check_ttl секунд, с уведомлением владельцу"""
+    
+    def __init__(self, bot, updater=None):
+        self.bot = bot
+        self.updater = updater or GitHubUpdater(bot)
+        self.check_ttl = BotConfig.UPDATER.get("check_ttl", 21600)
+        self.retry_interval = BotConfig.UPDATER.get("check_retry", 600)
+        self.check_task = None
+        self.is_running = False
+    
+    async def start(self):
+        if self.check_ttl > 0 and not self.is_running:
+            self.is_running = True
+            self.check_task = asyncio.create_task(self.check_loop())
+    
+    async def stop(self):
+        """Остановка фоновой проверки"""
+        if self.check_task:
+            self.is_running = False
+            self.check_task.cancel()
+            try:
+                await self.check_task
+            except asyncio.CancelledError:
+                pass
+    
+    async def check_loop(self):
+        while True:
+            try:
+                delay = await self.check()
+            except Exception as e:
+                logger.error(f"Ошибка фоновой проверки обновлений: {str(e)}")
+                delay = self.retry_interval
+            await asyncio.sleep(delay)
+    
+    async def check(self):
+        """Одна проверка; возвращает паузу до следующей"""
+        state = self.updater.load_check_state()
+        age = time.time() - state.get("checked_at", 0)
+        
+        if age < self.check_ttl:
+            delay = self.check_ttl - age
+        else:
+            await self.updater.check_for_updates(max_age=0)
+            if self.updater.load_check_state().get("checked_at") == state.get("checked_at"):
+                # Сеть недоступна: повторяем раньше, старый результат не трогаем
+                return self.retry_interval
+            delay = self.check_ttl
+        
+        latest_commit = await self.updater.get_cached_update()
+        if latest_commit and latest_commit != self.updater.load_check_state().get("notified_commit"):
+            await self.notify(latest_commit)
+        
+        return delay
+    
+    async def notify(self, latest_commit):
+        """Уведомление в «Избранном», один раз на каждый новый коммит"""
+        prefix = self.bot.command_prefix
+        await self.bot.client.send_message("me", (
+            "<b>🔄 Доступно обновление Huekka</b>\n"
+            f"Коммит <code>{latest_commit[:7]}</code>: <code>{prefix}upgrade</code> или <code>{prefix}restart</code> для установки"
+        ))
+        
+        state = self.updater.load_check_state()
+        state["notified_commit"] = latest_commit
+        self.updater.save_check_state(state)
+        logger.info(f"Доступно обновление {latest_commit[:7]}, владелец уведомлён")
+
 # Для использования в main.py
 async def check_and_update():
-    """Функция для автоматической проверки обновлений при запуске"""
+    """Установка при запуске обновления, найденного фоновой проверкой"""
     updater = GitHubUpdater()
     
     try:
+        # Переключение версии, прерванное остановкой, завершается до запуска бота
+        if updater.resume_pending():
+            return True
+        
         # Проверяем и устанавливаем обновления
         needs_restart = await updater.auto_update()
         return needs_restart
@@ -330,46 +691,124 @@ async def check_and_update():
         logger.error(f"Ошибка при проверке обновлений: {str(e)}")
         return False
 
-# Для использования в модуле бота
-async def setup(bot):
-    """Настройка модуля обновления"""
-    updater = GitHubUpdater(bot)
-    
-    @bot.register_command("update", update_handler, "Проверить обновления", "Updater")
-    @bot.register_command("upcheck", upcheck_handler, "Проверить обновления", "Updater")
+def get_module_info():
+    return {
+        "name": "Updater",
+        "description": "Обновление и откат Huekka",
+        "developer": "@BotHuekka",
+        "version": "1.0.0",
+        "commands": [
+            {
+                "command": "update",
+                "description": "Проверить обновления"
+            },
+            {
+                "command": "upcheck",
+                "description": "Проверить обновления (алиас update)"
+            },
+            {
+                "command": "upgrade",
+                "description": "Установить обновление"
+            },
+            {
+                "command": "rollback",
+                "description": "Откатить последнее обновление"
+            }
+        ]
+    }
+
+MODULE_INFO = get_module_info()
+
+class UpdaterModule:
+    def __init__(self, bot):
+        self.bot = bot
+        self.updater = GitHubUpdater(bot)
+        
+        handlers = {
+            "update": self.cmd_update,
+            "upcheck": self.cmd_update,
+            "upgrade": self.cmd_upgrade,
+            "rollback": self.cmd_rollback
+        }
+        for command in MODULE_INFO["commands"]:
+            bot.register_command(
+                cmd=command["command"],
+                handler=handlers[command["command"]],
+                description=command["description"],
+                module_name=MODULE_INFO["name"]
+            )
     
-    async def update_handler(event):
-        """Обработчик команды update"""
-        try:
-            has_update = await updater.check_for_updates()
+        bot.set_module_description(MODULE_INFO["name"], MODULE_INFO["description"])
             
-            if has_update:
-                await event.edit("‼️ Доступно обновление! Используйте `.upgrade` для установки")
-            else:
-                await event.edit("✅ У вас актуальная версия бота")
-        except Exception as e:
-            await event.edit(f"⚠️ Ошибка проверки обновлений: {str(e)}")
+    async def cmd_update(self, event):
+        """Обработчик команды update: проверка без учёта кэша"""
+        if await self.updater.check_for_updates(max_age=0):
+            latest_commit = await self.updater.get_cached_update()
+            await event.edit(msg.info(f"Доступно обновление <code>{latest_commit[:7]}</code>, "
+                                      f"установка: <code>{self.bot.command_prefix}upgrade</code>"))
+        else:
+            await event.edit(msg.success("У вас актуальная версия бота"))
     
-    async def upcheck_handler(event):
-        """Обработчик команды upcheck (алиас для update)"""
-        await update_handler(event)
+    async def cmd_upgrade(self, event):
+        """Обработчик команды upgrade: загрузка и установка в фоне, сообщения продолжают обрабатываться"""
+        message = await event.edit(msg.info("Загрузка обновления..."))
+        last_step = -1
+        last_edit = 0.0
+        progress_edit = None
+        
+        async def show_progress(previous, text):
+            # Правки идут по очереди: запоздавшая не перезапишет более свежую
+            if previous:
+                await previous
+            try:
+                await message.edit(text)
+            except Exception as e:
+                logger.debug(f"Не удалось показать прогресс обновления: {str(e)}")
     
-    @bot.register_command("upgrade", upgrade_handler, "Установить обновления", "Updater")
-    async def upgrade_handler(event):
-        """Обработчик команды upgrade"""
-        try:
-            msg = await event.edit("🔄 Начинаю процесс обновления...")
+        def progress(done, total):
+            nonlocal last_step, last_edit, progress_edit
+            if total:
+                step = done * 5 // total
+                if step <= last_step:
+                    return
+                last_step = step
+                text = f"Загрузка обновления... {step * 20}%"
+            else:
+                # Размер неизвестен (нет Content-Length): загруженные КБ, не чаще раза в 2 сек
+                now = time.monotonic()
+                if now - last_edit < 2:
+                    return
+                last_edit = now
+                text = f"Загрузка обновления... {done // 1024} КБ"
+            progress_edit = asyncio.create_task(show_progress(progress_edit, msg.info(text)))
             
-            success = await updater.perform_update()
+        updated = await self.updater.perform_update(await self.updater.get_cached_update(), progress)
+        # Итоговое сообщение - только после всех правок с прогрессом
+        if progress_edit:
+            await progress_edit
+        
+        if not updated:
+            await message.edit(msg.error("Обновление не установлено", "нет изменений или ошибка загрузки, см. логи"))
+            return
             
-            if success:
-                await msg.edit("✅ Обновление успешно установлено! Перезагрузка...")
-                # Добавляем действие после перезагрузки
-                bot.add_post_restart_action(lambda: None)
-                await asyncio.sleep(2)
-                await bot.restart()
-            else:
-                await msg.edit("⚠️ Ошибка при установке обновления")
+        await message.edit(msg.success("Обновление установлено, перезагрузка..."))
+        await self.bot.restart()
                 
+    async def cmd_rollback(self, event):
+        """Обработчик команды rollback: возврат файлов предыдущей версии из data/releases"""
+        try:
+            info = await asyncio.to_thread(self.updater.rollback)
         except Exception as e:
-            await event.edit(f"⚠️ Ошибка обновления: {str(e)}")
+            await event.edit(msg.error("Ошибка отката", str(e)))
+            return
+        
+        if not info:
+            await event.edit(msg.error("Нет сохранённой версии для отката"))
+            return
+        
+        previous = info["previous_commit"][:7] or "исходную"
+        await event.edit(msg.success(f"Откат <code>{info['commit'][:7]}</code> на {previous} версию, перезагрузка..."))
+        await self.bot.restart()
+
+def setup(bot):
+    UpdaterModule(bot)
@@ -17,6 +17,10 @@ import shutil
 import tempfile
 import subprocess
 import logging
+
+# Первая отметка хронологии запуска ставится до тяжёлых импортов
+from core.startup_trace import startup
+
 import requests
 import zipfile
 from pathlib import Path
@@ -38,6 +42,7 @@ from arter import print_random_art, print_specific_art
 
 # Импортируем обновленную систему обновлений
 from core.updater import check_and_update
+from config import BotConfig
 
 # Настройка логирования
 logging.basicConfig(
@@ -49,6 +54,8 @@ logging.basicConfig(
 )
 logger = logging.getLogger("Huekka.Main")
 
+startup.mark("main.imports")
+
 class Colors:
     DARK_VIOLET = '\033[38;5;54m'
     LIGHT_BLUE = '\033[38;5;117m'
@@ -68,14 +75,16 @@ class SessionManager:
 
     @staticmethod
     def encrypt_data(data: dict, key: str) -> str:
+        # Формат: "<итерации PBKDF2>$<base64(salt + iv + шифртекст)>", см. SessionManager в userbot.py
+        iterations = BotConfig.SESSION["kdf_iterations"]
         salt = get_random_bytes(16)
-        derived_key = hashlib.pbkdf2_hmac('sha256', key.encode(), salt, 100000, 32)
+        derived_key = hashlib.pbkdf2_hmac('sha256', key.encode(), salt, iterations, 32)
         
         iv = get_random_bytes(16)
         cipher = AES.new(derived_key, AES.MODE_CBC, iv)
         encrypted = cipher.encrypt(pad(json.dumps(data).encode(), AES.block_size))
         
-        return base64.b64encode(salt + iv + encrypted).decode()
+        return f"{iterations}$" + base64.b64encode(salt + iv + encrypted).decode()
 
 def clear_screen():
     """Очистка экрана"""
@@ -182,8 +191,9 @@ async def setup_session():
     with open(Path("session") / "Huekka.session", 'w') as f:
         f.write(encrypted_session)
 
-    # Запускаем бота
+    # Запускаем бота: ввод данных не считается временем запуска
     show_welcome()
+    startup.restart("setup_session")
     os.execl(sys.executable, sys.executable, "userbot.py")
 
 if __name__ == "__main__":
@@ -214,22 +224,30 @@ if __name__ == "__main__":
                 time.sleep(1)
                 # Проверяем и устанавливаем обновления
                 needs_restart = asyncio.run(check_and_update())
+                startup.mark("main.update_check")
                 if needs_restart:
                     print(f"{Colors.GREEN}✅ Update installed! Restarting...{Colors.ENDC}")
+                    startup.handoff()
                     os.execl(sys.executable, sys.executable, "main.py")
                 # Показываем приветственное сообщение
                 show_welcome()
+                startup.mark("main.welcome")
                 # Запускаем бота
+                startup.handoff()
                 os.execl(sys.executable, sys.executable, "userbot.py")
         else:
             asyncio.run(setup_session())
     else:
         # Проверяем и устанавливаем обновления
         needs_restart = asyncio.run(check_and_update())
+        startup.mark("main.update_check")
         if needs_restart:
             print(f"{Colors.GREEN}✅ Update installed! Restarting...{Colors.ENDC}")
+            startup.handoff()
             os.execl(sys.executable, sys.executable, "main.py")
         # Показываем приветственное сообщение
         show_welcome()
+        startup.mark("main.welcome")
         # Запускаем бота
+        startup.handoff()
         os.execl(sys.executable, sys.executable, "userbot.py")
@@ -1,10 +1,10 @@
-import asyncio
 import logging
 from telethon import events
 from telethon.tl.types import MessageEntityCustomEmoji
 import os
 import json
 import re
+from core.animation import Frame
 
 logger = logging.getLogger("UserBot.Typing")
 
@@ -32,6 +32,7 @@ def save_settings(settings):
 user_settings = load_settings()
 default_delay = 0.08
 default_cursor = "▮"
+animator = None  # bot.animator, задаётся в TypingModule
 
 def get_module_info():
     return {
@@ -75,6 +76,39 @@ async def extract_custom_emojis(text, entities):
                 custom_emojis[entity.offset] = (emoji_char, entity.document_id)
     return custom_emojis
 
+def typing_frames(text, emoji_positions, cursor, delay):
+    """
+    Кадры печати: текст растёт по символу (премиум эмодзи - целиком), курсор в конце
+    Последний кадр - готовый текст без курсора
+    """
+    frames = [Frame(cursor, delay, None, ())]
+    typed = ""
+    entities_list = []
+    i = 0
+    while i < len(text):
+        # Проверяем, есть ли на этой позиции эмодзи
+        if i in emoji_positions:
+            emoji_char, doc_id = emoji_positions[i]
+            typed += emoji_char
+            
+            # Добавляем сущность для эмодзи
+            entities_list.append(MessageEntityCustomEmoji(
+                offset=len(typed) - len(emoji_char),
+                length=len(emoji_char),
+                document_id=doc_id
+            ))
+            
+            # Пропускаем длину эмодзи
+            i += len(emoji_char)
+        else:
+            typed += text[i]
+            i += 1
+        
+        frames.append(Frame(typed + cursor, delay, None, tuple(entities_list)))
+    
+    frames.append(Frame(typed, 0.0, None, tuple(entities_list)))
+    return frames
+
 async def type_animation(event):
     """Анимация печати текста с поддержкой премиум эмодзи"""
     try:
@@ -93,9 +127,6 @@ async def type_animation(event):
         delay = user_settings.get(user_id, {}).get('delay', default_delay)
         cursor = user_settings.get(user_id, {}).get('cursor', default_cursor)
         
-        msg = await event.edit(cursor)
-        typed = ""
-        
         # Создаем список позиций эмодзи для правильной анимации
         emoji_positions = {}
         command_len = len(command_prefix) + 1  # +1 для пробела после команды
@@ -106,36 +137,8 @@ async def type_animation(event):
             if adjusted_offset >= 0:
                 emoji_positions[adjusted_offset] = (emoji_char, doc_id)
         
-        # Анимация печати
-        i = 0
-        entities_list = []
-        while i < len(text):
-            # Проверяем, есть ли на этой позиции эмодзи
-            if i in emoji_positions:
-                emoji_char, doc_id = emoji_positions[i]
-                typed += emoji_char
-                
-                # Добавляем сущность для эмодзи
-                entities_list.append(MessageEntityCustomEmoji(
-                    offset=len(typed) - len(emoji_char),
-                    length=len(emoji_char),
-                    document_id=doc_id
-                ))
-                
-                # Пропускаем длину эмодзи
-                i += len(emoji_char)
-            else:
-                typed += text[i]
-                i += 1
-            
-            # Формируем сообщение с эмодзи
-            message_with_emoji = typed + cursor
-            
-            await msg.edit(message_with_emoji, formatting_entities=entities_list)
-            await asyncio.sleep(delay)
-        
-        # Финальное сообщение без курсора
-        await msg.edit(typed, formatting_entities=entities_list)
+        # Кадры строятся заранее; при частой печати промежуточные пропускаются
+        await animator.play(event.message, typing_frames(text, emoji_positions, cursor, delay))
     except Exception as e:
         logger.error(f"Ошибка анимации: {e}")
         await event.edit("⚠️ Ошибка при выполнении")
@@ -149,16 +152,14 @@ async def tp_animation(event):
             return
 
         typing_symbol = "<"
-        previous_text = ""
-        await event.edit(f"**{typing_symbol}**", parse_mode='markdown')
-        
-        for character in input_str:
-            previous_text += character
-            typing_text = previous_text + typing_symbol
-            await event.edit(f'**{typing_text}**', parse_mode='markdown')
-            await asyncio.sleep(0.1)
+        frames = [Frame(f"**{typing_symbol}**", 0.1, "md")]
+        frames.extend(
+            Frame(f"**{input_str[:i]}{typing_symbol}**", 0.1, "md")
+            for i in range(1, len(input_str) + 1)
+        )
+        frames.append(Frame(f"**{input_str}**", 0.0, "md"))
         
-        await event.edit(f'**{previous_text}**', parse_mode='markdown')
+        await animator.play(event.message, frames)
     except Exception as e:
         logger.error(f"Ошибка анимации: {e}")
         await event.edit("⚠️ Ошибка при выполнении")
@@ -221,7 +222,9 @@ async def reset_settings(event):
 
 class TypingModule:
     def __init__(self, bot):
+        global animator
         self.bot = bot
+        animator = bot.animator
         
         # Регистрируем все команды из MODULE_INFO
         for cmd_info in MODULE_INFO["commands"]:
@@ -4,16 +4,12 @@
 # 🌐 https://github.com/nnnrodnoy/Huekka/
 # You can redistribute it and/or modify it under the terms of the MIT License
 # 🔑 https://opensource.org/licenses/MIT
-import os
 import logging
-import asyncio
 import random
 import math
-from pathlib import Path
-from telethon import events
-from telethon.errors import FloodWaitError, MessageNotModifiedError
+from functools import lru_cache
 from config import BotConfig
-from core.formatters import text, msg
+from core.animation import Frame
 
 logger = logging.getLogger("UserBot.Love")
 
@@ -24,6 +20,107 @@ EMPTY = "⬛️"
 MAIN_COLOR = "🟥"
 MAIN_HEART = "❤️"
 
+# Форма сердца на поле 9x9: "#" - закрашенная клетка
+HEART_SHAPE = (
+    ".........",
+    "..##.##..",
+    ".#######.",
+    ".#######.",
+    ".#######.",
+    "..#####..",
+    "...###...",
+    "....#....",
+    "........."
+)
+
+# Клетки сердца в порядке обхода по спирали вокруг центра
+HEART_POINTS = sorted(
+    ((x, y) for x, row in enumerate(HEART_SHAPE) for y, cell in enumerate(row) if cell == "#"),
+    key=lambda p: math.atan2(p[0] - 4, p[1] - 4)
+)
+
+CLASSIC_FINAL_TEXT = "I LOVE YOU! ❤️"
+SPIRAL_TEXT_STAGES = ("❤️", "I❤️", "I L❤️", "I LO❤️", "I LOV❤️", "I LOVE❤️",
+                      "I LOVE Y❤️", "I LOVE YO❤️", "I LOVE YOU❤️", "I LOVE YOU!❤️", "I LOVE YOU! ❤️")
+SPIRAL_HEARTS_TEXT_STAGES = ("❤️", "I❤️", "I L❤️", "I LO❤️", "I LOV❤️", "I LOVE❤️",
+                             "I LOVE Y❤️", "I LOVE YO❤️", "I LOVE YOU❤️", "I LOVE YOU! ❤️")
+
+def grid_frame(rows, delay):
+    """Кадр с полем сердца"""
+    return Frame("<pre>" + "\n".join(rows) + "</pre>", delay)
+
+@lru_cache(maxsize=None)
+def heart_rows(fill):
+    """Строки сердца, закрашенного fill"""
+    return tuple("".join(fill if cell == "#" else EMPTY for cell in row) for row in HEART_SHAPE)
+
+@lru_cache(maxsize=None)
+def heart_frame(fill, delay):
+    return grid_frame(heart_rows(fill), delay)
+
+@lru_cache(maxsize=None)
+def build_frames(fill):
+    """Построение сердца по частям: верх, затем всё больше строк, пустая строка снизу"""
+    rows = heart_rows(fill)
+    stages = [grid_frame(rows[:count] + (EMPTY * 9,), 0.4) for count in (2, 4, 6)]
+    stages.append(grid_frame(rows, 0.4))
+    return tuple(stages)
+
+@lru_cache(maxsize=None)
+def shrink_frames(fill):
+    """Сердце сжимается в квадраты 8x8 ... 1x1"""
+    return tuple(Frame("<pre>" + (fill * i + "\n") * i + "</pre>", 0.3) for i in range(8, 0, -1))
+
+@lru_cache(maxsize=None)
+def typing_frames(final_text, delay):
+    """Финальный текст по буквам"""
+    return tuple(Frame(f"<b>{final_text[:i]}</b>", delay) for i in range(1, len(final_text) + 1))
+
+def classic_frames(intro, fill, colors, color_delay):
+    """Кадры классической анимации: построение, смена цвета, сжатие и текст"""
+    return (
+        (Frame(intro, 0.7),)
+        + build_frames(fill)
+        + tuple(heart_frame(color, color_delay) for color in colors)
+        + shrink_frames(fill)
+        + typing_frames(CLASSIC_FINAL_TEXT, 0.2)
+    )
+
+def spiral_frames(intro, palette, text_stages):
+    """
+    Кадры спиральной анимации: заполнение по спирали, мерцание и стирание
+    Строки поля пересобираются только там, где поменялась клетка
+    """
+    grid = [[EMPTY] * 9 for _ in range(9)]
+    rows = ["".join(row) for row in grid]
+    frames = [Frame(intro, 0.7)]
+    
+    def paint(x, y, cell):
+        grid[x][y] = cell
+        rows[x] = "".join(grid[x])
+    
+    # Постепенное заполнение
+    for i, (x, y) in enumerate(HEART_POINTS):
+        paint(x, y, random.choice(palette))
+        if i % 2 == 0:
+            frames.append(grid_frame(rows, 0.25))
+    
+    # Вращение цветов
+    for _ in range(8):
+        for x, y in HEART_POINTS:
+            grid[x][y] = random.choice(palette)
+        rows[:] = ["".join(row) for row in grid]
+        frames.append(grid_frame(rows, 0.7))
+    
+    # Постепенное удаление
+    for i, (x, y) in enumerate(reversed(HEART_POINTS)):
+        paint(x, y, EMPTY)
+        if i % 3 == 0:
+            frames.append(grid_frame(rows, 0.15))
+    
+    frames.extend(Frame(f"<b>{stage}</b>", 0.4) for stage in text_stages)
+    return frames
+
 def get_module_info():
     return {
         "name": "Love",
@@ -83,329 +180,34 @@ class LoveModule:
         except Exception as e:
             logger.error(f"Ошибка добавления в автоочистку: {str(e)}")
 
-    async def safe_edit(self, message, new_text, is_html=False):
-        """Безопасное редактирование сообщения с обработкой ошибок"""
+    async def play(self, event, frames, name):
+        """Проигрывает кадры в сообщении с командой"""
         try:
-            if is_html:
-                await message.edit(new_text, parse_mode='html')
-            else:
-                await message.edit(new_text)
-            return True
-        except FloodWaitError as e:
-            logger.warning(f"Ожидание FloodWait: {e.seconds} сек.")
-            await asyncio.sleep(e.seconds + 2)
-            return await self.safe_edit(message, new_text, is_html)
-        except MessageNotModifiedError:
-            logger.debug("Сообщение не изменено")
-            return True
+            await self.bot.animator.play(event.message, frames)
         except Exception as e:
-            logger.error(f"Ошибка редактирования: {str(e)}")
-            return False
+            logger.error(f"Ошибка в {name}: {str(e)}")
+            await event.respond(f"⚠️ Ошибка: {str(e)}")
 
     async def classic_animation(self, event):
         """Анимация классического сердца"""
-        try:
-            # Начальное сообщение
-            msg = await event.edit("<b>Я ТЕБЯ ЛЮБЛЮ!...❤️</b>", parse_mode='html')
-            await asyncio.sleep(0.7)
-
-            # Этапы построения сердца
-            heart_stages = [
-                [
-                    EMPTY * 9,
-                    EMPTY * 2 + MAIN_COLOR * 2 + EMPTY + MAIN_COLOR * 2 + EMPTY * 2,
-                    EMPTY * 9
-                ],
-                [
-                    EMPTY * 9,
-                    EMPTY * 2 + MAIN_COLOR * 2 + EMPTY + MAIN_COLOR * 2 + EMPTY * 2,
-                    EMPTY + MAIN_COLOR * 7 + EMPTY,
-                    EMPTY + MAIN_COLOR * 7 + EMPTY,
-                    EMPTY * 9
-                ],
-                [
-                    EMPTY * 9,
-                    EMPTY * 2 + MAIN_COLOR * 2 + EMPTY + MAIN_COLOR * 2 + EMPTY * 2,
-                    EMPTY + MAIN_COLOR * 7 + EMPTY,
-                    EMPTY + MAIN_COLOR * 7 + EMPTY,
-                    EMPTY + MAIN_COLOR * 7 + EMPTY,
-                    EMPTY * 2 + MAIN_COLOR * 5 + EMPTY * 2,
-                    EMPTY * 9
-                ],
-                [
-                    EMPTY * 9,
-                    EMPTY * 2 + MAIN_COLOR * 2 + EMPTY + MAIN_COLOR * 2 + EMPTY * 2,
-                    EMPTY + MAIN_COLOR * 7 + EMPTY,
-                    EMPTY + MAIN_COLOR * 7 + EMPTY,
-                    EMPTY + MAIN_COLOR * 7 + EMPTY,
-                    EMPTY * 2 + MAIN_COLOR * 5 + EMPTY * 2,
-                    EMPTY * 3 + MAIN_COLOR * 3 + EMPTY * 3,
-                    EMPTY * 4 + MAIN_COLOR + EMPTY * 4,
-                    EMPTY * 9
-                ]
-            ]
-
-            # Постепенное построение сердца
-            for stage in heart_stages:
-                await self.safe_edit(msg, "<pre>" + "\n".join(stage) + "</pre>", True)
-                await asyncio.sleep(0.4)
-
-            # Смена цветов сердца
-            for color in COLORS:
-                colored_heart = [
-                    EMPTY * 9,
-                    EMPTY * 2 + color * 2 + EMPTY + color * 2 + EMPTY * 2,
-                    EMPTY + color * 7 + EMPTY,
-                    EMPTY + color * 7 + EMPTY,
-                    EMPTY + color * 7 + EMPTY,
-                    EMPTY * 2 + color * 5 + EMPTY * 2,
-                    EMPTY * 3 + color * 3 + EMPTY * 3,
-                    EMPTY * 4 + color + EMPTY * 4,
-                    EMPTY * 9
-                ]
-                await self.safe_edit(msg, "<pre>" + "\n".join(colored_heart) + "</pre>", True)
-                await asyncio.sleep(0.6)
-
-            # Уменьшение сердца
-            for i in range(8, 0, -1):
-                heart = (MAIN_COLOR * i + "\n") * i
-                await self.safe_edit(msg, f"<pre>{heart}</pre>", True)
-                await asyncio.sleep(0.3)
-
-            # Финальный текст
-            final_text = "I LOVE YOU! ❤️"
-            for i in range(1, len(final_text) + 1):
-                await self.safe_edit(msg, f"<b>{final_text[:i]}</b>", True)
-                await asyncio.sleep(0.2)
-
-        except Exception as e:
-            logger.error(f"Ошибка в classic_animation: {str(e)}")
-            await event.respond(f"⚠️ Ошибка: {str(e)}")
+        frames = classic_frames("<b>Я ТЕБЯ ЛЮБЛЮ!...❤️</b>", MAIN_COLOR, COLORS, 0.6)
+        await self.play(event, frames, "classic_animation")
 
     async def spiral_animation(self, event):
         """Спиральная анимация сердца"""
-        try:
-            # Начальное сообщение
-            msg = await event.edit("<b>Я ТЕБЯ ОБОЖАЮ!...❤️</b>", parse_mode='html')
-            await asyncio.sleep(0.7)
-
-            # Базовое сердце
-            base = [
-                [EMPTY] * 9,
-                [EMPTY] * 2 + ["❤️"] * 2 + [EMPTY] + ["❤️"] * 2 + [EMPTY] * 2,
-                [EMPTY] + ["❤️"] * 7 + [EMPTY],
-                [EMPTY] + ["❤️"] * 7 + [EMPTY],
-                [EMPTY] + ["❤️"] * 7 + [EMPTY],
-                [EMPTY] * 2 + ["❤️"] * 5 + [EMPTY] * 2,
-                [EMPTY] * 3 + ["❤️"] * 3 + [EMPTY] * 3,
-                [EMPTY] * 4 + ["❤️"] + [EMPTY] * 4,
-                [EMPTY] * 9
-            ]
-
-            # Собираем все точки сердца
-            points = []
-            for i in range(len(base)):
-                for j in range(len(base[i])):
-                    if base[i][j] == "❤️":
-                        points.append((i, j))
-
-            # Сортируем точки для спирального эффекта
-            center = (4, 4)
-            points.sort(key=lambda p: math.atan2(p[0] - center[0], p[1] - center[1]))
-
-            # Постепенное заполнение
-            current_heart = [[EMPTY for _ in range(9)] for _ in range(9)]
-            for i, (x, y) in enumerate(points):
-                current_heart[x][y] = random.choice(COLORS)
-                if i % 2 == 0:
-                    spiral_msg = "<pre>" + "\n".join("".join(line) for line in current_heart) + "</pre>"
-                    await self.safe_edit(msg, spiral_msg, True)
-                    await asyncio.sleep(0.25)
-
-            # Вращение цветов
-            for _ in range(8):
-                for x, y in points:
-                    current_heart[x][y] = random.choice(COLORS)
-                
-                rotate_msg = "<pre>" + "\n".join("".join(line) for line in current_heart) + "</pre>"
-                await self.safe_edit(msg, rotate_msg, True)
-                await asyncio.sleep(0.7)
-
-            # Постепенное удаление
-            num_points = len(points)
-            for i in range(num_points):
-                index = num_points - 1 - i
-                x, y = points[index]
-                current_heart[x][y] = EMPTY
-
-                if i % 3 == 0:
-                    remove_msg = "<pre>" + "\n".join("".join(line) for line in current_heart) + "</pre>"
-                    await self.safe_edit(msg, remove_msg, True)
-                    await asyncio.sleep(0.15)
-
-            # Финальный текст
-            text_stages = ["❤️", "I❤️", "I L❤️", "I LO❤️", "I LOV❤️", "I LOVE❤️", 
-                          "I LOVE Y❤️", "I LOVE YO❤️", "I LOVE YOU❤️", "I LOVE YOU!❤️", "I LOVE YOU! ❤️"]
-            for text in text_stages:
-                await self.safe_edit(msg, f"<b>{text}</b>", True)
-                await asyncio.sleep(0.4)
-
-        except Exception as e:
-            logger.error(f"Ошибка в spiral_animation: {str(e)}")
-            await event.respond(f"⚠️ Ошибка: {str(e)}")
+        frames = spiral_frames("<b>Я ТЕБЯ ОБОЖАЮ!...❤️</b>", COLORS, SPIRAL_TEXT_STAGES)
+        await self.play(event, frames, "spiral_animation")
 
     async def classic_animation_hearts(self, event):
         """Анимация сердца из сердечек"""
-        try:
-            # Начальное сообщение
-            msg = await event.edit("<b>Я ТЕБЯ ЛЮБЛЮ!...❤️</b>", parse_mode='html')
-            await asyncio.sleep(0.7)
-
-            # Этапы построения сердца
-            heart_stages = [
-                [
-                    EMPTY * 9,
-                    EMPTY * 2 + MAIN_HEART * 2 + EMPTY + MAIN_HEART * 2 + EMPTY * 2,
-                    EMPTY * 9
-                ],
-                [
-                    EMPTY * 9,
-                    EMPTY * 2 + MAIN_HEART * 2 + EMPTY + MAIN_HEART * 2 + EMPTY * 2,
-                    EMPTY + MAIN_HEART * 7 + EMPTY,
-                    EMPTY + MAIN_HEART * 7 + EMPTY,
-                    EMPTY * 9
-                ],
-                [
-                    EMPTY * 9,
-                    EMPTY * 2 + MAIN_HEART * 2 + EMPTY + MAIN_HEART * 2 + EMPTY * 2,
-                    EMPTY + MAIN_HEART * 7 + EMPTY,
-                    EMPTY + MAIN_HEART * 7 + EMPTY,
-                    EMPTY + MAIN_HEART * 7 + EMPTY,
-                    EMPTY * 2 + MAIN_HEART * 5 + EMPTY * 2,
-                    EMPTY * 9
-                ],
-                [
-                    EMPTY * 9,
-                    EMPTY * 2 + MAIN_HEART * 2 + EMPTY + MAIN_HEART * 2 + EMPTY * 2,
-                    EMPTY + MAIN_HEART * 7 + EMPTY,
-                    EMPTY + MAIN_HEART * 7 + EMPTY,
-                    EMPTY + MAIN_HEART * 7 + EMPTY,
-                    EMPTY * 2 + MAIN_HEART * 5 + EMPTY * 2,
-                    EMPTY * 3 + MAIN_HEART * 3 + EMPTY * 3,
-                    EMPTY * 4 + MAIN_HEART + EMPTY * 4,
-                    EMPTY * 9
-                ]
-            ]
-
-            # Постепенное построение сердца
-            for stage in heart_stages:
-                await self.safe_edit(msg, "<pre>" + "\n".join(stage) + "</pre>", True)
-                await asyncio.sleep(0.4)
-
-            # Смена цветов сердечек
-            for _ in range(2):
-                for color in random.sample(HEART_COLORS, len(HEART_COLORS)):
-                    colored_heart = [
-                        EMPTY * 9,
-                        EMPTY * 2 + color * 2 + EMPTY + color * 2 + EMPTY * 2,
-                        EMPTY + color * 7 + EMPTY,
-                        EMPTY + color * 7 + EMPTY,
-                        EMPTY + color * 7 + EMPTY,
-                        EMPTY * 2 + color * 5 + EMPTY * 2,
-                        EMPTY * 3 + color * 3 + EMPTY * 3,
-                        EMPTY * 4 + color + EMPTY * 4,
-                        EMPTY * 9
-                    ]
-                    await self.safe_edit(msg, "<pre>" + "\n".join(colored_heart) + "</pre>", True)
-                    await asyncio.sleep(0.5)
-
-            # Уменьшение сердца
-            for i in range(8, 0, -1):
-                heart = (MAIN_HEART * i + "\n") * i
-                await self.safe_edit(msg, f"<pre>{heart}</pre>", True)
-                await asyncio.sleep(0.3)
-
-            # Финальный текст
-            final_text = "I LOVE YOU! ❤️"
-            for i in range(1, len(final_text) + 1):
-                await self.safe_edit(msg, f"<b>{final_text[:i]}</b>", True)
-                await asyncio.sleep(0.2)
-
-        except Exception as e:
-            logger.error(f"Ошибка в classic_animation_hearts: {str(e)}")
-            await event.respond(f"⚠️ Ошибка: {str(e)}")
+        colors = random.sample(HEART_COLORS, len(HEART_COLORS)) + random.sample(HEART_COLORS, len(HEART_COLORS))
+        frames = classic_frames("<b>Я ТЕБЯ ЛЮБЛЮ!...❤️</b>", MAIN_HEART, colors, 0.5)
+        await self.play(event, frames, "classic_animation_hearts")
 
     async def spiral_animation_hearts(self, event):
         """Спиральная анимация сердца из сердечек"""
-        try:
-            # Начальное сообщение
-            msg = await event.edit("<b>Я ТЕБЯ ОБОЖАЮ!...❤️</b>", parse_mode='html')
-            await asyncio.sleep(0.7)
-
-            # Базовое сердце
-            base = [
-                [EMPTY] * 9,
-                [EMPTY] * 2 + ["❤️"] * 2 + [EMPTY] + ["❤️"] * 2 + [EMPTY] * 2,
-                [EMPTY] + ["❤️"] * 7 + [EMPTY],
-                [EMPTY] + ["❤️"] * 7 + [EMPTY],
-                [EMPTY] + ["❤️"] * 7 + [EMPTY],
-                [EMPTY] * 2 + ["❤️"] * 5 + [EMPTY] * 2,
-                [EMPTY] * 3 + ["❤️"] * 3 + [EMPTY] * 3,
-                [EMPTY] * 4 + ["❤️"] + [EMPTY] * 4,
-                [EMPTY] * 9
-            ]
-
-            # Собираем все точки сердца
-            points = []
-            for i in range(len(base)):
-                for j in range(len(base[i])):
-                    if base[i][j] == "❤️":
-                        points.append((i, j))
-
-            # Сортируем точки для спирального эффекта
-            center = (4, 4)
-            points.sort(key=lambda p: math.atan2(p[0] - center[0], p[1] - center[1]))
-
-            # Постепенное заполнение
-            current_heart = [[EMPTY for _ in range(9)] for _ in range(9)]
-            for i, (x, y) in enumerate(points):
-                current_heart[x][y] = random.choice(HEART_COLORS)
-                if i % 2 == 0:
-                    spiral_msg = "<pre>" + "\n".join("".join(line) for line in current_heart) + "</pre>"
-                    await self.safe_edit(msg, spiral_msg, True)
-                    await asyncio.sleep(0.25)
-
-            # Вращение сердечек
-            for _ in range(8):
-                for x, y in points:
-                    current_heart[x][y] = random.choice(HEART_COLORS)
-                
-                rotate_msg = "<pre>" + "\n".join("".join(line) for line in current_heart) + "</pre>"
-                await self.safe_edit(msg, rotate_msg, True)
-                await asyncio.sleep(0.7)
-
-            # Постепенное удаление
-            num_points = len(points)
-            for i in range(num_points):
-                index = num_points - 1 - i
-                x, y = points[index]
-                current_heart[x][y] = EMPTY
-
-                if i % 3 == 0:
-                    remove_msg = "<pre>" + "\n".join("".join(line) for line in current_heart) + "</pre>"
-                    await self.safe_edit(msg, remove_msg, True)
-                    await asyncio.sleep(0.15)
-
-            # Финальный текст
-            text_stages = ["❤️", "I❤️", "I L❤️", "I LO❤️", "I LOV❤️", "I LOVE❤️", 
-                          "I LOVE Y❤️", "I LOVE YO❤️", "I LOVE YOU❤️", "I LOVE YOU! ❤️"]
-            for text in text_stages:
-                await self.safe_edit(msg, f"<b>{text}</b>", True)
-                await asyncio.sleep(0.4)
-
-        except Exception as e:
-            logger.error(f"Ошибка в spiral_animation_hearts: {str(e)}")
-            await event.respond(f"⚠️ Ошибка: {str(e)}")
+        frames = spiral_frames("<b>Я ТЕБЯ ОБОЖАЮ!...❤️</b>", HEART_COLORS, SPIRAL_HEARTS_TEXT_STAGES)
+        await self.play(event, frames, "spiral_animation_hearts")
 
     async def cmd_love1(self, event):
         """Обработчик команды .love1"""
@@ -0,0 +1,125 @@
+# ©️ nnnrodnoy, 2025
+# 💬 @nnnrodnoy
+# This file is part of Huekka
+# 🌐 https://github.com/nnnrodnoy/Huekka/
+# You can redistribute it and/or modify it under the terms of the MIT License
+# 🔑 https://opensource.org/licenses/MIT
+"""
+Хронология запуска main.py -> userbot.py
+
+Каждая отметка mark(phase) закрывает фазу, начавшуюся на предыдущей отметке. Отметки
+переживают os.execl через переменную окружения, а time.monotonic() на Linux и Windows
+общий для всех процессов, поэтому время самого exec тоже попадает в разбивку.
+
+    python main.py --startup-trace                     # вывести разбивку после запуска
+    python main.py --startup-trace=logs/startup.json   # и сохранить её в JSON
+"""
+import json
+import logging
+import os
+import sys
+import time
+
+logger = logging.getLogger("UserBot.Startup")
+
+ENV_TRACE = "HUEKKA_STARTUP_TRACE"    # отметки, переданные через os.execl
+ENV_OUTPUT = "HUEKKA_STARTUP_OUTPUT"  # "print" или путь к JSON-файлу
+
+_marks = []
+_finished = False
+
+def _script_name():
+    return os.path.splitext(os.path.basename(sys.argv[0] or "python"))[0]
+
+def _init():
+    """Продолжение хронологии предыдущего процесса или начало новой"""
+    global _marks
+    
+    for arg in sys.argv[1:]:
+        if arg == "--startup-trace":
+            os.environ[ENV_OUTPUT] = "print"
+        elif arg.startswith("--startup-trace="):
+            os.environ[ENV_OUTPUT] = arg.split("=", 1)[1]
+    
+    inherited = os.environ.pop(ENV_TRACE, None)
+    if inherited:
+        try:
+            _marks = [tuple(item) for item in json.loads(inherited)]
+        except ValueError:
+            _marks = []
+    
+    if _marks:
+        # Запуск интерпретатора и импорты до этого модуля
+        mark(f"{_script_name()}.exec")
+    else:
+        _marks = [("start", time.monotonic())]
+
+def mark(phase):
+    """Закрывает фазу phase текущим моментом"""
+    if not _finished:
+        _marks.append((phase, time.monotonic()))
+
+def handoff():
+    """Передаёт хронологию процессу, который заменит текущий через os.execl"""
+    os.environ[ENV_TRACE] = json.dumps(_marks)
+
+def restart(reason="restart"):
+    """Начинает новую хронологию перед перезапуском: от команды до готовности нового процесса"""
+    os.environ[ENV_TRACE] = json.dumps([(reason, time.monotonic())])
+
+def breakdown():
+    """Список фаз: имя, длительность и момент окончания от начала хронологии (сек)"""
+    if not _marks:
+        return []
+    
+    origin = _marks[0][1]
+    phases = []
+    for (_, previous), (phase, moment) in zip(_marks, _marks[1:]):
+        phases.append({"phase": phase, "seconds": moment - previous, "at": moment - origin})
+    return phases
+
+def format_breakdown(phases):
+    """Таблица фаз для консоли"""
+    total = phases[-1]["at"] if phases else 0.0
+    lines = [f"{'phase':<28} {'sec':>8} {'share':>6} {'at':>8}"]
+    for item in phases:
+        share = item["seconds"] / total if total else 0.0
+        lines.append(f"{item['phase']:<28} {item['seconds']:>8.3f} {share:>6.1%} {item['at']:>8.3f}")
+    lines.append(f"{'total':<28} {total:>8.3f}")
+    return "\n".join(lines)
+
+def finish():
+    """Бот готов к работе: закрываем хронологию, пишем разбивку в лог и, если просили, в консоль и JSON"""
+    global _finished
+    if _finished:
+        return breakdown()
+    
+    mark("ready")
+    _finished = True
+    phases = breakdown()
+    if not phases:
+        return phases
+    
+    logger.info(f"Запуск за {phases[-1]['at']:.2f} сек: " +
+                ", ".join(f"{item['phase']} {item['seconds']:.2f}" for item in phases))
+    
+    output = os.environ.get(ENV_OUTPUT)
+    if output:
+        print(format_breakdown(phases))
+    if output and output != "print":
+        try:
+            os.makedirs(os.path.dirname(output) or ".", exist_ok=True)
+            with open(output, "w", encoding="utf-8") as f:
+                json.dump({
+                    "origin": _marks[0][0],
+                    "total": phases[-1]["at"],
+                    "created": time.time(),
+                    "phases": phases
+                }, f, indent=2)
+                f.write("\n")
+        except OSError as e:
+            logger.error(f"Ошибка сохранения хронологии запуска: {str(e)}")
+    
+    return phases
+
+_init()
@@ -15,28 +15,53 @@ import importlib.util
 import re
 import inspect
 from pathlib import Path
+from core.startup_trace import startup
 from Crypto.Cipher import AES
 from Crypto.Util.Padding import pad, unpad
 import hashlib
-from telethon import TelegramClient, events
+from telethon import TelegramClient, events, utils
 from telethon.sessions import StringSession
+from telethon.tl import types
 from telethon.tl.functions.channels import JoinChannelRequest
+from telethon.errors import ChannelInvalidError, ChannelPrivateError
 from core.parser import CustomHtmlParser, EmojiHandler
-from core.log import setup_logging
+from core.log import setup_logging, stop_logging
 from config import BotConfig
 from core.autocleaner import AutoCleaner
+from core.updater import UpdateChecker
 from core.apilimiter import APILimiter
+from core.media import MediaCache
+from core.animation import Animator
 from core.system import SystemModule
 from core.database import DatabaseManager
+from core.name_index import NameIndex
+from core.reply import edit_or_split
 
 logger = setup_logging()
 logger = logging.getLogger("UserBot")
 
+startup.mark("userbot.imports")
+
 class Colors:
     LIGHT_BLUE = '\033[94m'
     ENDC = '\033[0m'
 
 class SessionManager:
+    """
+    Huekka.session: "<итерации PBKDF2>$<base64(salt + iv + шифртекст)>", старый формат - без префикса (100000).
+    Ключ из .env - случайный токен на 256 бит, поэтому стоимость KDF можно снизить
+    (python userbot.py --migrate-session) без потери стойкости.
+    Производный ключ передаётся процессу после os.execl через унаследованный pipe:
+    перезапуск не повторяет PBKDF2, а ключ не попадает на диск
+    """
+    LEGACY_ITERATIONS = 100000
+    HANDOFF_ENV = "HUEKKA_SESSION_FD"
+    
+    # (salt, итерации, производный ключ) последней расшифровки и ключ от предыдущего процесса
+    _derived = None
+    _handoff = None
+    _handoff_taken = False
+    
     @staticmethod
     def get_encryption_key():
         env_path = Path("session") / ".env"
@@ -51,43 +76,111 @@ class SessionManager:
         raise Exception("Ключ шифрования не найден в .env")
 
     @staticmethod
-    def encrypt_data(data: dict) -> str:
-        key = SessionManager.get_encryption_key()
+    def unpack(encrypted_data: str):
+        """(итерации, salt, iv, шифртекст) из содержимого файла сессии"""
+        iterations = SessionManager.LEGACY_ITERATIONS
+        if "$" in encrypted_data:
+            prefix, encrypted_data = encrypted_data.split("$", 1)
+            iterations = int(prefix)
+        
+        data = base64.b64decode(encrypted_data)
+        return iterations, data[:16], data[16:32], data[32:]
+    
+    @classmethod
+    def derive_key(cls, salt: bytes, iterations: int) -> bytes:
+        """Производный ключ; ключ, переданный предыдущим процессом, используется без PBKDF2"""
+        handoff = cls.take_handoff()
+        if handoff and handoff[0] == salt and handoff[1] == iterations:
+            return handoff[2]
+        
+        key = cls.get_encryption_key()
+        return hashlib.pbkdf2_hmac('sha256', key.encode(), salt, iterations, 32)
+    
+    @classmethod
+    def encrypt_data(cls, data: dict, iterations: int = None) -> str:
+        iterations = iterations or BotConfig.SESSION["kdf_iterations"]
         salt = os.urandom(16)
-        derived_key = hashlib.pbkdf2_hmac('sha256', key.encode(), salt, 100000, 32)
+        derived_key = hashlib.pbkdf2_hmac('sha256', cls.get_encryption_key().encode(), salt, iterations, 32)
         
         cipher = AES.new(derived_key, AES.MODE_CBC, os.urandom(16))
         encrypted = cipher.encrypt(pad(json.dumps(data).encode(), AES.block_size))
         
-        return base64.b64encode(salt + cipher.iv + encrypted).decode()
-
-    @staticmethod
-    def decrypt_data(encrypted_data: str) -> dict:
-        key = SessionManager.get_encryption_key()
-        data = base64.b64decode(encrypted_data)
+        cls._derived = (salt, iterations, derived_key)
+        return f"{iterations}$" + base64.b64encode(salt + cipher.iv + encrypted).decode()
         
-        salt = data[:16]
-        iv = data[16:32]
-        encrypted = data[32:]
+    @classmethod
+    def decrypt_data(cls, encrypted_data: str) -> dict:
+        iterations, salt, iv, encrypted = cls.unpack(encrypted_data)
         
-        derived_key = hashlib.pbkdf2_hmac('sha256', key.encode(), salt, 100000, 32)
+        derived_key = cls.derive_key(salt, iterations)
         cipher = AES.new(derived_key, AES.MODE_CBC, iv)
         decrypted = unpad(cipher.decrypt(encrypted), AES.block_size)
         
+        cls._derived = (salt, iterations, derived_key)
         return json.loads(decrypted.decode())
 
+    @classmethod
+    def handoff(cls):
+        """
+        Передаёт производный ключ процессу, который заменит текущий через os.execl.
+        Ключ пишется в pipe, читающий конец наследуется, его номер - в переменной окружения
+        """
+        if not BotConfig.SESSION["handoff"] or cls._derived is None or os.name != "posix":
+            return False
+        
+        salt, iterations, derived_key = cls._derived
+        read_fd, write_fd = os.pipe()
+        os.write(write_fd, json.dumps([salt.hex(), iterations, derived_key.hex()]).encode())
+        os.close(write_fd)
+        os.set_inheritable(read_fd, True)
+        os.environ[cls.HANDOFF_ENV] = str(read_fd)
+        return True
+    
+    @classmethod
+    def take_handoff(cls):
+        """Читает ключ от предыдущего процесса (один раз) и закрывает pipe"""
+        if not cls._handoff_taken:
+            cls._handoff_taken = True
+            fd = os.environ.pop(cls.HANDOFF_ENV, None)
+            if fd:
+                try:
+                    with os.fdopen(int(fd), 'rb') as f:
+                        salt, iterations, derived_key = json.loads(f.read())
+                    cls._handoff = (bytes.fromhex(salt), iterations, bytes.fromhex(derived_key))
+                except (OSError, ValueError) as e:
+                    logger.warning(f"Не удалось принять ключ сессии от предыдущего процесса: {str(e)}")
+        return cls._handoff
+    
+    @classmethod
+    def migrate(cls, iterations: int = None):
+        """Перешифровывает Huekka.session с новой стоимостью KDF (по умолчанию SESSION.kdf_iterations)"""
+        session_path = Path("session") / "Huekka.session"
+        with open(session_path, 'r') as f:
+            session_data = cls.decrypt_data(f.read().strip())
+        
+        encrypted = cls.encrypt_data(session_data, iterations)
+        temp_path = session_path.with_suffix(".tmp")
+        with open(temp_path, 'w') as f:
+            f.write(encrypted)
+        os.replace(temp_path, session_path)
+        return cls.unpack(encrypted)[0]
+
 class UserBot:
-    def __init__(self):
+    def __init__(self, client=None):
         self.client = None
         self.api_id = None
         self.api_hash = None
         self.modules = {}
         self.commands = {}
+        self.module_index = NameIndex()
+        self.command_index = NameIndex()
+        self.registry_version = 0  # Увеличивается при каждом изменении набора команд и модулей
         self.cache_dir = "cash"
         self.module_descriptions = {}
         self.post_restart_actions = []
         self.last_loaded_module = None
         self.config = BotConfig
+        self.core_modules = set(BotConfig.CORE_MODULES)
         self.owner_id = None
         self.start_time = time.time()
         
@@ -96,9 +189,10 @@ class UserBot:
         
         self.db = DatabaseManager()
         
-        self._init_client()
+        self._init_client(client)
         
         self.command_prefix = self._load_prefix_from_db()
+        self._command_pattern = None
         
         # Загружаем настройки автоклинера из базы данных
         autoclean_enabled = self.db.get_config_value('autoclean_enabled', 'True').lower() == 'true'
@@ -106,14 +200,29 @@ class UserBot:
         
         self.autocleaner = AutoCleaner(self, enabled=autoclean_enabled, delay=autoclean_delay)
         self.apilimiter = APILimiter(self)
+        self.media = MediaCache(self)
+        self.animator = Animator(self)
+        self.update_checker = UpdateChecker(self)
+        self.channel_join_task = None
         self.system_module = SystemModule(self)
+        startup.mark("userbot.init")
     
     def _load_prefix_from_db(self):
         """Загрузка префикса команд из базы данных"""
         prefix = self.db.get_config_value('command_prefix', '.')
         return prefix
 
-    def _init_client(self):
+    def _init_client(self, client=None):
+        # Готовый клиент передаётся в замерах и тестах, тогда файл сессии не нужен
+        if client is None:
+            client = self._create_client()
+        
+        self.client = client
+        
+        # Используем CustomHtmlParser вместо CustomParseMode
+        self.client.parse_mode = CustomHtmlParser()
+    
+    def _create_client(self):
         session_path = Path("session") / "Huekka.session"
         if not session_path.exists():
             raise Exception("Файл сессии не найден в папке session")
@@ -130,32 +239,36 @@ class UserBot:
             logger.error(f"Ошибка дешифровки сессии: {str(e)}")
             raise
         
-        self.client = TelegramClient(
+        startup.mark("userbot.session_decrypt")
+        
+        return TelegramClient(
             StringSession(session_str),
             self.api_id,
             self.api_hash
         )
         
-        # Используем CustomHtmlParser вместо CustomParseMode
-        self.client.parse_mode = CustomHtmlParser()
+    def get_command_pattern(self):
+        """Скомпилированный шаблон команды; пересобирается только при смене префикса"""
+        if self._command_pattern is None or self._command_pattern[0] != self.command_prefix:
+            pattern = re.compile(r'^{}(\w+)(?:\s+([\s\S]*))?$'.format(re.escape(self.command_prefix)))
+            self._command_pattern = (self.command_prefix, pattern)
+        return self._command_pattern[1]
     
     async def start(self):
+        # Кулдауны, начатые до перезапуска, продолжают действовать
+        self.apilimiter.load_state()
+        
         await self.client.connect()
         
         if not await self.client.is_user_authorized():
             logger.error("Ошибка авторизации! Проверьте файл сессии")
             return
+        startup.mark("userbot.connect")
         
         me = await self.client.get_me()
         self.owner_id = me.id
         logger.info(f"ID владельца бота: {self.owner_id}")
-        
-        try:
-            channel = await self.client.get_entity('t.me/BotHuekka')
-            await self.client(JoinChannelRequest(channel))
-            logger.info("Успешно подписался на канал @BotHuekka")
-        except Exception as e:
-            logger.error(f"Ошибка при подписке на канал @BotHuekka: {str(e)}")
+        startup.mark("userbot.get_me")
         
         print(f"\n{Colors.LIGHT_BLUE}[+] Welcome Huekka userbot !{Colors.ENDC}")
         print(f"{Colors.LIGHT_BLUE}[+] Usage {self.command_prefix}help to view commands{Colors.ENDC}")
@@ -163,12 +276,18 @@ class UserBot:
         
         @self.client.on(events.NewMessage(outgoing=True))
         async def outgoing_handler(event):
-            """Обработчик исходящих сообщений для команд"""
-            # Сначала проверяем, является ли сообщение командой
-            prefix = re.escape(self.command_prefix)
-            pattern = r'^{}(\w+)(?:\s+([\s\S]*))?$'.format(prefix)
+            """Обработчик исходящих сообщений: команды и эмодзи-маркеры"""
+            raw_text = event.raw_text
+            if not raw_text:
+                return
+            
+            # Обычные сообщения (без префикса) идут только на проверку эмодзи-маркеров
+            if not raw_text.startswith(self.command_prefix):
+                if EmojiHandler.MARKER_PREFIX in raw_text:
+                    await EmojiHandler.process_message(event, self.command_prefix)
+                return
             
-            match = re.match(pattern, event.text)
+            match = self.get_command_pattern().match(event.text)
             if match:
                 # Это команда - обрабатываем как команду
                 cmd = match.group(1).lower()
@@ -181,40 +300,41 @@ class UserBot:
                         return  # Прерываем выполнение после обработки команды
                     except Exception as e:
                         logger.error(f"Ошибка в команде {self.command_prefix}{cmd}: {str(e)}")
-                        await event.edit(f"<a href='emoji/5240241223632954241'>🚫</a> <b>Ошибка:</b> {str(e)}")
+                        await edit_or_split(event, f"<a href='emoji/5240241223632954241'>🚫</a> <b>Ошибка:</b> {str(e)}")
                         return
         
-        @self.client.on(events.NewMessage(outgoing=True))
-        async def emoji_handler(event):
-            """Обработчик исходящих сообщений для эмодзи"""
-            # Пропускаем команды и сообщения без текста
-            if not event.text or event.text.startswith(self.command_prefix):
+        @self.client.on(events.Raw(types=types.UpdateChannel))
+        async def channel_update_handler(update):
+            """Отписка от канала бота: при следующем запуске подписка проверяется заново"""
+            state = self._load_channel_state()
+            if state.get("channel_id") != update.channel_id or not state.get("checked_at"):
                 return
             
-            # Проверяем наличие эмодзи-маркеров в сообщении
-            if '<emoji document_id=' in event.text:
+            # UpdateChannel приходит на любое изменение канала; важно только членство
+            peer = types.PeerChannel(update.channel_id)
+            channel = getattr(update, '_entities', {}).get(utils.get_peer_id(peer))
+            if channel is None:
                 try:
-                    logger.info(f"Обнаружены эмодзи-маркеры в сообщении: {event.text}")
-                    
-                    # Преобразуем маркеры в HTML формат
-                    new_text = EmojiHandler.convert_emoji_markers(event.text)
-                    
-                    if new_text != event.text:
-                        logger.info(f"Преобразовано в: {new_text}")
-                        await event.edit(new_text)
-                        logger.info("Сообщение успешно обработано с эмодзи")
-                    else:
-                        logger.info("Текст не изменился после преобразования")
-                        
+                    channel = await self.client.get_entity(peer)
                 except Exception as e:
-                    logger.error(f"Ошибка при обработке эмодзи-маркеров: {str(e)}")
+                    logger.debug(f"Не удалось проверить подписку на канал: {str(e)}")
+                    return
+            
+            if getattr(channel, 'left', False):
+                state["checked_at"] = 0
+                self.db.set_config_value('channel_join', json.dumps(state))
         
         await self.load_modules()
+        startup.mark("userbot.load_modules")
         
         if self.autocleaner.enabled:
             await self.autocleaner.start()
             logger.info("Автоочистка запущена")
         
+        # Проверка обновлений и подписка на канал идут в фоне и не задерживают запуск
+        await self.update_checker.start()
+        self.channel_join_task = asyncio.create_task(self.join_channel())
+        
         for action in self.post_restart_actions:
             try:
                 await action()
@@ -240,12 +360,61 @@ class UserBot:
             finally:
                 self.last_loaded_module = None
         
+        startup.finish()
         await self.client.run_until_disconnected()
 
+    def _load_channel_state(self):
+        try:
+            return json.loads(self.db.get_config_value('channel_join', '{}'))
+        except ValueError:
+            return {}
+    
+    async def _send_join(self, channel):
+        # joinChannel запрещён лимитером для модулей, подписка ядра на свой канал разрешена явно
+        with self.apilimiter.trusted():
+            await self.client(JoinChannelRequest(channel))
+    
+    async def join_channel(self):
+        """
+        Подписка на канал бота в фоне после загрузки модулей.
+        Состояние (id, access_hash, время проверки) хранится в config.db: пока не истёк
+        channel_join_ttl, запросов нет, а с сохранённым access_hash не нужен get_entity
+        """
+        username = BotConfig.SYSTEM["channel"]
+        state = self._load_channel_state()
+        if state.get("username") != username:
+            state = {"username": username}
+        
+        if time.time() - state.get("checked_at", 0) < BotConfig.SYSTEM["channel_join_ttl"]:
+            return
+        
+        try:
+            joined = False
+            if state.get("channel_id"):
+                try:
+                    await self._send_join(types.InputChannel(state["channel_id"], state["access_hash"]))
+                    joined = True
+                except (ChannelInvalidError, ChannelPrivateError):
+                    # access_hash устарел - ищем канал заново
+                    pass
+            
+            if not joined:
+                channel = await self.client.get_entity(f't.me/{username}')
+                await self._send_join(channel)
+                state["channel_id"] = channel.id
+                state["access_hash"] = channel.access_hash
+            
+            state["checked_at"] = time.time()
+            self.db.set_config_value('channel_join', json.dumps(state))
+            logger.info(f"Успешно подписался на канал @{username}")
+        except Exception as e:
+            logger.error(f"Ошибка при подписке на канал @{username}: {str(e)}")
+
     async def load_modules(self):
         """Загрузка модулей из всех директорий"""
         modules_dirs = ["core", "modules"]
         protected_names = ["typing", "sys", "os", "json", "asyncio", "logging", "importlib", "telethon", "config"]
+        module_infos = {}
         
         for modules_dir in modules_dirs:
             if not os.path.exists(modules_dir):
@@ -256,10 +425,6 @@ class UserBot:
                 if file.endswith(".py") and file != "__init__.py":
                     module_name = file[:-3]
                     
-                    # Пропускаем updater только в core директории
-                    if modules_dir == "core" and module_name == "updater":
-                        continue
-                    
                     if module_name in protected_names:
                         logger.error(f"Пропуск модуля с защищенным именем: {file}")
                         continue
@@ -285,20 +450,40 @@ class UserBot:
                             
                             logger.debug(f"Модуль {module_name} загружен из {modules_dir} (команд: {after - before})")
                             
-                            # Сохраняем информацию о модуле в базу данных
+                            # Запоминаем информацию о модуле для сверки с базой данных
                             if hasattr(module, 'get_module_info'):
-                                module_info = module.get_module_info()
-                                self.db.set_module_info(
-                                    module_info['name'],
-                                    module_info['developer'],
-                                    module_info['version'],
-                                    module_info['description'],
-                                    module_info['commands']
-                                )
+                                module_info = dict(module.get_module_info())
+                                module_info['is_stock'] = module_info['name'] in self.core_modules
+                                module_infos[module_info['name']] = module_info
                     except Exception as e:
                         error_msg = f"Ошибка загрузки модуля {file} из {modules_dir}: {str(e)}"
                         logger.error(error_msg)
 
+        self.reconcile_module_info(module_infos)
+    
+    def build_module_info(self, module_name):
+        """Информация о модуле по данным реестра команд"""
+        return {
+            "name": module_name,
+            "developer": "@BotHuekka",
+            "version": "1.0.0",
+            "description": self.module_descriptions.get(module_name, ""),
+            "commands": [
+                {"command": cmd, "description": data.get("description", "Без описания")}
+                for cmd, data in self.modules.get(module_name, {}).items()
+            ],
+            "is_stock": module_name in self.core_modules
+        }
+    
+    def reconcile_module_info(self, module_infos):
+        """Приводит таблицу module_info в соответствие с загруженными модулями одной транзакцией"""
+        registry = {}
+        for module_name in self.modules:
+            registry[module_name] = module_infos.get(module_name) or self.build_module_info(module_name)
+        
+        updated, removed = self.db.reconcile_module_info(registry)
+        logger.info(f"Информация о модулях сверена с БД (обновлено: {updated}, удалено: {removed})")
+
     def register_command(self, cmd, handler, description="", module_name="System"):
         self.commands[cmd] = {
             "handler": handler,
@@ -313,22 +498,73 @@ class UserBot:
             "description": description
         }
     
+        self.command_index.add(cmd)
+        self.module_index.add(module_name)
+        self.bump_registry()
+    
+    def unregister_module(self, module_name):
+        """Удаление команд, описания и записей индекса модуля"""
+        removed_commands = [
+            cmd for cmd, data in self.commands.items()
+            if data.get("module") and data.get("module").lower() == module_name.lower()
+        ]
+        
+        for cmd in removed_commands:
+            del self.commands[cmd]
+            self.command_index.remove(cmd)
+        
+        self.modules.pop(module_name, None)
+        self.module_descriptions.pop(module_name, None)
+        self.module_index.remove(module_name)
+        self.bump_registry()
+        
+        return removed_commands
+    
+    def bump_registry(self):
+        """Отмечает изменение набора команд и модулей (сбрасывает кэши, зависящие от registry_version)"""
+        self.registry_version += 1
+    
     def set_module_description(self, module_name, description):
         self.module_descriptions[module_name] = description
+        self.bump_registry()
     
     def add_post_restart_action(self, action):
         self.post_restart_actions.append(action)
     
+    def handoff_session(self):
+        """Передаёт ключ сессии процессу после os.execl (см. SessionManager.handoff)"""
+        return SessionManager.handoff()
+    
     async def restart(self):
         logger.info("Перезагрузка бота...")
         if hasattr(self, 'autocleaner') and self.autocleaner.is_running:
             await self.autocleaner.stop()
+        self.apilimiter.save_state()
+        stop_logging()
+        startup.restart()
+        self.handoff_session()
         os.execl(sys.executable, sys.executable, *sys.argv)
     
     async def stop(self):
+        if hasattr(self, 'animator'):
+            self.animator.cancel()
+        
         if hasattr(self, 'autocleaner') and self.autocleaner.is_running:
             await self.autocleaner.stop()
         
+        if hasattr(self, 'update_checker'):
+            await self.update_checker.stop()
+        
+        if hasattr(self, 'limits_module'):
+            await self.limits_module.stop()
+        
+        channel_join_task = getattr(self, 'channel_join_task', None)
+        if channel_join_task and not channel_join_task.done():
+            channel_join_task.cancel()
+        
+        if hasattr(self, 'apilimiter'):
+            self.apilimiter.save_state()
+        
         if self.client and self.client.is_connected():
             await self.client.disconnect()
 
@@ -342,4 +578,10 @@ async def main():
         await bot.stop()
 
 if __name__ == "__main__":
-    asyncio.run(main())
+    # python userbot.py --migrate-session [итерации] - перешифровать сессию с новой стоимостью KDF
+    if "--migrate-session" in sys.argv:
+        args = sys.argv[sys.argv.index("--migrate-session") + 1:]
+        iterations = SessionManager.migrate(int(args[0]) if args else None)
+        print(f"Huekka.session перешифрован: PBKDF2 {iterations} итераций")
+    else:
+        asyncio.run(main())